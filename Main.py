@@ -5,11 +5,26 @@ This file initializes the App class and starts the game loop.
 Separating the entry point helps maintain modularity and clarity.
 """
 
+import startup
+import argparse
+import pygame
+startup.mark("import pygame")
 from app import App
+startup.mark("import app")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Minesweeper Graph AI")
+    parser.add_argument("--metrics-file", help="write Prometheus text-format metrics to this file")
+    parser.add_argument("--metrics-port", type=int, help="serve metrics on http://127.0.0.1:PORT/metrics")
+    parser.add_argument("--metrics-interval", type=float, default=5.0, help="seconds between metrics file writes")
+    parser.add_argument("--startup-report", action="store_true", help="print startup stage times at the first frame")
+    args = parser.parse_args()
+
     # Create the main application instance
     app = App()
+    app.metrics.export(args.metrics_file, args.metrics_port, args.metrics_interval)
+    app.startup_report = args.startup_report
+    startup.mark("App()")
     
     # Start the game loop
     app.run()
\ No newline at end of file
@@ -1,4 +1,4 @@
-import random
+from game_log import SolverLog
 
 # ------------------------------------------------------------
 # GREEDY AI SOLVER FOR MINESWEEPER
@@ -15,18 +15,17 @@ import random
 # ------------------------------------------------------------
 
 class AI_Solver:
-    def __init__(self):
+    def __init__(self, silent=False):
         # Stores recent AI decisions for display and debugging
-        self.logs = ["Game Started. AI Ready."]
+        self.logs = SolverLog("Game Started. AI Ready.", silent=silent)
 
-    def log(self, message):
+    def log(self, message, *args):
         """
         Adds a message to the AI log.
-        Maintains only the most recent log entries to avoid clutter.
+        Formatting with args is deferred until the log is displayed,
+        and only the most recent entries are kept (ring buffer).
         """
-        self.logs.append(message)
-        if len(self.logs) > 8:
-            self.logs.pop(0)
+        self.logs.add(message, *args)
 
     def get_move(self, board, is_hint=False):
         """
@@ -91,32 +90,24 @@ class AI_Solver:
         if moves_reveal:
             target = moves_reveal[0]  # Greedy choice: first safe move
             if not is_hint:
-                self.log(f"AI: Safe clear at ({target.r},{target.c})")
+                self.log("AI: Safe clear at (%d,%d)", target.r, target.c)
             return (target.r, target.c, 'reveal')
 
         # Priority 2: Flag mine
         if moves_flag:
             target = moves_flag[0]  # Greedy choice: first deduced mine
             if not is_hint:
-                self.log(f"AI: Flagging mine at ({target.r},{target.c})")
+                self.log("AI: Flagging mine at (%d,%d)", target.r, target.c)
             return (target.r, target.c, 'flag')
 
         # Priority 3: Guess (only when logically stuck)
         if not is_hint:
-            valid_moves = []
-
-            # Collect all unrevealed and unflagged cells
-            for r in range(board.rows):
-                for c in range(board.cols):
-                    cell = board.grid[r][c]
-                    if not cell.is_revealed and not cell.is_flagged:
-                        valid_moves.append((r, c))
-
-            # Random selection represents unavoidable uncertainty
-            if valid_moves:
-                move = random.choice(valid_moves)
-                self.log(f"AI: Guessing at ({move[0]},{move[1]})")
-                return (move[0], move[1], 'reveal')
+            # Random selection represents unavoidable uncertainty.
+            # The board keeps an indexed hidden-cell set, so this is O(1).
+            cell = board.random_hidden()
+            if cell:
+                self.log("AI: Guessing at (%d,%d)", cell.r, cell.c)
+                return (cell.r, cell.c, 'reveal')
 
         # No valid move available
         return None
@@ -5,13 +5,21 @@ import os
 import copy
 import time
 import threading
+import importlib
+import startup
 from constants import *
 from board import Board
-from ai_solver import AI_Solver
+from board_file import save_game, load_game, read_session
 from button import Button   
-from solver_dnc import DNCSolver
-from solver_dp import DPSolver
-from solver_backtrack import BacktrackingSolver
+from game_log import MoveLog, SessionLogWriter, LogWriter
+from log_store import LogStore
+from solver_stats import SolverStats
+from metrics import GameMetrics
+from renderer import BoardRenderer
+from solver_worker import SolverWorker
+from profiler import FrameProfiler
+from replay import ReplayRecorder, Replay, ReplayPlayer, ACTION_CODES
+from text_cache import get_font, render_text
 
 
 
@@ -19,6 +27,20 @@ from solver_backtrack import BacktrackingSolver
 C_THINKING = (0, 255, 255)   # Cyan for considering candidates
 C_CHOOSING = (255, 255, 0)   # Yellow for the selected move
 
+# Solver classes by menu name, imported on first use (a Solo game only loads its hint solver)
+SOLVER_CLASSES = {
+    "Greedy": ("ai_solver", "AI_Solver"),
+    "D&C": ("solver_dnc", "DNCSolver"),
+    "DP": ("solver_dp", "DPSolver"),
+    "BT": ("solver_backtrack", "BacktrackingSolver"),
+}
+
+
+def make_solver(name, **kwargs):
+    module, cls = SOLVER_CLASSES[name]
+    return getattr(importlib.import_module(module), cls)(**kwargs)
+
+
 # --- 5. MENU & APP MANAGEMENT ---
 class App:
     def __init__(self):
@@ -29,10 +51,8 @@ class App:
         self.screen = pygame.display.set_mode((self.screen_w, self.screen_h), pygame.RESIZABLE)
         pygame.display.set_caption("Minesweeper Graph AI")
         self.clock = pygame.time.Clock()
-        
-        self.font = pygame.font.SysFont("Segoe UI", 20, bold=True)
-        self.font_lg = pygame.font.SysFont("Segoe UI", 40, bold=True)
-        self.font_xl = pygame.font.SysFont("Segoe UI", 80, bold=True) 
+        # Print startup.report() once the first menu frame is up (Main.py --startup-report)
+        self.startup_report = False
 
         self.grid_size = 8
         self.difficulty = "Easy" 
@@ -45,16 +65,59 @@ class App:
         # Resolve all file paths relative to this script directory.
         self.base_dir = os.path.dirname(os.path.abspath(__file__))
         self.logs_dir = os.path.join(self.base_dir, "Game_logs")
-        self.log_file_path = os.path.join(self.logs_dir, "all_game_logs.txt")
-        
-        self.bg_image = None
-        bg_path = os.path.join(self.base_dir, "Images", "Startup-Page-BG-Image.jpg")
-        try:
-            loaded_img = pygame.image.load(bg_path).convert()
-            self.bg_image = pygame.transform.smoothscale(loaded_img, (self.screen_w, self.screen_h))
-        except Exception as e:
-            print(f"Could not load background: {e}")
-            self.bg_image = None
+        # Append-only session log (segments + index); older all_game_logs.txt files are left as they are
+        self.session_log = SessionLogWriter(self.logs_dir)
+        # Structured copy of every session for queries (python log_store.py summary ...)
+        self.log_store = LogStore(os.path.join(self.logs_dir, "game_logs.sqlite"))
+        # Console echo and session saves are written on this thread, off the game loop
+        self.log_writer = LogWriter(self.session_log, self.log_store)
+        # Prometheus-format metrics; exported only if Main.py is given --metrics-file/--metrics-port
+        self.metrics = GameMetrics(self.log_writer)
+        # Unfinished game left via MENU or quit, offered as RESUME in the menu (see board_file.py)
+        self.save_path = os.path.join(self.logs_dir, "saves", "current.msb")
+        self.resume_game = False
+
+        # Background image, loaded on first use; it and the surfaces derived
+        # from it are cached per window size (see cached_surface)
+        self._bg_source = None
+        self._surfaces = {}
+        # pygame ticks when the running fade-in started, or None (see fade_transition)
+        self._transition_start = None
+
+    # Fonts are created on first use; get_font keeps them
+    @property
+    def font(self):
+        return get_font("Segoe UI", 20, bold=True)
+
+    @property
+    def font_lg(self):
+        return get_font("Segoe UI", 40, bold=True)
+
+    @property
+    def font_xl(self):
+        return get_font("Segoe UI", 80, bold=True)
+
+    def cached_surface(self, name, build):
+        """Full-window surface from build(size), rebuilt only when the window size changes."""
+        size = self.screen.get_size()
+        entry = self._surfaces.get(name)
+        if entry is None or entry[0] != size:
+            entry = self._surfaces[name] = (size, build(size))
+        return entry[1]
+
+    @property
+    def bg_image(self):
+        """The background scaled to the window, or None if it could not be loaded."""
+        if self._bg_source is None:
+            bg_path = os.path.join(self.base_dir, "Images", "Startup-Page-BG-Image.jpg")
+            try:
+                self._bg_source = pygame.image.load(bg_path).convert()
+            except Exception as e:
+                print(f"Could not load background: {e}")
+                self._bg_source = False
+        if not self._bg_source:
+            return None
+        return self.cached_surface("bg", lambda size: pygame.transform.smoothscale(self._bg_source, size))
 
     def run(self):
         while True:
@@ -64,70 +127,103 @@ class App:
                 self.settings_loop()
             elif self.mode == "Game":
                 self.game_loop()
+            elif self.mode == "Replay":
+                self.replay_loop()
 
     def calc_mines(self):
         total = self.grid_size * self.grid_size
-        ratio = 0.12 if self.difficulty == "Easy" else 0.17 if self.difficulty == "Medium" else 0.22
-        return int(total * ratio)
+        return int(total * MINE_RATIO[self.difficulty])
 
     def get_blurred_background(self):
-        if not self.bg_image: return None
-        small_w = self.screen_w // 10
-        small_h = self.screen_h // 10
-        small_surf = pygame.transform.smoothscale(self.bg_image, (small_w, small_h))
-        blurred_surf = pygame.transform.smoothscale(small_surf, (self.screen_w, self.screen_h))
-        dark_overlay = pygame.Surface((self.screen_w, self.screen_h))
-        dark_overlay.fill((0, 0, 0))
-        dark_overlay.set_alpha(100) 
-        blurred_surf.blit(dark_overlay, (0,0))
-        return blurred_surf
-
+        bg = self.bg_image
+        if not bg: return None
+
+        def build(size):
+            small_surf = pygame.transform.smoothscale(bg, (max(1, size[0] // 10), max(1, size[1] // 10)))
+            blurred_surf = pygame.transform.smoothscale(small_surf, size)
+            dark_overlay = pygame.Surface(size)
+            dark_overlay.fill((0, 0, 0))
+            dark_overlay.set_alpha(100) 
+            blurred_surf.blit(dark_overlay, (0,0))
+            return blurred_surf
+        return self.cached_surface("bg_blur", build)
+
+    # --- SCREEN TRANSITIONS ---
+    # Switching screens starts a fade-in instead of blocking on a fade-out:
+    # each loop draws its frame as usual and draw_transition() lays a black
+    # overlay over it, lighter every frame until TRANSITION_MS has passed,
+    # so input is handled throughout and nothing extra runs afterwards.
     def fade_transition(self):
-        fade_surf = pygame.Surface((self.screen_w, self.screen_h))
-        fade_surf.fill((0, 0, 0))
-        for alpha in range(0, 255, 15): 
-            fade_surf.set_alpha(alpha)
-            self.screen.blit(fade_surf, (0, 0))
-            pygame.display.flip()
-            pygame.time.delay(10)
+        self._transition_start = pygame.time.get_ticks()
+
+    @property
+    def in_transition(self):
+        return self._transition_start is not None
+
+    def draw_transition(self):
+        """Blits the fade-in overlay over the frame just drawn; True if it did."""
+        if self._transition_start is None:
+            return False
+        t = (pygame.time.get_ticks() - self._transition_start) / TRANSITION_MS
+        if t >= 1:
+            self._transition_start = None
+            return False
+
+        def build(size):
+            surf = pygame.Surface(size)
+            surf.fill((0, 0, 0))
+            return surf
+        overlay = self.cached_surface("fade", build)
+        overlay.set_alpha(int(255 * (1 - t)))
+        self.screen.blit(overlay, (0, 0))
+        return True
 
     def menu_loop(self):
         def init_ui():
             cx, cy = self.screen_w // 2, self.screen_h // 2
             b1 = Button(cx - 100, cy + 100, 200, 50, "SOLO SWEEPER") 
             b2 = Button(cx - 110, cy + 170, 220, 50, "MIND VS MACHINE")
-            return b1, b2
+            if not os.path.exists(self.save_path):
+                return b1, b2, Button(cx - 80, cy + 240, 160, 40, "REPLAYS"), None
+            b3 = Button(cx - 170, cy + 240, 160, 40, "REPLAYS")
+            b4 = Button(cx + 10, cy + 240, 160, 40, "RESUME")
+            return b1, b2, b3, b4
 
-        btn_single, btn_cpu = init_ui()
+        btn_single, btn_cpu, btn_replays, btn_resume = init_ui()
 
         while self.mode == "Menu":
-            if self.bg_image:
-                bg = pygame.transform.smoothscale(self.bg_image, (self.screen_w, self.screen_h))
+            bg = self.bg_image
+            if bg:
                 self.screen.blit(bg, (0, 0))
             else:
                 self.screen.fill(C_BG)
 
             cx, cy = self.screen_w // 2, self.screen_h // 2
 
-            shadow = self.font_xl.render("MINESWEEPER AI", True, (0, 0, 0))
+            shadow = render_text(self.font_xl, "MINESWEEPER AI", (0, 0, 0))
             shadow_rect = shadow.get_rect(center=(cx + 4, cy - 80 + 4))
             self.screen.blit(shadow, shadow_rect)
 
-            title = self.font_xl.render("MINESWEEPER AI", True, C_ACCENT)
+            title = render_text(self.font_xl, "MINESWEEPER AI", C_ACCENT)
             title_rect = title.get_rect(center=(cx, cy - 80))
             self.screen.blit(title, title_rect)
 
             btn_single.draw(self.screen, self.font)
             btn_cpu.draw(self.screen, self.font)
+            btn_replays.draw(self.screen, self.font)
+            if btn_resume:
+                btn_resume.draw(self.screen, self.font)
 
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
+                    self.log_writer.close()
+                    self.metrics.close()
                     pygame.quit(); sys.exit()
 
                 if event.type == pygame.VIDEORESIZE:
                     self.screen_w, self.screen_h = event.w, event.h
                     self.screen = pygame.display.set_mode((self.screen_w, self.screen_h), pygame.RESIZABLE)
-                    btn_single, btn_cpu = init_ui()
+                    btn_single, btn_cpu, btn_replays, btn_resume = init_ui()
 
                 if btn_single.is_clicked(event):
                     self.fade_transition()
@@ -141,13 +237,226 @@ class App:
                     self.mode = "Settings"
                     return
 
+                if btn_replays.is_clicked(event):
+                    self.fade_transition()
+                    self.mode = "Replay"
+                    return
+
+                if btn_resume and btn_resume.is_clicked(event):
+                    try:
+                        saved = read_session(self.save_path)
+                    except (OSError, ValueError) as e:
+                        print(f"Warning: could not read saved game: {e}")
+                        btn_resume = None
+                        continue
+                    # Settings of the saved game; game_loop then loads the board itself
+                    self.grid_size = saved["rows"]
+                    self.difficulty = saved["difficulty"]
+                    self.vs_cpu = saved["mode"] == "vs_cpu"
+                    self.auto_solve_on = saved["mode"] == "auto"
+                    self.ai_algorithm = saved["algorithm"]
+                    self.resume_game = True
+                    self.fade_transition()
+                    self.mode = "Game"
+                    return
+
+            self.draw_transition()
             pygame.display.flip()
+            startup.mark("first frame")
+            if self.startup_report:
+                self.startup_report = False
+                startup.report()
             self.clock.tick(60)
 
+    def replay_loop(self):
+        # --- REPLAY VIEWER ---
+        # Plays back saved .msr replays through ReplayPlayer: seeking jumps to
+        # the nearest checkpoint, so scrubbing long games stays interactive.
+        replay_dir = os.path.join(self.logs_dir, "replays")
+        files = sorted(f for f in os.listdir(replay_dir) if f.endswith(".msr")) if os.path.isdir(replay_dir) else []
+        if not files:
+            print("No replays saved yet.")
+            self.mode = "Menu"
+            return
+
+        rates = [1, 2, 4, 8, 16, 32, 64, 128, 256, 512]
+        font_info = get_font("Consolas", 15)
+        view = {'file': len(files) - 1, 'rate': 3, 'playing': False, 'acc': 0.0, 'scrubbing': False}
+
+        def load(i):
+            player = ReplayPlayer(Replay.load(os.path.join(replay_dir, files[i])))
+            n = max(player.board.rows, player.board.cols)
+            cell = max(MIN_CELL_SIZE, min(CELL_SIZE, MAX_VIEW_PX // n))
+            renderer = BoardRenderer(player.board, cell)
+            grid_px = min(n * cell, MAX_VIEW_PX)
+            w = max(800, MARGIN * 2 + grid_px + SIDEBAR_WIDTH)
+            h = max(600, MARGIN * 2 + grid_px + 40)
+            if (w, h) != self.screen.get_size():
+                self.screen = pygame.display.set_mode((w, h), pygame.RESIZABLE)
+            renderer.set_view_size(grid_px, grid_px)
+            view.update(playing=False, acc=0.0)
+            return player, renderer
+
+        def init_ui():
+            w, h = self.screen.get_size()
+            x = renderer.grid_rect().right + 40
+            return (Button(x + 20, h - 120, 90, 40, "< STEP"), Button(x + 120, h - 120, 110, 40, "PLAY"),
+                    Button(x + 240, h - 120, 90, 40, "STEP >"), Button(w - 180, h - 40, 140, 30, "BACK"))
+
+        def timeline_rect():
+            grid = renderer.grid_rect()
+            return pygame.Rect(grid.x, grid.bottom + 30, grid.width, 12)
+
+        def seek_to_x(x):
+            tl = timeline_rect()
+            player.seek(round((x - tl.x) / max(1, tl.width) * len(player)))
+
+        def draw_panel(buttons):
+            w, h = self.screen.get_size()
+            x = renderer.grid_rect().right + 40
+            panel = pygame.Rect(x, MARGIN, SIDEBAR_WIDTH, h - MARGIN * 2)
+            pygame.draw.rect(self.screen, C_BG, panel.inflate(4, 4))
+            pygame.draw.rect(self.screen, C_PANEL, panel, border_radius=10)
+            pygame.draw.rect(self.screen, C_ACCENT, panel, 2, border_radius=10)
+            board = player.board
+            move = player.last_move()
+            lines = [
+                (files[view['file']], (150, 150, 150)),
+                (f"Replay {view['file'] + 1} of {len(files)}  ([ / ] to switch)", (150, 150, 150)),
+                (f"Board {board.rows}x{board.cols}, {board.total_mines} mines, seed {board.seed}", C_TEXT_MAIN),
+                (f"Move {player.pos} / {len(player)}", C_ACCENT),
+                (f"{move[0]} {move[1]}" + ("" if move[1] == "Undo" else f" ({move[2]},{move[3]})") if move else "Start", C_TEXT_MAIN),
+                ("GAME OVER" if board.game_over else "", C_MINE),
+                (f"{'Playing' if view['playing'] else 'Paused'} at {rates[view['rate']]} moves/s", C_FLAG),
+                ("", C_TEXT_MAIN),
+                ("Space  play / pause", (120, 120, 130)),
+                ("Left/Right  step (Shift: 10)", (120, 120, 130)),
+                ("PgUp/PgDn  100 moves, Home/End", (120, 120, 130)),
+                ("-/+  playback speed", (120, 120, 130)),
+                ("Click the timeline to seek", (120, 120, 130)),
+            ]
+            for i, (text, col) in enumerate(lines):
+                self.screen.blit(render_text(font_info, text, col), (x + 20, MARGIN + 20 + i * 24))
+            buttons[1].text = "PAUSE" if view['playing'] else "PLAY"
+            for b in buttons:
+                b.draw(self.screen, self.font)
+            return panel.inflate(4, 4)
+
+        def draw_timeline():
+            tl = timeline_rect()
+            area = tl.inflate(0, 8)
+            pygame.draw.rect(self.screen, C_BG, area)
+            pygame.draw.rect(self.screen, C_GRID, tl, border_radius=4)
+            if len(player):
+                done = tl.copy()
+                done.width = tl.width * player.pos // len(player)
+                pygame.draw.rect(self.screen, C_ACCENT, done, border_radius=4)
+            return area
+
+        player, renderer = load(view['file'])
+        buttons = init_ui()
+        full = True
+
+        while self.mode == "Replay":
+            dt = self.clock.tick(60) / 1000
+            btn_back_step, btn_play, btn_fwd_step, btn_back = buttons
+
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    self.log_writer.close()
+                    self.metrics.close()
+                    pygame.quit(); sys.exit()
+
+                if event.type == pygame.VIDEORESIZE:
+                    self.screen = pygame.display.set_mode((event.w, event.h), pygame.RESIZABLE)
+                    buttons = init_ui()
+                    full = True
+
+                if btn_back.is_clicked(event) or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                    renderer.detach()
+                    self.screen_w, self.screen_h = 800, 600
+                    self.screen = pygame.display.set_mode((800, 600), pygame.RESIZABLE)
+                    self.mode = "Menu"
+                    return
+
+                if btn_play.is_clicked(event):
+                    view['playing'] = not view['playing']
+                if btn_back_step.is_clicked(event):
+                    player.step(-1)
+                if btn_fwd_step.is_clicked(event):
+                    player.step(1)
+
+                if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1 and timeline_rect().inflate(0, 12).collidepoint(event.pos):
+                    view['scrubbing'] = True
+                    seek_to_x(event.pos[0])
+                if event.type == pygame.MOUSEMOTION and view['scrubbing']:
+                    seek_to_x(event.pos[0])
+                if event.type == pygame.MOUSEBUTTONUP and event.button == 1:
+                    view['scrubbing'] = False
+
+                if event.type == pygame.MOUSEWHEEL:
+                    if pygame.key.get_mods() & pygame.KMOD_CTRL:
+                        renderer.zoom_at(max(MIN_CELL_SIZE, min(MAX_CELL_SIZE, renderer.cell_size + 2 * event.y)), pygame.mouse.get_pos())
+                        full = True
+                    else:
+                        renderer.pan(0, -event.y * renderer.cell_size * 3)
+
+                if event.type == pygame.KEYDOWN:
+                    big = 10 if pygame.key.get_mods() & pygame.KMOD_SHIFT else 1
+                    if event.key == pygame.K_SPACE:
+                        view['playing'] = not view['playing']
+                    elif event.key == pygame.K_RIGHT:
+                        player.step(big)
+                    elif event.key == pygame.K_LEFT:
+                        player.step(-big)
+                    elif event.key == pygame.K_PAGEDOWN:
+                        player.step(100)
+                    elif event.key == pygame.K_PAGEUP:
+                        player.step(-100)
+                    elif event.key == pygame.K_HOME:
+                        player.seek(0)
+                    elif event.key == pygame.K_END:
+                        player.seek(len(player))
+                    elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                        view['rate'] = min(len(rates) - 1, view['rate'] + 1)
+                    elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                        view['rate'] = max(0, view['rate'] - 1)
+                    elif event.key in (pygame.K_LEFTBRACKET, pygame.K_RIGHTBRACKET):
+                        step = 1 if event.key == pygame.K_RIGHTBRACKET else -1
+                        view['file'] = (view['file'] + step) % len(files)
+                        renderer.detach()
+                        player, renderer = load(view['file'])
+                        buttons = init_ui()
+                        full = True
+
+            if view['playing']:
+                view['acc'] += dt * rates[view['rate']]
+                k = int(view['acc'])
+                if k:
+                    view['acc'] -= k
+                    player.step(k)
+                if player.pos >= len(player):
+                    view['playing'] = False
+
+            move = player.last_move()
+            renderer.set_last_move(move[2:] if move and move[1] != "Undo" else None)
+
+            if full or self.in_transition:
+                self.screen.fill(C_BG)
+                renderer.render(self.screen, full=True)
+                draw_panel(buttons)
+                draw_timeline()
+                self.draw_transition()
+                pygame.display.flip()
+                full = False
+            else:
+                rects = renderer.render(self.screen)
+                rects.append(draw_panel(buttons))
+                rects.append(draw_timeline())
+                pygame.display.update(rects)
+
     def settings_loop(self):
-        bg_blur = self.get_blurred_background()
-        
-        sizes = [8, 12, 16, 20]
+        sizes = [8, 12, 16, 20, 30, 50, 100]
         diffs = ["Easy", "Medium", "Hard"]
         algos = ["Greedy", "D&C", "DP", "BT"]
 
@@ -183,38 +492,34 @@ class App:
 
         btns_size, btns_diff, btns_ai, btn_start, btn_auto_solve, btn_clear_log, btn_back = init_ui()
 
-        self.screen.fill((0,0,0))
-        pygame.display.flip()
-        pygame.time.delay(100)
-
         while self.mode == "Settings":
             cx, cy = self.screen_w // 2, self.screen_h // 2
             
+            bg_blur = self.get_blurred_background()
             if bg_blur:
-                bg = pygame.transform.smoothscale(bg_blur, (self.screen_w, self.screen_h))
-                self.screen.blit(bg, (0, 0))
+                self.screen.blit(bg_blur, (0, 0))
             else:
                 self.screen.fill(C_BG)
 
-            title = self.font_lg.render("GAME SETUP", True, C_ACCENT)
+            title = render_text(self.font_lg, "GAME SETUP", C_ACCENT)
             self.screen.blit(title, (cx - 120, cy - 200))
 
-            lbl_size = self.font.render("GRID SIZE:", True, C_TEXT_MAIN)
+            lbl_size = render_text(self.font, "GRID SIZE:", C_TEXT_MAIN)
             self.screen.blit(lbl_size, (cx - 320, cy - 90))
             for b in btns_size: b.draw(self.screen, self.font)
 
-            lbl_diff = self.font.render("DIFFICULTY:", True, C_TEXT_MAIN)
+            lbl_diff = render_text(self.font, "DIFFICULTY:", C_TEXT_MAIN)
             self.screen.blit(lbl_diff, (cx - 340, cy + 10))
             for b in btns_diff: b.draw(self.screen, self.font)
 
             if self.vs_cpu:
-                lbl_ai = self.font.render("AI MODE:", True, C_TEXT_MAIN)
+                lbl_ai = render_text(self.font, "AI MODE:", C_TEXT_MAIN)
                 self.screen.blit(lbl_ai, (cx - 320, cy + 110))
                 for b in btns_ai: b.draw(self.screen, self.font)
 
             # Mines count centered above the action buttons
             info = f"Mines: {self.calc_mines()}"
-            info_surf = self.font.render(info, True, (200, 200, 200)) 
+            info_surf = render_text(self.font, info, (200, 200, 200)) 
             info_rect = info_surf.get_rect(center=(cx, cy + 180))
             self.screen.blit(info_surf, info_rect) 
 
@@ -225,6 +530,8 @@ class App:
 
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
+                    self.log_writer.close()
+                    self.metrics.close()
                     pygame.quit(); sys.exit()
                 
                 if event.type == pygame.VIDEORESIZE:
@@ -262,9 +569,8 @@ class App:
                 
                 if btn_clear_log.is_clicked(event):
                     try:
-                        os.makedirs(self.logs_dir, exist_ok=True)
-                        with open(self.log_file_path, "w") as f:
-                            f.write(f"LOG CLEARED: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+                        # Queued behind any pending saves, so nothing saved earlier survives the clear
+                        self.log_writer.clear(f"LOG CLEARED: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
                         print("Logs cleared successfully.")
                     except Exception as e:
                         print(f"Warning: could not clear logs: {e}")
@@ -274,12 +580,14 @@ class App:
                     self.mode = "Menu"
                     return
 
+            self.draw_transition()
             pygame.display.flip()
             self.clock.tick(60)
 
     def game_loop(self):
         def update_window_size():
-            grid_px = self.grid_size * int(self.cell_size) 
+            # Boards larger than MAX_VIEW_PX scroll inside a viewport instead of growing the window
+            grid_px = min(self.grid_size * int(self.cell_size), MAX_VIEW_PX)
             req_w = MARGIN * 2 + grid_px + SIDEBAR_WIDTH
             req_h = MARGIN * 2 + grid_px
             if req_h < 600: req_h = 600
@@ -295,47 +603,95 @@ class App:
         def init_game():
             return Board(self.grid_size, self.grid_size, self.calc_mines())
 
+        def new_replay(board_obj):
+            # Binary replay (seed + move stream) saved next to the text log, see replay.py
+            stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+            path = os.path.join(self.logs_dir, "replays", f"replay_{stamp}_{board_obj.seed}.msr")
+            return ReplayRecorder(board_obj), path
+
         # --- SELECT THE CORRECT SOLVER ---
-        if self.ai_algorithm == "DP":
-            ai = DPSolver()
-        elif self.ai_algorithm == "D&C":
-            ai = DNCSolver()
-        elif self.ai_algorithm == "BT":
-            ai = BacktrackingSolver()
-        else:
+        ai = make_solver(self.ai_algorithm)
+        if self.ai_algorithm == "Greedy":
             # This uses your original ai_solver.py file!
-            ai = AI_Solver() 
             ai.name = "Greedy"
             
         board = init_game()
+        replay_rec, replay_path = new_replay(board)
         turn = "Human"
         scores = {"Human": {'RS':0, 'CF':0, 'WF':0}, "AI": {'RS':0, 'CF':0, 'WF':0}}
+        saved = None
+        if self.resume_game:
+            self.resume_game = False
+            try:
+                board, saved, replay_data = load_game(self.save_path)
+            except (OSError, ValueError) as e:
+                print(f"Warning: could not load saved game: {e}")
+            else:
+                # Keep recording into the game's original replay file
+                replay_rec = ReplayRecorder.resume(replay_data)
+                replay_path = os.path.join(self.logs_dir, "replays", saved["replay_name"])
+                turn = saved["turn"]
+                scores = saved["scores"]
         ai_timer = 0
         hint = None 
         last_ai_move = None 
-        ai_moves = set() 
+
+        # --- RETAINED RENDERER: repaints only cells that changed ---
+        renderer = BoardRenderer(board, self.cell_size)
+        need_full_redraw = [True]
+        hud_state = [None]
         
         game_started = False
         start_ticks = 0
         elapsed_time = 0
         total_moves = 0 
+        if saved:
+            game_started = not board.first_click
+            elapsed_time = saved["elapsed"]
+            start_ticks = pygame.time.get_ticks() - elapsed_time * 1000
+            total_moves = saved["moves"]
         
         is_resizing = False
-        font_log = pygame.font.SysFont("Consolas", 14)
-        font_stats = pygame.font.SysFont("Consolas", 15)
-        font_stats_hdr = pygame.font.SysFont("Segoe UI", 24, bold=True)
-        font_stats_col = pygame.font.SysFont("Segoe UI", 16, bold=True)
+        is_panning = False
+        font_log = get_font("Consolas", 14)
+        font_stats = get_font("Consolas", 15)
+        font_stats_hdr = get_font("Segoe UI", 24, bold=True)
+        font_stats_col = get_font("Segoe UI", 16, bold=True)
 
-        move_log = []
+        move_log = MoveLog(writer=self.log_writer)
+
+        # --- PROFILER (F3: overlay, F4: dump recent frames to CSV) ---
+        prof = FrameProfiler()
         show_stats_overlay = False
 
+        # --- PROBABILITY HEATMAP (toggle with H) ---
+        prob_map = None  # solver_probability.ProbabilityMap, created the first time H is pressed
+        show_heatmap = False
+        # The map is solved on its own SolverWorker (created with prob_map) against a
+        # snapshot; the last finished map stays on screen until the next one is ready
+        map_worker = None
+        heat_state = {'board': None, 'version': None, 'grid': None}
+
         # --- AUTO SOLVER STATE ---
         auto_solving = self.auto_solve_on
-        auto_solver = BacktrackingSolver()
-        auto_timer = 0
+        auto_solver = make_solver("BT") if auto_solving else None
+        auto_next_at = 0  # pygame ticks (ms) of the next auto-solver move
         if auto_solving:
             auto_solver.log("AutoSolver started!")
 
+        # --- BACKGROUND SOLVING ---
+        # AI and auto-solver moves are computed on a worker thread. phase is None,
+        # 'thinking' (request in flight, candidates highlighted) or 'choosing'
+        # (move highlighted for a moment before it is applied).
+        solver_worker = SolverWorker()
+        solver_state = {'phase': None}
+        # The rest of a batch of certain moves from one solve (SolverWorker.poll),
+        # still valid while the board is at `version` (one mutation per applied move)
+        solver_queue = {'solver': None, 'moves': [], 'version': None}
+        # From a Reset until the worker has run the deferred reset of `ai`
+        # (SolverWorker.defer); `ai` is left alone until then
+        ai_resetting = False
+
         # --- Solver Comparison Stats ---
         solver_names = ["Greedy", "D&C", "DP", "BT"]
         metric_labels = {
@@ -384,12 +740,11 @@ class App:
             return stats
 
         solver_stats = init_solver_stats()
-        comparison_solvers = {
-            "Greedy": AI_Solver(),
-            "D&C": DNCSolver(),
-            "DP": DPSolver(),
-            "BT": BacktrackingSolver(),
-        }
+        # {solver: SolverStats} since the last save; merged into the log store's daily totals on save
+        pending_stats = {}
+        # Own lock: comparison_lock can be held for a long DP count, and saving must not wait for it
+        pending_lock = threading.Lock()
+        comparison_solvers = {}  # silent instance per solver, created by the first comparison run
 
         def get_stats_overlay_geometry():
             panel_w = min(980, game_w - 80)
@@ -407,15 +762,21 @@ class App:
             return "guess" in m
 
         def estimate_reveal_cells(move, board_ref=None):
-            """Simulate a reveal on a board copy to count cells. Uses board_ref if given (thread-safe)."""
+            """Simulate a reveal to count cells. Uses board_ref if given (the comparison thread's own board)."""
             if not move or move[2] != "reveal":
                 return 0
             b = board_ref if board_ref is not None else board
             r, c, _ = move
             if not (0 <= r < b.rows and 0 <= c < b.cols):
                 return 0
-            sim_board = copy.deepcopy(b)
-            res = sim_board.reveal(r, c)
+            if board_ref is None:
+                sim_board = copy.deepcopy(b)
+                res = sim_board.reveal(r, c)
+            else:
+                # Reveal and roll back: much cheaper than copying the whole board
+                saved = b.checkpoint()
+                res = b.reveal(r, c)
+                b.restore(saved)
             return res if res > 0 else 0
 
         def count_dp_valid_solutions(cluster, board_ref=None):
@@ -467,6 +828,8 @@ class App:
             """Update stats for a solver. Uses board_ref if given (thread-safe)."""
             b = board_ref if board_ref is not None else board
             curr = solver_stats[solver_name]
+            stats_version[0] += 1
+            cells = correct = wrong = 0
             if proposed_move:
                 curr["moves_made"] += 1
                 if "total_time_us" not in curr: 
@@ -477,41 +840,82 @@ class App:
                 # Calculate average in microseconds (safe division because moves_made just increased)
                 curr["avg_time"] = round(curr["total_time_us"] / curr["moves_made"])
                 if proposed_move[2] == "reveal":
-                    curr["cells_revealed"] += estimate_reveal_cells(proposed_move, board_ref=b)
+                    cells = estimate_reveal_cells(proposed_move, board_ref=b)
+                    curr["cells_revealed"] += cells
                 elif proposed_move[2] == "flag":
                     r, c, _ = proposed_move
                     if 0 <= r < b.rows and 0 <= c < b.cols:
                         if b.grid[r][c].is_mine:
+                            correct = 1
                             curr["correct_flags"] += 1
                         else:
+                            wrong = 1
                             curr["wrong_flags"] += 1
 
-            latest_log = solver_obj.logs[-1] if getattr(solver_obj, "logs", None) else ""
-            if proposed_move and is_guess_move(latest_log):
+            # Match on the unformatted template so silent solvers never format strings
+            latest_log = solver_obj.logs.last_template()
+            guessed = bool(proposed_move) and is_guess_move(latest_log)
+            if guessed:
                 curr["guesses_made"] += 1
 
+            clusters = solutions = pruned = None
             if curr["clusters_found"] is not None:
-                curr["clusters_found"] += len(getattr(solver_obj, "clusters", []) or [])
+                clusters = len(getattr(solver_obj, "clusters", []) or [])
+                curr["clusters_found"] += clusters
 
             if solver_name == "DP" and curr["valid_solutions"] is not None:
-                dp_total = 0
+                solutions = 0
                 for cluster in getattr(solver_obj, "clusters", []) or []:
-                    dp_total += count_dp_valid_solutions(cluster, board_ref=b)
-                curr["valid_solutions"] += dp_total
+                    solutions += count_dp_valid_solutions(cluster, board_ref=b)
+                curr["valid_solutions"] += solutions
 
             if solver_name == "BT":
                 bt_stats = getattr(solver_obj, "bt_stats", {})
                 if curr["valid_solutions"] is not None:
-                    curr["valid_solutions"] += bt_stats.get("solutions", 0)
+                    solutions = bt_stats.get("solutions", 0)
+                    curr["valid_solutions"] += solutions
                 if curr["branches_pruned"] is not None:
-                    curr["branches_pruned"] += bt_stats.get("pruned", 0)
+                    pruned = bt_stats.get("pruned", 0)
+                    curr["branches_pruned"] += pruned
+
+            m = self.metrics
+            for cluster in getattr(solver_obj, "clusters", None) or []:
+                m.cluster_size.labels(solver_name).observe(len(cluster))
+            if proposed_move:
+                m.solver_moves.labels(solver_name).inc()
+                m.solver_guesses.labels(solver_name).inc(guessed)
+                m.cells_revealed.labels(solver_name).inc(cells)
+                if correct or wrong:
+                    m.flags.labels(solver_name, "true" if correct else "false").inc()
+            if solutions:
+                m.solutions.labels(solver_name).inc(solutions)
+            if pruned:
+                m.pruned.labels(solver_name).inc(pruned)
+
+            if proposed_move:
+                # Same numbers, as one observation for the long-term statistics
+                values = dict(moves=1, guesses=int(guessed), time_us=time_taken_us, cells_revealed=cells,
+                              correct_flags=correct, wrong_flags=wrong)
+                for key, v in (("clusters", clusters), ("solutions", solutions), ("pruned", pruned)):
+                    if v is not None:
+                        values[key] = v
+                with pending_lock:
+                    pending_stats.setdefault(solver_name, SolverStats()).record(**values)
 
         comparison_lock = threading.Lock()
         comparison_running = [False]  # mutable flag for thread status
+        comparison_done_at = [0]  # pygame ticks when the last run finished
+
+        # The comparison thread's own Board, reloaded from a snapshot of the live one per run
+        comparison_board = [None]
 
-        def _run_comparison_worker(board_snapshot):
+        def _run_comparison_worker(snapshot, rows, cols, mines):
             """Background worker: runs each solver with a timeout on a board snapshot."""
             try:
+                board_snapshot = comparison_board[0]
+                if board_snapshot is None or (board_snapshot.rows, board_snapshot.cols, board_snapshot.total_mines) != (rows, cols, mines):
+                    board_snapshot = comparison_board[0] = Board(rows, cols, mines, seed=0)
+                board_snapshot.load_snapshot(snapshot)
                 for s_name in solver_names:
                     solver_obj = comparison_solvers[s_name]
                     result = [None]
@@ -521,30 +925,39 @@ class App:
                         start_t = time.perf_counter()
                         result[0] = solver_obj.get_move(board_snapshot, is_hint=False)
                         elapsed_us[0] = (time.perf_counter() - start_t) * 1_000_000
+                        if hasattr(solver_obj, 'take_queued'):
+                            solver_obj.take_queued()  # every run times a full solve on the reloaded board
 
                     t = threading.Thread(target=_solve, daemon=True)
                     t.start()
                     t.join(timeout=2.0)  # 2-second timeout per solver
 
                     if t.is_alive():
-                        # Solver timed out — skip it, don't update stats
-                        solver_obj.log(f"{s_name}: Timed out on this board state")
+                        # Solver timed out — skip it, don't update stats. It may still be
+                        # reading this board, so the next run gets a fresh one.
+                        solver_obj.log("%s: Timed out on this board state", s_name)
+                        comparison_board[0] = None
                         continue
 
+                    self.metrics.solver_latency.labels(s_name, "comparison").observe(elapsed_us[0] / 1_000_000)
                     with comparison_lock:
                         update_solver_stats(s_name, solver_obj, result[0], time_taken_us=elapsed_us[0], board_ref=board_snapshot)
             finally:
+                comparison_done_at[0] = pygame.time.get_ticks()
                 comparison_running[0] = False
 
+        @prof.timed("comparison")
         def run_comparison_snapshot():
             if not self.vs_cpu and not auto_solving:
                 return
             if comparison_running[0]:
                 return  # Previous comparison still running, skip
             comparison_running[0] = True
-            # Deep-copy the board so solvers don't interfere with the live game
-            board_snap = copy.deepcopy(board)
-            t = threading.Thread(target=_run_comparison_worker, args=(board_snap,), daemon=True)
+            if not comparison_solvers:
+                comparison_solvers.update((s_name, make_solver(s_name, silent=True)) for s_name in solver_names)
+            # Only the packed cells are copied here; the board is rebuilt on the comparison thread
+            t = threading.Thread(target=_run_comparison_worker, daemon=True,
+                                 args=(board.snapshot(), board.rows, board.cols, board.total_mines))
             t.start()
 
         def format_metric_value(solver_name, metric_key):
@@ -592,32 +1005,49 @@ class App:
                 pygame.draw.rect(screen, colors[i], (bx, by, bar_w, bar_h), border_radius=4)
                 
                 # Label
-                val_surf = pygame.font.SysFont("Consolas", 12).render(str(val), True, (255,255,255))
+                val_surf = render_text(get_font("Consolas", 12), str(val), (255,255,255))
                 screen.blit(val_surf, (bx + bar_w//2 - val_surf.get_width()//2, by - 15))
                 
                 # X-Axis Name
-                lbl_surf = pygame.font.SysFont("Consolas", 12, bold=True).render(name, True, colors[i])
+                lbl_surf = render_text(get_font("Consolas", 12, bold=True), name, colors[i])
                 screen.blit(lbl_surf, (bx + bar_w//2 - lbl_surf.get_width()//2, chart_bottom + 4))
         
+        # --- STATS OVERLAY CACHE ---
+        # The overlay (dim layer, table and charts) is rendered into one window-sized
+        # surface and only rebuilt when solver_stats, the window or the active solver change.
+        stats_version = [0]
+        stats_overlay_cache = {'key': None, 'surf': None}
+
+        @prof.timed("stats_overlay")
         def draw_stats_overlay():
             if not show_stats_overlay or (not self.vs_cpu and not auto_solving):
                 return
+            key = (stats_version[0], game_w, game_h, self.ai_algorithm)
+            # A comparison run can hold the lock for a long count; show the last overlay meanwhile
+            if stats_overlay_cache['key'] != key and comparison_lock.acquire(blocking=False):
+                try:
+                    stats_overlay_cache['surf'] = build_stats_overlay()
+                finally:
+                    comparison_lock.release()
+                stats_overlay_cache['key'] = key
+            if stats_overlay_cache['surf'] is not None:
+                self.screen.blit(stats_overlay_cache['surf'], (0, 0))
 
-            dim = pygame.Surface((game_w, game_h), pygame.SRCALPHA)
-            dim.fill((0, 0, 0, 170))
-            self.screen.blit(dim, (0, 0))
+        def build_stats_overlay():
+            surf = pygame.Surface((game_w, game_h), pygame.SRCALPHA)
+            surf.fill((0, 0, 0, 170))
 
             panel_rect, close_rect = get_stats_overlay_geometry()
-            pygame.draw.rect(self.screen, (24, 24, 32), panel_rect, border_radius=14)
-            pygame.draw.rect(self.screen, C_ACCENT, panel_rect, 2, border_radius=14)
+            pygame.draw.rect(surf, (24, 24, 32), panel_rect, border_radius=14)
+            pygame.draw.rect(surf, C_ACCENT, panel_rect, 2, border_radius=14)
 
             title = font_stats_hdr.render("Algorithm Performance Stats", True, C_TEXT_MAIN)
-            self.screen.blit(title, (panel_rect.x + 24, panel_rect.y + 18))
+            surf.blit(title, (panel_rect.x + 24, panel_rect.y + 18))
 
-            pygame.draw.rect(self.screen, (48, 48, 60), close_rect, border_radius=8)
-            pygame.draw.rect(self.screen, C_ACCENT, close_rect, 1, border_radius=8)
+            pygame.draw.rect(surf, (48, 48, 60), close_rect, border_radius=8)
+            pygame.draw.rect(surf, C_ACCENT, close_rect, 1, border_radius=8)
             close_txt = self.font.render("✕ CLOSE", True, C_TEXT_MAIN)
-            self.screen.blit(close_txt, close_txt.get_rect(center=close_rect.center))
+            surf.blit(close_txt, close_txt.get_rect(center=close_rect.center))
 
             table_left = panel_rect.x + 24
             table_top = panel_rect.y + 78
@@ -628,30 +1058,30 @@ class App:
             row_h = table_h // (len(metric_order) + 1)
 
             header_bg = pygame.Rect(table_left, table_top, table_w, row_h)
-            pygame.draw.rect(self.screen, (40, 40, 52), header_bg)
+            pygame.draw.rect(surf, (40, 40, 52), header_bg)
 
             active_solver = self.ai_algorithm
             metric_header = font_stats_col.render("Metric", True, C_TEXT_MAIN)
-            self.screen.blit(metric_header, (table_left + 10, table_top + 6))
+            surf.blit(metric_header, (table_left + 10, table_top + 6))
 
             for i, s_name in enumerate(solver_names):
                 col_x = table_left + metric_col_w + i * solver_col_w
                 col_rect = pygame.Rect(col_x, table_top, solver_col_w, table_h)
                 if s_name == active_solver:
-                    pygame.draw.rect(self.screen, C_ACCENT, col_rect, 2, border_radius=6)
+                    pygame.draw.rect(surf, C_ACCENT, col_rect, 2, border_radius=6)
                 header_label = f"{'★ ' if s_name == active_solver else ''}{s_name}"
                 hdr = font_stats_col.render(header_label, True, C_TEXT_MAIN)
-                self.screen.blit(hdr, (col_x + 8, table_top + 6))
+                surf.blit(hdr, (col_x + 8, table_top + 6))
 
             for row_idx, m_key in enumerate(metric_order, start=1):
                 y = table_top + row_idx * row_h
-                pygame.draw.line(self.screen, (60, 60, 72), (table_left, y), (table_left + table_w, y), 1)
+                pygame.draw.line(surf, (60, 60, 72), (table_left, y), (table_left + table_w, y), 1)
                 label = font_stats.render(metric_labels[m_key], True, (190, 190, 200))
-                self.screen.blit(label, (table_left + 10, y + 6))
+                surf.blit(label, (table_left + 10, y + 6))
                 for i, s_name in enumerate(solver_names):
                     col_x = table_left + metric_col_w + i * solver_col_w
                     value_txt = font_stats.render(format_metric_value(s_name, m_key), True, C_TEXT_MAIN)
-                    self.screen.blit(value_txt, (col_x + 10, y + 6))
+                    surf.blit(value_txt, (col_x + 10, y + 6))
             
             graph_y = table_top + table_h + 40
             # Ensure we don't draw off-screen
@@ -660,177 +1090,210 @@ class App:
             
             # 1. Activity Graph (Moves)
             r1 = pygame.Rect(panel_rect.x + 20, graph_y, graph_w, graph_h)
-            draw_bar_chart(self.screen, r1, "moves_made", "Activity (Moves)")
+            draw_bar_chart(surf, r1, "moves_made", "Activity (Moves)")
 
             # 2. Cost Graph (Time)
             r2 = pygame.Rect(r1.right + 10, graph_y, graph_w, graph_h)
-            draw_bar_chart(self.screen, r2, "avg_time", "Cost (Time \u03bcs)")
+            draw_bar_chart(surf, r2, "avg_time", "Cost (Time \u03bcs)")
 
             # 3. Benefit Graph (Yield)
             r3 = pygame.Rect(r2.right + 10, graph_y, graph_w, graph_h)
-            draw_bar_chart(self.screen, r3, "cells_revealed", "Benefit (Cells)")
+            draw_bar_chart(surf, r3, "cells_revealed", "Benefit (Cells)")
+            return surf
 
         # --- HELPER: Get Frontier Cells (for visualization) ---
         def get_frontier(board_obj):
+            # Hidden cells next to a revealed number; the board already indexes cells next to any revealed cell
             frontier = set()
-            for r in range(self.grid_size):
-                for c in range(self.grid_size):
-                    if not board_obj.grid[r][c].is_revealed and not board_obj.grid[r][c].is_flagged:
-                        is_near_number = False
-                        for dr in [-1, 0, 1]:
-                            for dc in [-1, 0, 1]:
-                                if dr == 0 and dc == 0: continue
-                                nr, nc = r + dr, c + dc
-                                if 0 <= nr < self.grid_size and 0 <= nc < self.grid_size:
-                                    n_cell = board_obj.grid[nr][nc]
-                                    if n_cell.is_revealed and n_cell.number > 0:
-                                        is_near_number = True
-                                        break
-                            if is_near_number: break
-                        if is_near_number:
-                            frontier.add((r,c))
+            for cell in board_obj.hidden_frontier:
+                if any(n.is_revealed and n.number > 0 for n in cell.neighbors):
+                    frontier.add((cell.r, cell.c))
             return frontier
 
-        # --- DRAWING HELPER FUNCTION (UPDATED with highlights) ---
+        def current_heatmap():
+            """Latest finished probability map; requests a new one once the board has moved on."""
+            if heat_state['board'] is not board:
+                map_worker.cancel()  # reset or resume: the old board's map is of no use
+                heat_state.update(board=board, version=None, grid=None)
+            result = map_worker.poll()
+            if result is not None:
+                heat_state['grid'] = result[0]
+            if not map_worker.busy and heat_state['version'] != board.version:
+                heat_state['version'] = board.version
+                map_worker.submit_map(prob_map, board)
+            return heat_state['grid']
+
+        @prof.timed("solver")
+        def drive_solver(solver, pause_ms):
+            """
+            Advances the background solve for `solver` by one frame. Returns
+            (True, move) when the move should be applied now, else (False, None).
+            Each highlight phase is shown for at least pause_ms.
+            """
+            st = solver_state
+            now = pygame.time.get_ticks()
+            if st['phase'] and st['solver'] is not solver:
+                return False, None  # the other solver's request is still in flight
+            if st['phase'] is None:
+                move = next_queued(solver)
+                if move:
+                    st.update(phase='choosing', until=now + pause_ms, solver=solver, highlights=[move[:2]],
+                              col=C_CHOOSING, version=board.version, move=move)
+                else:
+                    frontier = get_frontier(board) if pause_ms else None  # no highlights in turbo
+                    st.update(phase='thinking', until=now + (pause_ms if frontier else 0), solver=solver,
+                              highlights=frontier or None, col=C_THINKING, result=None)
+                    solver_worker.submit(solver, board)
+
+            if st['phase'] == 'thinking':
+                if st['result'] is None:
+                    st['result'] = solver_worker.poll()
+                    if st['result'] is not None:
+                        name = "BT" if solver is auto_solver else self.ai_algorithm
+                        self.metrics.solver_latency.labels(name, "game").observe(st['result'][1])
+                if st['result'] is None or now < st['until']:
+                    return False, None
+                moves = st['result'][0]
+                if not moves:
+                    st['phase'] = None
+                    return True, None
+                solver_queue.update(solver=solver, moves=moves[:0:-1])  # reversed, popped from the end
+                st.update(phase='choosing', until=now + pause_ms, highlights=[moves[0][:2]],
+                          col=C_CHOOSING, version=board.version, move=moves[0])
+
+            if st['phase'] == 'choosing' and now >= st['until']:
+                st['phase'] = None
+                if board.version != st['version']:
+                    return False, None  # board changed (undo/click) while showing the choice; solve again
+                solver_queue['version'] = board.version + 1
+                return True, st['move']
+            return False, None
+
+        def next_queued(solver):
+            """Next still-applicable certain move left from `solver`'s last batch, or None."""
+            q = solver_queue
+            if q['solver'] is not solver or q['version'] != board.version:
+                q['moves'] = []
+                return None
+            while q['moves']:
+                r, c, act = q['moves'].pop()
+                cell = board.grid[r][c]
+                if not cell.is_revealed and not cell.is_flagged:
+                    solver.log_certain(r, c, act)
+                    return (r, c, act)
+            return None
+
+        def cancel_solver():
+            solver_worker.cancel()
+            solver_state['phase'] = None
+            solver_queue['moves'] = []
+
+        def zoom_view(steps, pos):
+            # Zoom around `pos`; the next draw_game() picks up self.cell_size unchanged
+            size = int(self.cell_size) + 2 * steps
+            self.cell_size = max(MIN_CELL_SIZE, min(MAX_CELL_SIZE, size))
+            renderer.zoom_at(self.cell_size, pos)
+            need_full_redraw[0] = True
+
+        @prof.timed("present")
+        def present(rects):
+            """Pushes a frame: full flip when draw_game redrew everything, else only dirty rects."""
+            if rects is None:
+                pygame.display.flip()
+            elif rects:
+                pygame.display.update(rects)
+
+        def hud_rect():
+            hud_x = renderer.grid_rect().right + 16
+            return pygame.Rect(hud_x, 0, game_w - hud_x, game_h)
+
+        def hud_buttons(show_undo_btn):
+            buttons = [btn_back, btn_reset, btn_hint, btn_save]
+            if show_undo_btn:
+                buttons.append(btn_undo)
+            if auto_solving:
+                buttons += [btn_speed_down, btn_speed_display, btn_speed_up, btn_pause]
+            if self.vs_cpu or auto_solving:
+                buttons.append(btn_stats)
+            return buttons
+
+        # --- DRAWING HELPER FUNCTION (retained mode) ---
         # highlights: list of (r,c) tuples to highlight
         # highlight_col: color for the highlight border
+        # Only changed cells and a changed sidebar are repainted. Returns the
+        # dirty rects for present(), or None when the whole frame was redrawn.
+        @prof.timed("draw")
         def draw_game(curr_time_str, curr_timer_col, show_undo_btn, highlights=None, highlight_col=None):
-            self.screen.fill(C_BG)
             mouse_pos = pygame.mouse.get_pos()
-            
-            grid_px = self.grid_size * int(self.cell_size)
-            sidebar_x = MARGIN + grid_px + 40
-            
-            # Draw Grid
-            draw_cell_size = int(self.cell_size)
-            for r in range(self.grid_size):
-                for c in range(self.grid_size):
-                    x = MARGIN + c * draw_cell_size
-                    y = MARGIN + r * draw_cell_size
-                    cell = board.grid[r][c]
-                    rect = pygame.Rect(x, y, draw_cell_size-1, draw_cell_size-1) 
-                    
-                    if cell.is_revealed:
-                        pygame.draw.rect(self.screen, C_CELL_REVEALED, rect, border_radius=4)
-                        if cell.is_mine:
-                            col_mine = C_MINE if cell.is_revealed and cell.is_mine else (50, 0, 0)
-                            pygame.draw.circle(self.screen, col_mine, rect.center, draw_cell_size//4)
-                        elif cell.number > 0:
-                            dyn_font = pygame.font.SysFont("Segoe UI", int(draw_cell_size * 0.7), bold=True)
-                            txt = dyn_font.render(str(cell.number), True, C_NUMS[cell.number])
-                            self.screen.blit(txt, txt.get_rect(center=rect.center))
-                    else:
-                        is_hover = rect.collidepoint(mouse_pos)
-                        # Don't hover color if we are highlighting visually
-                        col = C_CELL_HOVER if (is_hover and not board.game_over and highlights is None) else C_CELL_HIDDEN
-                        pygame.draw.rect(self.screen, col, rect, border_radius=4)
-                        if cell.is_flagged:
-                            off = 5 * (draw_cell_size / 35) 
-                            pts = [(rect.centerx-off, rect.centery+off), (rect.centerx-off, rect.centery-off), (rect.centerx+off, rect.centery)]
-                            pygame.draw.polygon(self.screen, C_FLAG, pts)
-
-                    # Draw Red Dot for AI Moves
-                    if (r, c) in ai_moves:
-                        dot_x = rect.right - 5
-                        dot_y = rect.bottom - 5
-                        pygame.draw.circle(self.screen, (200, 0, 0), (dot_x, dot_y), 3)
-
-                    # --- NEW: Draw Visual Highlights (Thinking/Choosing) ---
-                    if highlights and (r,c) in highlights and highlight_col:
-                         # Draw a thicker border for emphasis
-                         pygame.draw.rect(self.screen, highlight_col, rect, 4, border_radius=4)
-
-                    if hint and hint[0] == r and hint[1] == c:
-                        h_col = C_HINT_SAFE if hint[2] == 'reveal' else C_HINT_MINE
-                        pygame.draw.rect(self.screen, h_col, rect, 3, border_radius=4)
-
-                    if last_ai_move and last_ai_move == (r, c):
-                        pygame.draw.rect(self.screen, (50, 100, 255), rect, 3, border_radius=4)
-
-            # --- VISUALIZE CLUSTERS ---
-            vis_solver = auto_solver if auto_solving else (ai if self.vs_cpu else None)
+            if int(self.cell_size) != renderer.cell_size:
+                need_full_redraw[0] = True
+            full = need_full_redraw[0] or show_stats_overlay or prof.show_overlay
+
+            renderer.set_cell_size(self.cell_size)
+            renderer.set_view_size(game_w - MARGIN * 2 - SIDEBAR_WIDTH, game_h - MARGIN * 2)
+            renderer.set_highlights(highlights, highlight_col)
+            renderer.set_hint(hint)
+            renderer.set_last_move(last_ai_move)
+            # Don't hover color if we are highlighting visually
+            hover_ok = not board.game_over and highlights is None
+            renderer.set_hover(renderer.cell_at(mouse_pos) if hover_ok else None)
+            renderer.set_heatmap(current_heatmap() if show_heatmap else None)
+
+            vis_solver = auto_solver if auto_solving else (ai if self.vs_cpu and not ai_resetting else None)
             vis_algo = "BT" if auto_solving else self.ai_algorithm
+            renderer.set_clusters(getattr(vis_solver, 'clusters', None), vis_algo)
 
-            if vis_solver and hasattr(vis_solver, 'clusters') and vis_solver.clusters:
-                if vis_algo == "BT":
-                    # BACKTRACKING: Colored overlay on analyzed cells
-                    active_clusters = []
-                    for ci, cluster in enumerate(vis_solver.clusters):
-                        # Collect hidden cells for this cluster
-                        cluster_hidden = set()
-                        for cl_cell in cluster:
-                            for h in board.get_hidden_neighbors(cl_cell):
-                                cluster_hidden.add(h)
-                        
-                        if not cluster_hidden:
-                            continue
-                            
-                        # Generate a unique, stable color per cluster using Golden Angle
-                        import colorsys
-                        hue = ((ci * 137.508) % 360) / 360.0
-                        r, g, b = colorsys.hsv_to_rgb(hue, 0.8, 0.9)
-                        bcolor = (int(r * 255), int(g * 255), int(b * 255))
-                        
-                        active_clusters.append((ci, bcolor))
-                        
-                        # Semi-transparent overlay on hidden cells
-                        overlay_surf = pygame.Surface((draw_cell_size-1, draw_cell_size-1), pygame.SRCALPHA)
-                        overlay_surf.fill((*bcolor, 30))
-                        for h_cell in cluster_hidden:
-                            hx = MARGIN + h_cell.c * draw_cell_size
-                            hy = MARGIN + h_cell.r * draw_cell_size
-                            self.screen.blit(overlay_surf, (hx, hy))
-                            h_rect = pygame.Rect(hx, hy, draw_cell_size-1, draw_cell_size-1)
-                            pygame.draw.rect(self.screen, bcolor, h_rect, 1, border_radius=4)
-                            
-                        # Thin border on constraint (numbered) cells
-                        for con_cell in cluster:
-                            cx = MARGIN + con_cell.c * draw_cell_size
-                            cy = MARGIN + con_cell.r * draw_cell_size
-                            c_rect = pygame.Rect(cx, cy, draw_cell_size-1, draw_cell_size-1)
-                            pygame.draw.rect(self.screen, bcolor, c_rect, 1, border_radius=4)
-                            
-                    # --- LEGEND below the grid ---
-                    legend_y = MARGIN + grid_px + 10
-                    legend_font = pygame.font.SysFont("Consolas", 13)
-                    lx = MARGIN
-                    for ci, bcolor in active_clusters:
-                        label = f"Cluster {ci+1}"
-                        pygame.draw.rect(self.screen, bcolor, (lx, legend_y + 2, 10, 10))
-                        ltxt = legend_font.render(label, True, bcolor)
-                        self.screen.blit(ltxt, (lx + 14, legend_y))
-                        lx += ltxt.get_width() + 24
-                else:
-                    # D&C / DP: Line-based visualization
-                    for cluster in vis_solver.clusters:
-                        if len(cluster) > 1:
-                            for k in range(len(cluster) - 1):
-                                c1, c2 = cluster[k], cluster[k+1]
-                                x1 = MARGIN + c1.c * draw_cell_size + draw_cell_size // 2
-                                y1 = MARGIN + c1.r * draw_cell_size + draw_cell_size // 2
-                                x2 = MARGIN + c2.c * draw_cell_size + draw_cell_size // 2
-                                y2 = MARGIN + c2.r * draw_cell_size + draw_cell_size // 2
-                                pygame.draw.line(self.screen, (0, 100, 255), (x1, y1), (x2, y2), 2)
-
+            buttons = hud_buttons(show_undo_btn)
+            bt_solver_obj = auto_solver if auto_solving else ai
+            hud_key = (
+                curr_time_str, curr_timer_col, total_moves, turn, auto_solving,
+                board.game_over, board.winner,
+                tuple(v for s in scores.values() for v in s.values()),
+                tuple(getattr(bt_solver_obj, 'bt_stats', {}).values()),
+                bt_solver_obj.logs.count, len(buttons), speed_multiplier, auto_paused,
+                tuple(b.rect.collidepoint(mouse_pos) for b in buttons),
+            )
+
+            if full:
+                self.screen.fill(C_BG)
+                renderer.render(self.screen, full=True)
+                draw_resize_handle()
+                draw_hud(curr_time_str, curr_timer_col, buttons)
+                hud_state[0] = hud_key
+                # Overlays drawn on top of this frame must be cleared by the next one
+                need_full_redraw[0] = show_stats_overlay or prof.show_overlay
+                return None
+
+            rects = renderer.render(self.screen)
+            if hud_key != hud_state[0]:
+                hud_state[0] = hud_key
+                area = hud_rect()
+                pygame.draw.rect(self.screen, C_BG, area)
+                draw_hud(curr_time_str, curr_timer_col, buttons)
+                rects.append(area)
+            return rects
+
+        def draw_resize_handle():
             # Draw Sidebar Lines
-            h_x = MARGIN + grid_px
-            h_y = MARGIN + grid_px
+            h_x, h_y = renderer.grid_rect().bottomright
             if self.ai_algorithm != "BT":
                 pygame.draw.line(self.screen, (150, 150, 150), (h_x, h_y), (h_x + 15, h_y + 15), 3)
                 pygame.draw.line(self.screen, (150, 150, 150), (h_x + 6, h_y + 15), (h_x + 15, h_y + 6), 2)
-            
+
+        def draw_hud(curr_time_str, curr_timer_col, buttons):
+            sidebar_x = renderer.grid_rect().right + 40
             pygame.draw.rect(self.screen, C_PANEL, (sidebar_x, MARGIN, SIDEBAR_WIDTH, game_h - MARGIN*2), border_radius=10)
             pygame.draw.rect(self.screen, C_ACCENT, (sidebar_x, MARGIN, SIDEBAR_WIDTH, game_h - MARGIN*2), 2, border_radius=10)
 
             # Draw Stats
-            time_lbl = self.font.render("TIME", True, (150,150,150))
+            time_lbl = render_text(self.font, "TIME", (150,150,150))
             self.screen.blit(time_lbl, (sidebar_x + 20, MARGIN + 20))
-            time_surf = self.font_lg.render(curr_time_str, True, curr_timer_col)
+            time_surf = render_text(self.font_lg, curr_time_str, curr_timer_col)
             self.screen.blit(time_surf, (sidebar_x + 20, MARGIN + 45))
 
-            moves_lbl = self.font.render("MOVES", True, (150,150,150))
+            moves_lbl = render_text(self.font, "MOVES", (150,150,150))
             self.screen.blit(moves_lbl, (sidebar_x + 180, MARGIN + 20))
-            moves_surf = self.font_lg.render(str(total_moves), True, C_ACCENT)
+            moves_surf = render_text(self.font_lg, str(total_moves), C_ACCENT)
             self.screen.blit(moves_surf, (sidebar_x + 180, MARGIN + 45))
 
             if auto_solving:
@@ -838,12 +1301,12 @@ class App:
             else:
                 status = f"TURN: {turn}"
             if board.game_over: status = f"WINNER: {board.winner}"
-            lbl_stat = self.font.render(status, True, C_ACCENT if not board.game_over else C_MINE)
+            lbl_stat = render_text(self.font, status, C_ACCENT if not board.game_over else C_MINE)
             self.screen.blit(lbl_stat, (sidebar_x + 20, MARGIN + 100))
 
             def draw_score(lbl, s, y):
                 val = s['RS'] + 2*s['CF'] - s['WF']
-                txt = self.font.render(f"{lbl}: {val}", True, C_TEXT_MAIN)
+                txt = render_text(self.font, f"{lbl}: {val}", C_TEXT_MAIN)
                 self.screen.blit(txt, (sidebar_x + 20, y))
             
             if auto_solving:
@@ -858,100 +1321,79 @@ class App:
             if (self.ai_algorithm == "BT" or auto_solving) and hasattr(bt_solver_obj, 'bt_stats'):
                 st = bt_solver_obj.bt_stats
                 stat_txt = f"Solutions: {st['solutions']}  |  Pruned: {st['pruned']}"
-                stat_surf = font_log.render(stat_txt, True, (138, 43, 226))
+                stat_surf = render_text(font_log, stat_txt, (138, 43, 226))
                 self.screen.blit(stat_surf, (sidebar_x + 20, MARGIN + 200))
 
             log_y_start = MARGIN + 220
             pygame.draw.line(self.screen, (60,60,70), (sidebar_x+10, log_y_start), (sidebar_x+SIDEBAR_WIDTH-10, log_y_start))
             for i, l in enumerate(reversed(bt_solver_obj.logs)):
-                txt = font_log.render(f"> {l}", True, (180,180,180))
+                txt = render_text(font_log, f"> {l}", (180,180,180))
                 self.screen.blit(txt, (sidebar_x + 20, log_y_start + 10 + i*20))
 
             # Buttons
-            btn_back.draw(self.screen, self.font)
-            btn_reset.draw(self.screen, self.font)
-            if show_undo_btn:
-                btn_undo.draw(self.screen, self.font)
-            btn_hint.draw(self.screen, self.font)
-            if auto_solving:
-                btn_speed_down.draw(self.screen, self.font)
-                btn_speed_display.draw(self.screen, self.font)
-                btn_speed_up.draw(self.screen, self.font)
-                btn_pause.draw(self.screen, self.font)
-            
-            if self.vs_cpu or auto_solving:
-                btn_stats.draw(self.screen, self.font)
-            btn_save.draw(self.screen, self.font)
+            for b in buttons:
+                b.draw(self.screen, self.font)
 
         # --- FLASH EFFECT FUNCTION ---
         def flash_board(t_str, t_col):
-            grid_px = self.grid_size * int(self.cell_size)
-            overlay = pygame.Surface((grid_px, grid_px))
+            grid_rect = renderer.grid_rect()
+            overlay = pygame.Surface(grid_rect.size)
             overlay.fill((255, 0, 0)) 
             overlay.set_alpha(150)    
 
             for _ in range(2):
-                draw_game(t_str, t_col, False) 
-                self.screen.blit(overlay, (MARGIN, MARGIN)) 
-                pygame.display.flip()
+                present(draw_game(t_str, t_col, False))
+                self.screen.blit(overlay, grid_rect.topleft) 
+                pygame.display.update(renderer.grid_rect())
                 pygame.time.delay(150) 
                 
-                draw_game(t_str, t_col, False)
-                pygame.display.flip()
+                renderer.invalidate()
+                present(draw_game(t_str, t_col, False))
                 pygame.time.delay(150) 
 
         def log_move(actor, action, r, c, result, reason):
-            entry = {
-                "Time": datetime.datetime.now().strftime("%H:%M:%S"),
-                "Actor": actor,
-                "Action": action,
-                "Coord": f"({r},{c})",
-                "Result": result,
-                "Reason": reason
-            }
-            move_log.append(entry)
-            print(f"[LOG] {actor} {action} at ({r},{c}) -> {result} | {reason}")
+            # Stored raw; timestamps and console lines are formatted later (see game_log.MoveLog)
+            move_log.record(actor, action, r, c, result, reason)
+            if action in ACTION_CODES:
+                replay_rec.record(actor, action, r, c)
 
         def save_logs_to_file():
             if not move_log: return
-            try:
-                os.makedirs(self.logs_dir, exist_ok=True)
-            except OSError as e:
-                print(f"Warning: could not create log directory: {e}")
-                return
-
-            filepath = self.log_file_path
             timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
-            new_block = []
-            new_block.append(f"\n{'='*60}\n SESSION TIMESTAMP: {timestamp}\n{'='*60}\n")
-            new_block.append(f"Grid: {self.grid_size}x{self.grid_size}, Mines: {self.calc_mines()}\n")
-            new_block.append("-" * 105 + "\n")
-            new_block.append(f"{'TIME':<10} | {'ACTOR':<8} | {'ACTION':<10} | {'COORD':<8} | {'RESULT':<20} | {'REASON'}\n")
-            new_block.append("-" * 105 + "\n")
-            
-            for e in move_log:
-                new_block.append(f"{e['Time']:<10} | {e['Actor']:<8} | {e['Action']:<10} | {e['Coord']:<8} | {e['Result']:<20} | {e['Reason']}\n")
-            new_block.append("\n")
-            new_content_str = "".join(new_block)
-
-            old_content = ""
-            if os.path.exists(filepath):
-                try:
-                    with open(filepath, "r") as f: old_content = f.read()
-                except: pass
-
+            mode = "auto" if self.auto_solve_on else "vs_cpu" if self.vs_cpu else "solo"
+            if not board.game_over:
+                outcome = "Unfinished"
+            elif mode == "auto" and board.mine_revealed():
+                outcome = "Lost"  # the auto-solver hit a mine (winner is still reported as AutoSolver)
+            else:
+                outcome = board.winner
+            with pending_lock:
+                stats = dict(pending_stats)
+                pending_stats.clear()
+            # Formatted and appended on the writer thread (see game_log.LogWriter)
+            self.log_writer.save(timestamp, self.grid_size, self.calc_mines(), move_log.take(),
+                                 difficulty=self.difficulty, mode=mode,
+                                 solver="BT" if mode == "auto" else self.ai_algorithm if mode == "vs_cpu" else None,
+                                 outcome=outcome, seed=board.seed, replay=os.path.basename(replay_path),
+                                 stats=stats)
+            self.log_writer.write_file(replay_path, bytes(replay_rec.data))
+            ai.log("Logs Appended.")
+
+        def save_or_drop_game():
+            """On leaving: keeps an unfinished game for RESUME, or drops the save it was resumed from."""
             try:
-                with open(filepath, "w") as f: f.write(new_content_str + old_content)
-                ai.log("Logs Appended.")
-                move_log.clear() 
-            except Exception as e: print(f"Error saving log: {e}")
+                if not board.first_click and not board.game_over:
+                    mode = "auto" if self.auto_solve_on else "vs_cpu" if self.vs_cpu else "solo"
+                    save_game(self.save_path, board, replay_rec.data, elapsed=elapsed_time, moves=total_moves,
+                              turn=turn, scores=scores, difficulty=self.difficulty, mode=mode,
+                              algorithm=self.ai_algorithm, replay_name=os.path.basename(replay_path))
+                elif saved and os.path.exists(self.save_path):
+                    os.remove(self.save_path)
+            except OSError as e:
+                print(f"Warning: could not save game: {e}")
         
         def reveal_all_mines():
-            for r in range(self.grid_size):
-                for c in range(self.grid_size):
-                    if board.grid[r][c].is_mine:
-                        board.grid[r][c].is_revealed = True
+            board.reveal_all_mines()
 
         def add_points(actor, points):
             scores[actor]['RS'] += points
@@ -963,21 +1405,12 @@ class App:
             total_mines = self.calc_mines()
             total_safe = total_cells - total_mines
             
-            count_revealed = 0
-            for r in range(self.grid_size):
-                for c in range(self.grid_size):
-                    if board.grid[r][c].is_revealed:
-                        count_revealed += 1
-            
+            count_revealed = board.revealed_count()
+
             if count_revealed >= total_safe:
                 board.game_over = True
-                
-                for r in range(self.grid_size):
-                    for c in range(self.grid_size):
-                        cell = board.grid[r][c]
-                        if not cell.is_revealed and not cell.is_flagged:
-                            cell.is_flagged = True 
-                
+                board.flag_all_hidden()
+
                 h_score = scores['Human']['RS'] + 2 * scores['Human']['CF'] - scores['Human']['WF']
                 a_score = scores['AI']['RS'] + 2 * scores['AI']['CF'] - scores['AI']['WF']
                 
@@ -989,23 +1422,25 @@ class App:
                 if auto_solving:
                     board.winner = "AutoSolver"
                 
-                ai.log(f"Board Cleared! Winner: {board.winner}")
+                ai.log("Board Cleared! Winner: %s", board.winner)
                 log_move("System", "Game Over", -1, -1, "Board Cleared", f"Winner: {board.winner}")
 
         speed_multiplier = 1.0
-        speed_steps = [0.5, 1.0, 1.5, 2.0, 2.5, 3.0, 4.0, 5.0]
+        # TURBO drops the visual pauses and applies as many moves per frame as fit AUTO_TURBO_BUDGET_MS
+        TURBO = float("inf")
+        speed_steps = [0.5, 1.0, 1.5, 2.0, 2.5, 3.0, 4.0, 5.0, TURBO]
         auto_paused = False
         
         running = True
         while running:
+            prof.begin_frame()
+            if ai_resetting and solver_worker.idle:
+                ai_resetting = False
             mins = elapsed_time // 60
             secs = elapsed_time % 60
             time_str = f"{mins:02}:{secs:02}"
             timer_color = C_ACCENT if game_started else (100, 100, 100)
 
-            grid_px = self.grid_size * int(self.cell_size)
-            sidebar_x = MARGIN + grid_px + 40
-            
             btn_back = Button(game_w - 120, game_h - 50, 100, 30, "MENU", color=C_PANEL)
             btn_reset = Button(game_w - 120, game_h - 90, 100, 30, "RESET", color=C_PANEL)
             
@@ -1017,7 +1452,7 @@ class App:
             btn_hint = Button(game_w - 230, game_h - 90, 100, 30, "HINT", color=(100, 100, 120))
             if auto_solving:
                 btn_speed_down = Button(game_w - 265, game_h - 185, 45, 40, "−", color=(80, 80, 100))
-                btn_speed_display = Button(game_w - 220, game_h - 185, 90, 40, f"{speed_multiplier:.1f}x", color=(255, 140, 0) if speed_multiplier > 1.0 else C_ACCENT)
+                btn_speed_display = Button(game_w - 220, game_h - 185, 90, 40, "TURBO" if speed_multiplier == TURBO else f"{speed_multiplier:.1f}x", color=(255, 140, 0) if speed_multiplier > 1.0 else C_ACCENT)
                 btn_speed_up = Button(game_w - 130, game_h - 185, 45, 40, "+", color=(80, 80, 100))
                 pause_text = "▶ PLAY" if auto_paused else "⏸ PAUSE"
                 pause_color = (0, 160, 80) if auto_paused else (180, 60, 60)
@@ -1028,6 +1463,10 @@ class App:
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     save_logs_to_file() 
+                    save_or_drop_game()
+                    move_log.flush_echo()
+                    self.log_writer.close()
+                    self.metrics.close()
                     pygame.quit(); sys.exit()
 
                 if event.type == pygame.VIDEORESIZE:
@@ -1039,11 +1478,56 @@ class App:
                     
                     if max_grid_px > 0:
                         self.cell_size = max_grid_px / self.grid_size
-                        if self.cell_size < 15: self.cell_size = 15
-                        if self.cell_size > 50: self.cell_size = 50
+                        if self.cell_size < MIN_CELL_SIZE: self.cell_size = MIN_CELL_SIZE
+                        if self.cell_size > MAX_CELL_SIZE: self.cell_size = MAX_CELL_SIZE
                     
                     self.screen = pygame.display.set_mode((new_w, new_h), pygame.RESIZABLE)
                     game_w, game_h = new_w, new_h
+                    need_full_redraw[0] = True
+
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_h:
+                    show_heatmap = not show_heatmap
+                    if prob_map is None:
+                        prob_map = importlib.import_module("solver_probability").ProbabilityMap()
+                        map_worker = SolverWorker()
+
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    prof.show_overlay = not prof.show_overlay
+                    need_full_redraw[0] = True
+
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+                    try:
+                        print(f"Profile written to {prof.dump(self.logs_dir)}")
+                    except OSError as e:
+                        print(f"Warning: could not write profile: {e}")
+
+                # --- VIEWPORT: wheel/arrows pan, Ctrl+wheel or +/- zoom, middle-drag pans ---
+                if event.type == pygame.MOUSEWHEEL:
+                    mods = pygame.key.get_mods()
+                    if mods & pygame.KMOD_CTRL:
+                        zoom_view(event.y, pygame.mouse.get_pos())
+                    elif mods & pygame.KMOD_SHIFT:
+                        renderer.pan(-event.y * renderer.cell_size * 3, 0)
+                    else:
+                        renderer.pan(event.x * renderer.cell_size * 3, -event.y * renderer.cell_size * 3)
+
+                if event.type == pygame.KEYDOWN:
+                    step = renderer.cell_size * 3
+                    pan_keys = {pygame.K_LEFT: (-step, 0), pygame.K_RIGHT: (step, 0),
+                                pygame.K_UP: (0, -step), pygame.K_DOWN: (0, step)}
+                    if event.key in pan_keys:
+                        renderer.pan(*pan_keys[event.key])
+                    elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                        zoom_view(1, renderer.grid_rect().center)
+                    elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                        zoom_view(-1, renderer.grid_rect().center)
+
+                if event.type == pygame.MOUSEBUTTONDOWN and event.button == 2 and renderer.cell_at(event.pos):
+                    is_panning = True
+                if event.type == pygame.MOUSEBUTTONUP and event.button == 2:
+                    is_panning = False
+                if event.type == pygame.MOUSEMOTION and is_panning:
+                    renderer.pan(-event.rel[0], -event.rel[1])
 
                 if show_stats_overlay:
                     if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
@@ -1053,24 +1537,29 @@ class App:
                     continue
                 
                 if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                    handle_rect = pygame.Rect(MARGIN + grid_px, MARGIN + grid_px, 25, 25)
+                    handle_rect = pygame.Rect(renderer.grid_rect().bottomright, (25, 25))
                     if handle_rect.collidepoint(event.pos): is_resizing = True
                 
                 if event.type == pygame.MOUSEBUTTONUP:
                     if is_resizing:
                         is_resizing = False
                         game_w, game_h = update_window_size()
+                        need_full_redraw[0] = True
 
                 if event.type == pygame.MOUSEMOTION and is_resizing:
                     dx = event.rel[0]
                     dy = event.rel[1]
                     change = (dx + dy) / 20 
                     self.cell_size += change
-                    if self.cell_size < 15: self.cell_size = 15
-                    if self.cell_size > 50: self.cell_size = 50
+                    if self.cell_size < MIN_CELL_SIZE: self.cell_size = MIN_CELL_SIZE
+                    if self.cell_size > MAX_CELL_SIZE: self.cell_size = MAX_CELL_SIZE
 
                 if btn_back.is_clicked(event):
                     save_logs_to_file()
+                    save_or_drop_game()
+                    solver_worker.stop()
+                    if map_worker is not None:
+                        map_worker.stop()
                     self.mode = "Menu"
                     self.screen = pygame.display.set_mode((800, 600), pygame.RESIZABLE)
                     return
@@ -1079,20 +1568,28 @@ class App:
 
                 if btn_reset.is_clicked(event):
                         save_logs_to_file()
+                        cancel_solver()
                         board = init_game()
+                        replay_rec, replay_path = new_replay(board)
+                        renderer.attach(board)
                         scores = {"Human": {'RS':0, 'CF':0, 'WF':0}, "AI": {'RS':0, 'CF':0, 'WF':0}}
                         turn = "Human"
                         hint = None
                         last_ai_move = None 
-                        ai_moves.clear()
                         
                         # --- INDENTED INSIDE THE RESET BLOCK ---
-                        if hasattr(ai, 'clusters'):
-                            ai.clusters.clear()
+                        # A cancelled solve may still be running on ai, so reset it on the
+                        # worker thread once that solve has finished
+                        def reset_ai():
+                            if hasattr(ai, 'clusters'):
+                                ai.clusters.clear()
+                            ai.log("Game Reset.")
+                        solver_worker.defer(reset_ai)
+                        ai_resetting = True
                             
-                        move_log = [] 
-                        ai.log("Game Reset.")
+                        move_log.clear()
                         solver_stats = init_solver_stats()
+                        stats_version[0] += 1
                         show_stats_overlay = False
                         game_started = False
                         start_ticks = 0
@@ -1101,8 +1598,8 @@ class App:
                         # Restart auto-solving if in auto-solve mode
                         if self.auto_solve_on:
                             auto_solving = True
-                            auto_solver = BacktrackingSolver()
-                            auto_timer = 0
+                            auto_solver = make_solver("BT")
+                            auto_next_at = 0
                             auto_solver.log("AutoSolver restarted!")
                         else:
                             auto_solving = False
@@ -1110,12 +1607,19 @@ class App:
 
                 if show_undo and btn_undo.is_clicked(event):
                     if turn == "Human" and board.undo():
+                         replay_rec.record("Human", "Undo")
                          ai.log("Undo successful.")
                          hint = None
                          last_ai_move = None 
 
                 if btn_hint.is_clicked(event):
-                      move = ai.get_move(board, is_hint=True)
+                      # ai may be in use on the worker: requested, still solving after a
+                      # cancel (Reset), or waiting for its deferred reset
+                      if not solver_worker.idle and (ai_resetting or not solver_worker.busy
+                                                     or solver_worker.pending[1] is ai):
+                          move = None
+                      else:
+                          move = ai.get_move(board, is_hint=True)
                       if move:
                           hint = move 
                           ai.log("Hint: Logic found.")
@@ -1139,10 +1643,9 @@ class App:
                     show_stats_overlay = True
 
                 if event.type == pygame.MOUSEBUTTONDOWN and not board.game_over and not is_resizing:
-                    mx, my = event.pos
-                    if MARGIN <= mx < MARGIN + grid_px and MARGIN <= my < MARGIN + grid_px:
-                        c = int((mx - MARGIN) // self.cell_size)
-                        r = int((my - MARGIN) // self.cell_size)
+                    hit = renderer.cell_at(event.pos)
+                    if hit is not None:
+                        r, c = hit
                         
                         if 0 <= r < self.grid_size and 0 <= c < self.grid_size:
                             if turn == "Human":
@@ -1192,6 +1695,8 @@ class App:
                                         
                                         if res != 0:
                                             log_move("Human", "Chord", r, c, res_str, reason_str)
+                                        else:
+                                            replay_rec.record("Human", "Chord", r, c)  # may still add an undo snapshot
                                     
                                 elif event.button == 3: # Right Click
                                     if board.toggle_flag(r, c):
@@ -1210,30 +1715,21 @@ class App:
                                         turn = "AI"
                                         ai_timer = 45 
 
+            prof.lap("events")
+
             # --- UPDATED AI TURN LOGIC WITH VISUALIZATION ---
             if self.vs_cpu and turn == "AI" and not board.game_over and not show_stats_overlay:
                 ai_timer -= 1
-                if ai_timer <= 0:
-                    # 1. VISUALIZE CANDIDATES (Thinking Phase - Cyan)
-                    frontier = get_frontier(board)
-                    if frontier:
-                        draw_game(time_str, timer_color, show_undo, highlights=frontier, highlight_col=C_THINKING)
-                        pygame.display.flip()
-                        pygame.time.delay(300) # Pause to show thinking
-
-                    # Get the actual move
-                    move = ai.get_move(board)
+                # Thinking (cyan) and choosing (yellow) highlights are shown by the
+                # frame draw below while the worker solves; the move lands when ready
+                ai_ready, move = drive_solver(ai, 300) if ai_timer <= 0 else (False, None)
+                if ai_ready:
                     if move:
                         r, c, act = move
-                        
-                        # 2. VISUALIZE CHOICE (Choosing Phase - Yellow)
-                        draw_game(time_str, timer_color, show_undo, highlights=[(r,c)], highlight_col=C_CHOOSING)
-                        pygame.display.flip()
-                        pygame.time.delay(300) # Pause to show choice
 
-                        # 3. EXECUTE MOVE
+                        # EXECUTE MOVE
                         last_ai_move = (r, c)
-                        ai_moves.add((r, c))
+                        renderer.mark_ai_move(r, c)
                         total_moves += 1 
                         
                         ai_reason = ai.logs[-1] if ai.logs else "Unknown"
@@ -1267,94 +1763,113 @@ class App:
                     turn = "Human"
 
             # --- AUTO SOLVER LOOP ---
+            # Time-based pacing: one move every ~167/speed ms with thinking/choosing
+            # highlights. In TURBO there are no pauses: each frame applies the certain
+            # moves queued from the last solve until the frame budget is spent, then
+            # leaves the next solve running on the worker. No solve ever runs on this
+            # thread, so a slow one costs frames of waiting, not a frozen window.
+            turbo = speed_multiplier == TURBO
             if auto_solving and not board.game_over and not auto_paused:
-                auto_timer -= 1
-                if auto_timer <= 0:
-                    auto_timer = max(1, int(10 / speed_multiplier))
-
-                    # First click: reveal center cell to start the game
-                    if board.first_click:
-                        sr, sc = self.grid_size // 2, self.grid_size // 2
-                        res = board.reveal(sr, sc)
-                        if not game_started:
-                            game_started = True
-                            start_ticks = pygame.time.get_ticks()
-                        total_moves += 1
-                        if res != -999:
-                            auto_solver.log(f"Auto: First click ({sr},{sc})")
-                            log_move("AutoSolver", "Reveal", sr, sc, f"Safe ({res} cells)", "First Click")
-                        check_victory()
-                        if board.game_over:
-                            board.winner = "AutoSolver"
-                            auto_solving = False
-                    else:
-                        # 1. VISUALIZE CANDIDATES (Thinking Phase)
-                        frontier = get_frontier(board)
-                        if frontier:
-                            draw_game(time_str, timer_color, show_undo, highlights=frontier, highlight_col=C_THINKING)
-                            pygame.display.flip()
-                            pygame.time.delay(max(5, int(130 / speed_multiplier)))
-
-                        # 2. Get move from BacktrackingSolver
-                        move = auto_solver.get_move(board)
-                        if move:
-                            r, c, act = move
-
-                            # 3. VISUALIZE CHOICE (Choosing Phase)
-                            draw_game(time_str, timer_color, show_undo, highlights=[(r,c)], highlight_col=C_CHOOSING)
-                            pygame.display.flip()
-                            pygame.time.delay(max(5, int(130 / speed_multiplier)))
-
-                            # 4. EXECUTE MOVE
-                            last_ai_move = (r, c)
-                            ai_moves.add((r, c))
+                now = pygame.time.get_ticks()
+                if turbo or now >= auto_next_at:
+                    auto_next_at = now + (0 if turbo else int(167 / speed_multiplier))
+                    budget_end = time.perf_counter() + AUTO_TURBO_BUDGET_MS / 1000
+                    while True:
+                        # First click: reveal center cell to start the game
+                        if board.first_click:
+                            sr, sc = self.grid_size // 2, self.grid_size // 2
+                            res = board.reveal(sr, sc)
+                            if not game_started:
+                                game_started = True
+                                start_ticks = pygame.time.get_ticks()
                             total_moves += 1
-
-                            auto_reason = auto_solver.logs[-1] if auto_solver.logs else "Unknown"
-                            res_str = ""
-
-                            if act == 'reveal':
-                                if board.grid[r][c].is_mine:
-                                    auto_solver.log("AutoHint: Dodged mine via guess!")
-                                    act = 'flag'
-                                else:
-                                    res = board.reveal(r, c)
-                                    if res == -999:
-                                        flash_board(time_str, timer_color)
-                                        auto_solver.log("Auto: Hit Mine! Game Over.")
-                                        board.winner = "AutoSolver"
-                                        board.game_over = True
-                                        res_str = "Hit Mine"
-                                        reveal_all_mines()
-                                        auto_solving = False
-                                    else:
-                                        add_points("Human", res)
-                                        res_str = f"Safe ({res} cells)"
-                            if act == 'flag':
-                                board.toggle_flag(r, c)
-                                if board.grid[r][c].is_mine:
-                                    scores['Human']['CF'] += 1
-                                else:
-                                    scores['Human']['WF'] += 1
-                                res_str = "Flag Placed"
-
-                            log_move("AutoSolver", act.capitalize(), r, c, res_str, auto_reason)
+                            if res != -999:
+                                auto_solver.log("Auto: First click (%d,%d)", sr, sc)
+                                log_move("AutoSolver", "Reveal", sr, sc, f"Safe ({res} cells)", "First Click")
                             check_victory()
-                            run_comparison_snapshot()
-
                             if board.game_over:
                                 board.winner = "AutoSolver"
                                 auto_solving = False
-                                auto_solver.log("Auto: Board Solved!")
                         else:
-                            auto_solving = False
-                            auto_solver.log("Auto: No moves left.")
+                            # Get move from BacktrackingSolver on the worker (thinking/choosing highlights meanwhile)
+                            auto_ready, move = drive_solver(auto_solver, 0 if turbo else max(5, int(130 / speed_multiplier)))
+                            if not auto_ready:
+                                auto_next_at = now  # keep polling every frame
+                            elif move:
+                                r, c, act = move
+
+                                # EXECUTE MOVE
+                                last_ai_move = (r, c)
+                                renderer.mark_ai_move(r, c)
+                                total_moves += 1
+
+                                auto_reason = auto_solver.logs.last or "Unknown"
+                                res_str = ""
+
+                                if act == 'reveal':
+                                    if board.grid[r][c].is_mine:
+                                        auto_solver.log("AutoHint: Dodged mine via guess!")
+                                        act = 'flag'
+                                    else:
+                                        res = board.reveal(r, c)
+                                        if res == -999:
+                                            flash_board(time_str, timer_color)
+                                            auto_solver.log("Auto: Hit Mine! Game Over.")
+                                            board.winner = "AutoSolver"
+                                            board.game_over = True
+                                            res_str = "Hit Mine"
+                                            reveal_all_mines()
+                                            auto_solving = False
+                                        else:
+                                            add_points("Human", res)
+                                            res_str = f"Safe ({res} cells)"
+                                if act == 'flag':
+                                    board.toggle_flag(r, c)
+                                    if board.grid[r][c].is_mine:
+                                        scores['Human']['CF'] += 1
+                                    else:
+                                        scores['Human']['WF'] += 1
+                                    res_str = "Flag Placed"
+
+                                log_move("AutoSolver", act.capitalize(), r, c, res_str, auto_reason)
+                                check_victory()
+                                if not turbo:
+                                    run_comparison_snapshot()
+
+                                if board.game_over:
+                                    board.winner = "AutoSolver"
+                                    auto_solving = False
+                                    auto_solver.log("Auto: Board Solved!")
+                            else:
+                                auto_solving = False
+                                auto_solver.log("Auto: No moves left.")
+
+                        # A solve still in flight (phase set) ends the frame's turbo batch
+                        if not (turbo and auto_solving and not board.game_over and not solver_state['phase']
+                                and time.perf_counter() < budget_end):
+                            break
+                    # Comparison runs compete with this thread for the interpreter; space them out
+                    if turbo and now - comparison_done_at[0] >= TURBO_COMPARISON_INTERVAL_MS:
+                        run_comparison_snapshot()
+
+            prof.lap("logic")
 
             if game_started and not board.game_over:
                 elapsed_time = (pygame.time.get_ticks() - start_ticks) // 1000
 
-            # Standard draw call (no highlights)
-            draw_game(time_str, timer_color, show_undo)
+            # Standard draw call (plus solver thinking/choosing highlights while a solve is running)
+            if solver_state['phase']:
+                rects = draw_game(time_str, timer_color, show_undo, highlights=solver_state['highlights'], highlight_col=solver_state['col'])
+            else:
+                rects = draw_game(time_str, timer_color, show_undo)
             draw_stats_overlay()
-            pygame.display.flip()
+            if prof.show_overlay:
+                prof.draw_overlay(self.screen, (MARGIN + 10, MARGIN + 10))
+            if self.draw_transition():
+                need_full_redraw[0] = True  # repaint everything next frame, under a lighter overlay
+            present(rects)
+            move_log.flush_echo()
+            prof.lap("log_echo")
+            prof.end_frame()
+            self.metrics.frame_time.observe(prof.frames[-1]['frame'] / 1000)
             self.clock.tick(60)
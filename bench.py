@@ -0,0 +1,231 @@
+"""
+Solver and Board micro-benchmarks over a frozen corpus of mid-game boards.
+
+    python bench.py                              # every case, every op
+    python bench.py --size 30,100 --ops BT,DP --repeat 50
+    python bench.py --difficulty Hard --csv bench.csv
+    python bench.py --freeze                     # regenerate bench_corpus/
+
+The corpus is one saved game (board_file.py) per grid size and
+difficulty, checked in under bench_corpus/, so every run times exactly
+the same boards. Mine counts use the game's MINE_RATIO (constants.py).
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+from board import Board
+from constants import MINE_RATIO
+from board_file import save_game, load_game
+from log_store import print_table
+
+# --- BENCHMARK CORPUS ---
+# Each case is a seeded game played by the Greedy solver (dodging mines
+# the way the auto-solver does) until MIDGAME_FRACTION of the safe cells
+# are open, so the frontier is long and both flags and hidden interior
+# remain. --freeze rebuilds the files; normal runs only load them.
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_corpus")
+SIZES = (8, 16, 30, 50, 100)
+MIDGAME_FRACTION = 0.5
+CORPUS_SEED = 2024
+
+SOLVERS = {
+    "Greedy": ("ai_solver", "AI_Solver"),
+    "D&C": ("solver_dnc", "DNCSolver"),
+    "DP": ("solver_dp", "DPSolver"),
+    "BT": ("solver_backtrack", "BacktrackingSolver"),
+}
+PRIMITIVES = ("reveal", "chord", "save_state", "undo")
+
+
+def case_name(size, difficulty):
+    return f"{size}x{size}_{difficulty}"
+
+
+def case_path(size, difficulty, corpus_dir=CORPUS_DIR):
+    return os.path.join(corpus_dir, case_name(size, difficulty) + ".msb")
+
+
+def case_seed(size, difficulty):
+    return CORPUS_SEED + size * 10 + list(MINE_RATIO).index(difficulty)
+
+
+def play_to_midgame(size, difficulty):
+    """Plays a seeded Greedy game until MIDGAME_FRACTION of the safe cells are revealed."""
+    from ai_solver import AI_Solver
+    seed = case_seed(size, difficulty)
+    random.seed(seed)  # solver guesses; mines come from the board's own RNG
+    board = Board(size, size, int(size * size * MINE_RATIO[difficulty]), seed=seed)
+    solver = AI_Solver(silent=True)
+    target = int((size * size - board.total_mines) * MIDGAME_FRACTION)
+    board.reveal(size // 2, size // 2)
+    revealed = sum(b & 1 for b in board.cell_bits)
+    for _ in range(size * size * 2):
+        if revealed >= target:
+            break
+        move = solver.get_move(board)
+        if move is None:
+            break
+        r, c, act = move
+        if act == 'reveal' and not board.grid[r][c].is_mine:
+            revealed += board.reveal(r, c)
+        elif not board.grid[r][c].is_flagged:
+            board.toggle_flag(r, c)
+    board.history = []
+    return board
+
+
+def freeze(corpus_dir=CORPUS_DIR):
+    for difficulty in MINE_RATIO:
+        for size in SIZES:
+            board = play_to_midgame(size, difficulty)
+            path = case_path(size, difficulty, corpus_dir)
+            save_game(path, board, difficulty=difficulty, mode="auto", replay_name=case_name(size, difficulty))
+            open_cells = sum(b & 1 for b in board.cell_bits)
+            print(f"{os.path.basename(path)}: {open_cells}/{size * size} revealed, "
+                  f"{board.hidden_count()} hidden ({len(board.hidden_frontier)} frontier)")
+
+
+def load_case(size, difficulty, corpus_dir=CORPUS_DIR):
+    board, _, _ = load_game(case_path(size, difficulty, corpus_dir))
+    return board
+
+
+# --- TIMING ---
+# Every repetition starts from the same board state: solvers get a fresh
+# instance (so Backtracking's move queue can't answer from a previous
+# call) and the same guess RNG seed; Board ops are undone with
+# checkpoint/restore. Only the call itself is inside the timer.
+
+def time_calls(run, repeat, setup=None):
+    """Microseconds for `repeat` calls of run(state), state = setup() outside the timer."""
+    times = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        run(state)
+        times.append((time.perf_counter() - start) * 1_000_000)
+    return times
+
+
+def bench_solver(board, name, repeat, seed):
+    import importlib
+    module, cls = SOLVERS[name]
+    solver_cls = getattr(importlib.import_module(module), cls)
+
+    def setup():
+        random.seed(seed)
+        return solver_cls(silent=True)
+
+    return time_calls(lambda solver: solver.get_move(board), repeat, setup)
+
+
+def pick_reveal(board, rng):
+    """A hidden safe frontier cell (interior if the frontier has none)."""
+    cells = [c for c in board.hidden_frontier if not c.is_mine] or \
+            [c for c in board.hidden_interior if not c.is_mine]
+    return rng.choice(sorted(cells, key=lambda c: (c.r, c.c))) if cells else None
+
+
+def pick_chord(board, rng):
+    """A revealed number with hidden safe neighbours; its mines are flagged so the chord goes through."""
+    candidates = [cell for cell in board.get_revealed_numbered_nodes()
+                  if any(not n.is_revealed and not n.is_flagged and not n.is_mine for n in cell.neighbors)]
+    if not candidates:
+        return None
+    cell = rng.choice(sorted(candidates, key=lambda c: (c.r, c.c)))
+    for n in cell.neighbors:
+        if n.is_mine != n.is_flagged and not n.is_revealed:
+            board.toggle_flag(n.r, n.c)
+    return cell
+
+
+def bench_primitive(board, op, repeat, seed):
+    """None when the board has no cell to run `op` on."""
+    rng = random.Random(seed)
+    original = board.checkpoint()
+    if op == "save_state":
+        times = time_calls(lambda _: board.save_state(), repeat)
+    elif op == "undo":
+        times = time_calls(lambda _: board.undo(), repeat, board.save_state)
+    else:
+        cell = pick_reveal(board, rng) if op == "reveal" else pick_chord(board, rng)
+        if cell is None:
+            return None
+        action = board.reveal if op == "reveal" else board.chord
+        start = board.checkpoint()
+        times = time_calls(lambda _: action(cell.r, cell.c), repeat, lambda: board.restore(start))
+    board.restore(original)
+    return times
+
+
+def summarize(times):
+    times = sorted(times)
+    n = len(times)
+    return {
+        "n": n, "min": times[0], "p50": statistics.median(times), "mean": statistics.fmean(times),
+        "p95": times[min(n - 1, int(n * 0.95))], "max": times[-1],
+    }
+
+
+def run(sizes, difficulties, ops, repeat, warmup=1, corpus_dir=CORPUS_DIR):
+    """Yields (case, op, stats or None) in corpus order."""
+    for difficulty in difficulties:
+        for size in sizes:
+            board = load_case(size, difficulty, corpus_dir)
+            seed = case_seed(size, difficulty)
+            for op in ops:
+                bench = bench_solver if op in SOLVERS else bench_primitive
+                if warmup:
+                    bench(board, op, warmup, seed)
+                times = bench(board, op, repeat, seed)
+                yield case_name(size, difficulty), op, summarize(times) if times else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark solvers and Board operations on the frozen corpus.")
+    parser.add_argument("--size", default=",".join(map(str, SIZES)), help="comma-separated grid sizes")
+    parser.add_argument("--difficulty", default=",".join(MINE_RATIO), help="comma-separated difficulties")
+    parser.add_argument("--ops", default=",".join(list(SOLVERS) + list(PRIMITIVES)),
+                        help="comma-separated solvers and Board ops")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=1, help="untimed calls per case before timing")
+    parser.add_argument("--csv", help="also write the results here")
+    parser.add_argument("--corpus", default=CORPUS_DIR)
+    parser.add_argument("--freeze", action="store_true", help="regenerate the corpus and exit")
+    args = parser.parse_args(argv)
+
+    if args.freeze:
+        freeze(args.corpus)
+        return 0
+    sizes = [int(s) for s in args.size.split(",") if s]
+    difficulties = [d for d in args.difficulty.split(",") if d]
+    ops = [op for op in args.ops.split(",") if op]
+    bad = [s for s in sizes if s not in SIZES] + [d for d in difficulties if d not in MINE_RATIO] + \
+          [op for op in ops if op not in SOLVERS and op not in PRIMITIVES]
+    if bad:
+        parser.error(f"not in the corpus: {', '.join(map(str, bad))}")
+
+    header = ["case", "op", "n", "min us", "p50 us", "mean us", "p95 us", "max us"]
+    rows = []
+    for case, op, st in run(sizes, difficulties, ops, max(1, args.repeat), max(0, args.warmup), args.corpus):
+        if st is None:
+            rows.append([case, op, 0, "", "", "", "", ""])
+        else:
+            rows.append([case, op, st["n"]] + [f"{st[k]:.1f}" for k in ("min", "p50", "mean", "p95", "max")])
+    print_table(header, rows)
+    if args.csv:
+        import csv
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(header)
+            writer.writerows(rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
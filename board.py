@@ -1,61 +1,317 @@
 import random
-import copy
 from collections import deque
+from itertools import compress
 from cell import Cell
 
+# Bits of a packed cell byte (the number sits above them: number << 3)
+REVEALED, FLAGGED, MINE = 1, 2, 4
+# bytes.translate tables over cell bytes: 0/1 per cell, or the updated byte
+_REVEALED_BIT = bytes(b & REVEALED for b in range(256))
+_HIDDEN = bytes(int(not b & (REVEALED | FLAGGED)) for b in range(256))
+_NUMBERED = bytes(int(b & REVEALED and b >> 3 > 0) for b in range(256))
+_NONZERO = bytes(int(b > 0) for b in range(256))
+_MINES_SHOWN = bytes(b | REVEALED if b & MINE else b for b in range(256))
+_HIDDEN_FLAGGED = bytes(b if b & REVEALED else b | FLAGGED for b in range(256))
+_MINE_REVEALED = bytes(int(b & (MINE | REVEALED) == MINE | REVEALED) for b in range(256))
+
+# --- INDEXED CELL SET ---
+# A set that also supports O(1) uniform sampling: items live in a list,
+# and a dict maps each item to its list slot so removal can swap-pop.
+# Items are the cells' flat indices (Cell.index), so a whole set can be
+# loaded from cell_bits without building Cells; cells are looked up in
+# the grid on the way out. A set loaded from a byte mask (load_mask) only
+# lists its items and builds the slot dict when first used.
+class IndexedCellSet:
+    def __init__(self, grid):
+        self.grid = grid
+        self._items = []
+        self._pos = {}
+        self._mask = None
+
+    @property
+    def items(self):
+        if self._mask is not None:
+            self._items = list(compress(range(len(self._mask)), self._mask))
+            self._mask = None
+        return self._items
+
+    def _positions(self):
+        if self._pos is None:
+            self._pos = dict(zip(self.items, range(len(self._items))))
+        return self._pos
+
+    def add(self, cell):
+        pos = self._positions()
+        if cell.index not in pos:
+            pos[cell.index] = len(self._items)
+            self._items.append(cell.index)
+
+    def discard(self, cell):
+        pos = self._positions()
+        i = pos.pop(cell.index, None)
+        if i is None: return
+        last = self._items.pop()
+        if i < len(self._items):
+            self._items[i] = last
+            pos[last] = i
+
+    def clear(self):
+        self._items = []
+        self._pos = {}
+        self._mask = None
+
+    def load(self, indices):
+        """Replaces the contents with the cells at flat `indices`, keeping their order."""
+        self._items = list(indices)
+        self._pos = dict(zip(self._items, range(len(self._items))))
+        self._mask = None
+
+    def load_mask(self, mask):
+        """Replaces the contents with the cells whose byte in `mask` is 1, in row-major order."""
+        self._mask = mask
+        self._pos = None
+
+    def choice(self):
+        return self.grid.cell(random.choice(self.items)) if len(self) else None
+
+    def __len__(self):
+        return len(self._items) if self._mask is None else self._mask.count(1)
+
+    def __contains__(self, cell):
+        return cell.index in self._positions()
+
+    def __iter__(self):
+        return map(self.grid.cell, self.items)
+
+# --- LAZY GRID ---
+# grid[r][c] is the Cell at (r, c), but cell_bits is the source of truth:
+# a row's Cells are built from it the first time the row is indexed, and
+# a Cell's neighbour list the first time it is read (Cell.__getattr__).
+# A new, loaded or mirrored board therefore costs no per-cell work until
+# something looks at its cells, and then only for the rows it looks at.
+class LazyGrid:
+    def __init__(self, board):
+        self.board = board
+        self.cols = board.cols
+        self._rows = [None] * board.rows
+
+    def __getitem__(self, r):
+        row = self._rows[r]
+        if row is None:
+            start = r * self.cols
+            row = self._rows[r] = [Cell(r, c, self, start + c) for c in range(self.cols)]
+            _load_row(row, self.board.cell_bits[start:start + self.cols])
+        return row
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __iter__(self):
+        for r in range(len(self._rows)):
+            yield self[r]
+
+    def built_rows(self):
+        """(r, row) for every row whose Cells exist."""
+        return [(r, row) for r, row in enumerate(self._rows) if row is not None]
+
+    def cell(self, index):
+        return self[index // self.cols][index % self.cols]
+
+    def neighbors(self, cell):
+        # Row-major order: (-1,-1), (-1,0), (-1,1), (0,-1), (0,1), (1,-1), (1,0), (1,1)
+        r, c = cell.r, cell.c
+        span = range(max(c - 1, 0), min(c + 2, self.cols))
+        around = [self[nr] for nr in range(max(r - 1, 0), min(r + 2, len(self._rows)))]
+        return [row[nc] for row in around for nc in span if row[nc] is not cell]
+
+
+def _load_row(row, bits):
+    for cell, b in zip(row, bits):
+        cell.is_revealed = bool(b & REVEALED)
+        cell.is_flagged = bool(b & FLAGGED)
+        cell.is_mine = bool(b & MINE)
+        cell.number = b >> 3
+
 # --- 2. BOARD CLASS ---
 class Board:
-    def __init__(self, rows, cols, mines):
+    def __init__(self, rows, cols, mines, seed=None):
         self.rows = rows
         self.cols = cols
         self.total_mines = mines
-        self.grid = [[Cell(r, c) for c in range(cols)] for r in range(rows)]
+        # Mine placement draws only from this RNG, so (size, mines, seed, moves) reproduces a game
+        self.seed = random.randrange(1 << 32) if seed is None else seed
+        self.rng = random.Random(self.seed)
+        # Packed state of every cell (see CELL BYTES below); grid's Cells are built from it
+        self.cell_bits = bytearray(rows * cols)
+        self.grid = LazyGrid(self)
         self.game_over = False
         self.winner = None
         self.first_click = True
         self.history = [] 
-        self._build_adjacency()
+        # Bumped on every mutation so derived data can be cached per board version
+        self.version = 0
+        # Mutation listeners: fn(cells) with the changed cells, or None for "everything"
+        self._listeners = []
+        self._changed = []
+        # Hidden, unflagged cells split by whether they touch a revealed cell
+        self.hidden_frontier = IndexedCellSet(self.grid)
+        self.hidden_interior = IndexedCellSet(self.grid)
+        # Nothing is revealed yet, so every cell is interior
+        self.hidden_interior.load_mask(b'\1' * (rows * cols))
 
-    def _build_adjacency(self):
-        directions = [(-1, -1), (-1, 0), (-1, 1), (0, -1), 
-                      (0, 1), (1, -1), (1, 0), (1, 1)]
-        for r in range(self.rows):
-            for c in range(self.cols):
-                self.grid[r][c].neighbors = []
-                for dr, dc in directions:
-                    nr, nc = r + dr, c + dc
-                    if 0 <= nr < self.rows and 0 <= nc < self.cols:
-                        self.grid[r][c].neighbors.append(self.grid[nr][nc])
+    def __getstate__(self):
+        # Listeners belong to the live UI, never to copies/snapshots
+        state = self.__dict__.copy()
+        state['_listeners'] = []
+        state['_changed'] = []
+        return state
+
+    # --- MUTATION EVENTS ---
+    def add_listener(self, fn):
+        self._listeners.append(fn)
+
+    def remove_listener(self, fn):
+        if fn in self._listeners:
+            self._listeners.remove(fn)
+
+    def _emit(self, cells):
+        self.version += 1
+        for fn in self._listeners:
+            fn(cells)
+
+    def _emit_changed(self):
+        cells, self._changed = self._changed, []
+        self._emit(cells)
+
+    def _neighbor_sums(self, mask):
+        """
+        Per cell, the sum of a 0/1-per-cell byte mask over its 8 neighbours,
+        as one byte per cell. The whole board is one int with a byte per
+        cell (a sum is at most 8, so bytes never carry), shifted by a
+        column and by a row.
+        """
+        n, cols = self.rows * self.cols, self.cols
+        x = int.from_bytes(mask, 'little')
+        not_first = int.from_bytes((b'\0' + b'\1' * (cols - 1)) * self.rows, 'little')
+        not_last = int.from_bytes((b'\1' * (cols - 1) + b'\0') * self.rows, 'little')
+        row = x + (x << 8 & not_first) + (x >> 8 & not_last)
+        total = row + (row << 8 * cols) + (row >> 8 * cols) - x
+        return (total & ((1 << 8 * n) - 1)).to_bytes(n, 'little')
+
+    def _rebuild_hidden_index(self):
+        # From cell_bits alone: hidden cells next to a revealed cell are the frontier
+        n = self.rows * self.cols
+        hidden = int.from_bytes(self.cell_bits.translate(_HIDDEN), 'little')
+        near = self._neighbor_sums(self.cell_bits.translate(_REVEALED_BIT)).translate(_NONZERO)
+        frontier = hidden & int.from_bytes(near, 'little')
+        self.hidden_frontier.load_mask(frontier.to_bytes(n, 'little'))
+        self.hidden_interior.load_mask((hidden ^ frontier).to_bytes(n, 'little'))
+
+    def _index_hidden(self, cell):
+        if any(n.is_revealed for n in cell.neighbors):
+            self.hidden_frontier.add(cell)
+        else:
+            self.hidden_interior.add(cell)
+
+    def _mark_revealed(self, cell):
+        cell.is_revealed = True
+        self.cell_bits[cell.index] |= REVEALED
+        self._changed.append(cell)
+        self.hidden_frontier.discard(cell)
+        self.hidden_interior.discard(cell)
+        for n in cell.neighbors:
+            if n in self.hidden_interior:
+                self.hidden_interior.discard(n)
+                self.hidden_frontier.add(n)
+
+    # --- CELL BYTES ---
+    # Each cell packs into one byte: revealed | flagged << 1 | mine << 2 |
+    # number << 3. cell_bits is the source of truth, and every mutation
+    # updates it together with any Cell already built, so undo snapshots,
+    # replay checkpoints and saved board files (board_file.py) are a single
+    # bytes() copy of it, and loading any of them goes through load_cells().
+    def load_cells(self, cells):
+        """Sets every cell from packed bytes (any buffer of rows * cols bytes)."""
+        old = bytes(self.cell_bits)
+        self.cell_bits[:] = cells
+        # Only rows whose Cells exist and whose bytes changed need touching
+        cols, bits = self.cols, self.cell_bits
+        for r, row in self.grid.built_rows():
+            start = r * cols
+            if bits[start:start + cols] != old[start:start + cols]:
+                _load_row(row, bits[start:start + cols])
 
     def save_state(self):
         if len(self.history) > 10: 
             self.history.pop(0)
-        self.history.append(copy.deepcopy(self.grid))
+        self.history.append((self.first_click, bytes(self.cell_bits)))
 
     def undo(self):
         if not self.history: return False
-        self.grid = self.history.pop()
+        first_click, state = self.history.pop()
+        # Snapshots from before the first click have no mines, so this also clears them
+        self.load_cells(state)
+        self.first_click = first_click
         self.game_over = False
         self.winner = None
-        self._build_adjacency()
+        self._rebuild_hidden_index()
+        self._emit(None)
         return True
 
+    # Full-state checkpoints for replay seeking: the cell bytes plus the
+    # flags, RNG state and undo stack needed to continue the game from there.
+    # The hidden-cell index is stored too, so a restore keeps its order.
+    def checkpoint(self):
+        return (bytes(self.cell_bits), self.first_click, self.game_over, self.winner, self.rng.getstate(),
+                list(self.history), list(self.hidden_frontier.items), list(self.hidden_interior.items))
+
+    def restore(self, checkpoint):
+        cells, self.first_click, self.game_over, self.winner, rng_state, history, frontier, interior = checkpoint
+        self.load_cells(cells)
+        self.rng.setstate(rng_state)
+        self.history = list(history)
+        self.hidden_frontier.load(frontier)
+        self.hidden_interior.load(interior)
+        self._emit(None)
+
+    # Immutable copy of the position for another thread (solver workers):
+    # solvers need only the cells and first_click, loaded into a board of
+    # the same size that the other thread owns.
+    def snapshot(self):
+        return bytes(self.cell_bits), self.first_click
+
+    def load_snapshot(self, snapshot):
+        cells, self.first_click = snapshot
+        self.load_cells(cells)
+        self.game_over = False
+        self.winner = None
+        self._rebuild_hidden_index()
+        self._emit(None)
+
+    def load(self, cells, first_click, game_over, winner, rng_state, history):
+        """Sets the whole game state from saved parts (board_file.py)."""
+        self.load_cells(cells)
+        self.first_click, self.game_over, self.winner = first_click, game_over, winner
+        self.rng.setstate(rng_state)
+        self.history = list(history)
+        self._rebuild_hidden_index()
+        self._emit(None)
+
     def place_mines(self, safe_r, safe_c):
-        safe_zone = [self.grid[safe_r][safe_c]] + self.grid[safe_r][safe_c].neighbors
-        candidates = []
-        for r in range(self.rows):
-            for c in range(self.cols):
-                if self.grid[r][c] not in safe_zone:
-                    candidates.append(self.grid[r][c])
+        safe_cell = self.grid[safe_r][safe_c]
+        safe_zone = {cell.index for cell in [safe_cell] + safe_cell.neighbors}
+        n = self.rows * self.cols
+        candidates = [i for i in range(n) if i not in safe_zone]
         
-        mines_placed = random.sample(candidates, self.total_mines)
-        for cell in mines_placed:
-            cell.is_mine = True
+        mines = bytearray(n)
+        for i in self.rng.sample(candidates, self.total_mines):
+            mines[i] = 1
         
-        for r in range(self.rows):
-            for c in range(self.cols):
-                if not self.grid[r][c].is_mine:
-                    self.grid[r][c].number = sum(1 for n in self.grid[r][c].neighbors if n.is_mine)
+        # Mines get MINE, every other cell the count of mines around it
+        is_mine = int.from_bytes(mines, 'little')
+        numbers = int.from_bytes(self._neighbor_sums(mines), 'little') & ~(is_mine * 0xFF)
+        placed = int.from_bytes(self.cell_bits, 'little') | is_mine * MINE | numbers << 3
+        self.load_cells(placed.to_bytes(n, 'little'))
 
     def reveal(self, r, c):
         cell = self.grid[r][c]
@@ -67,9 +323,10 @@ class Board:
             self.place_mines(r, c)
             self.first_click = False
 
-        cell.is_revealed = True
+        self._mark_revealed(cell)
         if cell.is_mine:
             self.game_over = True
+            self._emit_changed()
             return -999
 
         revealed_count = 1
@@ -79,10 +336,11 @@ class Board:
                 curr = queue.popleft()
                 for n in curr.neighbors:
                     if not n.is_revealed and not n.is_flagged:
-                        n.is_revealed = True
+                        self._mark_revealed(n)
                         revealed_count += 1
                         if n.number == 0:
                             queue.append(n)
+        self._emit_changed()
         return revealed_count
 
     def chord(self, r, c):
@@ -96,7 +354,7 @@ class Board:
             mine_hit = False
             for n in cell.neighbors:
                 if not n.is_revealed and not n.is_flagged:
-                    n.is_revealed = True
+                    self._mark_revealed(n)
                     if n.is_mine:
                         mine_hit = True
                     else:
@@ -107,11 +365,12 @@ class Board:
                                 curr = q.popleft()
                                 for neighbor in curr.neighbors:
                                     if not neighbor.is_revealed and not neighbor.is_flagged:
-                                        neighbor.is_revealed = True
+                                        self._mark_revealed(neighbor)
                                         points += 1
                                         if neighbor.number == 0:
                                             q.append(neighbor)
 
+            self._emit_changed()
             if mine_hit: 
                 self.game_over = True
                 return -999
@@ -123,9 +382,53 @@ class Board:
         if not cell.is_revealed:
             self.save_state()
             cell.is_flagged = not cell.is_flagged
+            self.cell_bits[r * self.cols + c] ^= FLAGGED
+            if cell.is_flagged:
+                self.hidden_frontier.discard(cell)
+                self.hidden_interior.discard(cell)
+            else:
+                self._index_hidden(cell)
+            self._emit([cell])
             return True
         return False
 
+    def reveal_all_mines(self):
+        self.load_cells(self.cell_bits.translate(_MINES_SHOWN))
+        self._rebuild_hidden_index()
+        self._emit(None)
+
+    def flag_all_hidden(self):
+        self.load_cells(self.cell_bits.translate(_HIDDEN_FLAGGED))
+        self.hidden_frontier.clear()
+        self.hidden_interior.clear()
+        self._emit(None)
+
+    def revealed_count(self):
+        # Counted over cell_bits in C: microseconds even for large boards
+        return self.cell_bits.translate(_REVEALED_BIT).count(1)
+
+    def mine_revealed(self):
+        return 1 in self.cell_bits.translate(_MINE_REVEALED)
+
+    # --- O(1) GUESS SAMPLING ---
+    def hidden_count(self):
+        return len(self.hidden_frontier) + len(self.hidden_interior)
+
+    def random_hidden(self):
+        """Uniformly random hidden, unflagged cell (or None)."""
+        n = self.hidden_count()
+        if n == 0: return None
+        i = random.randrange(n)
+        if i < len(self.hidden_frontier):
+            return self.grid.cell(self.hidden_frontier.items[i])
+        return self.grid.cell(self.hidden_interior.items[i - len(self.hidden_frontier)])
+
+    def random_frontier(self):
+        return self.hidden_frontier.choice()
+
+    def random_interior(self):
+        return self.hidden_interior.choice()
+
     def get_hidden_neighbors(self, cell):
         return [n for n in cell.neighbors if not n.is_revealed and not n.is_flagged]
 
@@ -133,10 +436,11 @@ class Board:
         return [n for n in cell.neighbors if n.is_flagged]
 
     def get_revealed_numbered_nodes(self):
-        nodes = []
+        # Found in cell_bits, so only the rows holding them get built
+        numbered = self.cell_bits.translate(_NUMBERED)
+        cols, nodes = self.cols, []
         for r in range(self.rows):
-            for c in range(self.cols):
-                cell = self.grid[r][c]
-                if cell.is_revealed and cell.number > 0:
-                    nodes.append(cell)
+            row_bits = numbered[r * cols:(r + 1) * cols]
+            if 1 in row_bits:
+                nodes.extend(compress(self.grid[r], row_bits))
         return nodes
@@ -0,0 +1,108 @@
+import os
+import mmap
+import struct
+from board import Board
+
+# --- SAVED GAMES (BOARD FILES) ---
+# An in-progress game is saved as one fixed-layout binary file:
+#
+#   header   128 bytes (HEADER below)
+#   cells    rows * cols bytes, one packed byte per cell (Board.cell_bits),
+#            so cell (r, c) is at HEADER.size + r * cols + c
+#   rng      624 + 1 uint32: the Mersenne Twister state of Board.rng
+#   history  `history` undo snapshots of 1 + rows * cols bytes (first_click, cells)
+#   replay   the game's replay stream so far (replay.py), to end of file
+#
+# Saving writes Board.cell_bits and the snapshots straight from their
+# buffers, with no per-cell work; loading maps the file and hands the
+# cell region to Board.load without copying it first. Unlike a pickle of
+# the grid, nothing in the file is a Python object.
+
+MAGIC = b"MSBD"
+FORMAT_VERSION = 1
+
+# magic, version, flags, winner, history count | rows, cols, mines, seed |
+# elapsed s, moves | turn | scores (Human RS/CF/WF, AI RS/CF/WF) |
+# difficulty, mode, algorithm | replay file name
+HEADER = struct.Struct("<4sBBBB IIII II B3x 6i BBBx 64s")
+RNG_STATE = struct.Struct("<625I")
+RNG_VERSION = 3  # random.Random.getstate() format
+
+FIRST_CLICK, GAME_OVER = 1, 2
+WINNERS = [None, "Human", "AI", "Draw", "AutoSolver"]
+TURNS = ["Human", "AI"]
+DIFFICULTIES = ["Easy", "Medium", "Hard"]
+MODES = ["solo", "vs_cpu", "auto"]
+ALGORITHMS = ["Greedy", "D&C", "DP", "BT"]
+SCORE_KEYS = ("RS", "CF", "WF")
+
+
+def save_game(path, board, replay=b"", elapsed=0, moves=0, turn="Human", scores=None,
+              difficulty="Easy", mode="solo", algorithm="Greedy", replay_name=""):
+    """Writes the game to `path` (atomically, via a .tmp file)."""
+    scores = scores or {"Human": {}, "AI": {}}
+    flags = (FIRST_CLICK if board.first_click else 0) | (GAME_OVER if board.game_over else 0)
+    header = HEADER.pack(
+        MAGIC, FORMAT_VERSION, flags, WINNERS.index(board.winner), len(board.history),
+        board.rows, board.cols, board.total_mines, board.seed, int(elapsed), moves, TURNS.index(turn),
+        *(scores[actor].get(k, 0) for actor in TURNS for k in SCORE_KEYS),
+        DIFFICULTIES.index(difficulty), MODES.index(mode), ALGORITHMS.index(algorithm),
+        replay_name.encode("utf-8"))
+    _, state, _ = board.rng.getstate()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path + ".tmp", "wb") as f:
+        f.write(header)
+        f.write(board.cell_bits)
+        f.write(RNG_STATE.pack(*state))
+        for first_click, cells in board.history:
+            f.write(bytes([first_click]))
+            f.write(cells)
+        f.write(replay)
+    os.replace(path + ".tmp", path)
+
+
+def _session(fields):
+    (magic, version, flags, winner, history, rows, cols, mines, seed, elapsed, moves, turn,
+     *rest) = fields
+    scores, (difficulty, mode, algorithm, replay_name) = rest[:6], rest[6:]
+    if magic != MAGIC:
+        raise ValueError("not a saved game")
+    if version != FORMAT_VERSION:
+        raise ValueError(f"unsupported saved game version {version}")
+    return {
+        "rows": rows, "cols": cols, "mines": mines, "seed": seed,
+        "first_click": bool(flags & FIRST_CLICK), "game_over": bool(flags & GAME_OVER),
+        "winner": WINNERS[winner], "history": history,
+        "elapsed": elapsed, "moves": moves, "turn": TURNS[turn],
+        "scores": {actor: dict(zip(SCORE_KEYS, scores[i * 3:i * 3 + 3])) for i, actor in enumerate(TURNS)},
+        "difficulty": DIFFICULTIES[difficulty], "mode": MODES[mode], "algorithm": ALGORITHMS[algorithm],
+        "replay_name": replay_name.rstrip(b"\0").decode("utf-8"),
+    }
+
+
+def read_session(path):
+    """The header alone, as the session dict load_game returns (for menus)."""
+    with open(path, "rb") as f:
+        return _session(HEADER.unpack(f.read(HEADER.size)))
+
+
+def load_game(path):
+    """Returns (board, session dict, replay bytes)."""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        session = _session(HEADER.unpack_from(mm))
+        rows, cols = session["rows"], session["cols"]
+        n = rows * cols
+        board = Board(rows, cols, session["mines"], seed=session["seed"])
+        # Slices of the view are released before the map closes
+        with memoryview(mm) as view:
+            at = HEADER.size + n
+            rng_state = (RNG_VERSION, RNG_STATE.unpack_from(view, at), None)
+            at += RNG_STATE.size
+            history = []
+            for _ in range(session["history"]):
+                history.append((bool(view[at]), bytes(view[at + 1:at + 1 + n])))
+                at += 1 + n
+            board.load(view[HEADER.size:HEADER.size + n], session["first_click"], session["game_over"],
+                       session["winner"], rng_state, history)
+            replay = bytes(view[at:])
+    return board, session, replay
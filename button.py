@@ -1,5 +1,6 @@
 import pygame
 from constants import *
+from text_cache import render_text
 
 # --- 4. UI HELPER: BUTTONS ---
 class Button:
@@ -16,7 +17,7 @@ class Button:
         pygame.draw.rect(screen, col, self.rect, border_radius=8)
         pygame.draw.rect(screen, C_ACCENT, self.rect, 2, border_radius=8)
         
-        txt_surf = font.render(self.text, True, C_TEXT_MAIN)
+        txt_surf = render_text(font, self.text, C_TEXT_MAIN)
         txt_rect = txt_surf.get_rect(center=self.rect.center)
         screen.blit(txt_surf, txt_rect)
 
@@ -1,21 +1,35 @@
 class Cell:
-    def __init__(self, r, c):
+    def __init__(self, r, c, grid=None, index=None):
         self.r = r
         self.c = c
         self.is_mine = False
         self.is_revealed = False
         self.is_flagged = False
         self.number = 0
-        self.neighbors = [] 
+        # Flat index (r * cols + c) into the board's cell_bits, and the grid
+        # that builds the neighbour list on first use (see __getattr__)
+        self.index = index
+        self.grid = grid
+        if grid is None:
+            self.neighbors = [] 
+
+    def __getattr__(self, name):
+        # Only reached while `neighbors` hasn't been built yet
+        if name != 'neighbors' or self.__dict__.get('grid') is None:
+            raise AttributeError(name)
+        self.neighbors = self.grid.neighbors(self)
+        return self.neighbors
 
     def __getstate__(self):
         state = self.__dict__.copy()
-        del state['neighbors']
+        state.pop('neighbors', None)
         return state
 
     def __setstate__(self, state):
+        # Copies rebuild their neighbour lists from their own grid on first use
         self.__dict__.update(state)
-        self.neighbors = []
+        if self.grid is None:
+            self.neighbors = []
 
     def __repr__(self):
         return f"Cell({self.r}, {self.c})"
@@ -2,6 +2,18 @@
 CELL_SIZE = 35
 MARGIN = 50
 SIDEBAR_WIDTH = 350
+# Cell size bounds for zoom/resize, and the largest grid viewport before the board scrolls
+MIN_CELL_SIZE = 6
+MAX_CELL_SIZE = 50
+MAX_VIEW_PX = 800
+# Share of the grid's cells that are mines, per difficulty
+MINE_RATIO = {"Easy": 0.12, "Medium": 0.17, "Hard": 0.22}
+# Turbo auto-solve: time per frame spent applying solver moves, and the pause
+# after a solver comparison run before turbo starts the next one
+AUTO_TURBO_BUDGET_MS = 12
+TURBO_COMPARISON_INTERVAL_MS = 1000
+# Fade-in when switching screens (menu, settings, game, replays); non-blocking
+TRANSITION_MS = 250
 
 # Modern Dark Theme
 C_BG = (18, 18, 24)
@@ -0,0 +1,369 @@
+import os
+import sys
+import time
+import queue
+import threading
+import datetime
+from collections import deque
+
+# --- STRUCTURED LOGGING ---
+# Solvers and the game loop log on every move, so nothing here formats
+# or prints eagerly: records are stored as (template, args) tuples and
+# only turned into strings when something actually reads them.
+
+
+def entry_rows(entries):
+    """Yields MoveLog entries as the dicts written to the session log."""
+    for ts, actor, action, r, c, result, reason in entries:
+        yield {
+            "Time": datetime.datetime.fromtimestamp(ts).strftime("%H:%M:%S"),
+            "Actor": actor,
+            "Action": action,
+            "Coord": f"({r},{c})",
+            "Result": result,
+            "Reason": format_record(reason),
+        }
+
+
+def format_echo(entries):
+    return "".join(
+        f"[LOG] {actor} {action} at ({r},{c}) -> {result} | {format_record(reason)}\n"
+        for _, actor, action, r, c, result, reason in entries
+    )
+
+
+def format_session_block(timestamp, grid_size, mines, entries):
+    """The text block one saved game adds to the session log."""
+    block = [
+        f"\n{'='*60}\n SESSION TIMESTAMP: {timestamp}\n{'='*60}\n",
+        f"Grid: {grid_size}x{grid_size}, Mines: {mines}\n",
+        "-" * 105 + "\n",
+        f"{'TIME':<10} | {'ACTOR':<8} | {'ACTION':<10} | {'COORD':<8} | {'RESULT':<20} | {'REASON'}\n",
+        "-" * 105 + "\n",
+    ]
+    for e in entry_rows(entries):
+        block.append(f"{e['Time']:<10} | {e['Actor']:<8} | {e['Action']:<10} | {e['Coord']:<8} | {e['Result']:<20} | {e['Reason']}\n")
+    block.append("\n")
+    return "".join(block)
+
+
+def format_record(record):
+    """Formats a (template, args) record; plain strings pass through."""
+    if isinstance(record, str):
+        return record
+    template, args = record
+    return template % args if args else template
+
+
+class SolverLog:
+    """
+    Ring buffer of the most recent solver messages.
+
+    Behaves like the old list of strings (len, indexing, iteration,
+    reversed) but formats lazily. In silent mode nothing is buffered;
+    only the latest record is kept so callers can still inspect it.
+    """
+    def __init__(self, first=None, maxlen=8, silent=False):
+        self._records = deque(maxlen=maxlen)
+        self.silent = silent
+        self.last = None
+        # Total records ever added; lets the UI detect new messages without formatting
+        self.count = 0
+        if first:
+            self.add(first)
+
+    def add(self, template, *args):
+        record = (template, args)
+        self.last = record
+        self.count += 1
+        if not self.silent:
+            self._records.append(record)
+
+    def last_template(self):
+        """Unformatted template of the latest record (cheap to pattern-match)."""
+        return self.last[0] if self.last else ""
+
+    def latest(self):
+        return format_record(self.last) if self.last else ""
+
+    def clear(self):
+        self._records.clear()
+        self.last = None
+
+    def __len__(self):
+        return len(self._records)
+
+    def __getitem__(self, i):
+        return format_record(self._records[i])
+
+    # Iteration works on a copy: solvers may log from the worker thread while the UI reads
+    def __iter__(self):
+        return (format_record(r) for r in list(self._records))
+
+    def __reversed__(self):
+        return (format_record(r) for r in reversed(list(self._records)))
+
+
+class MoveLog:
+    """
+    Per-game move records for the session log.
+
+    Entries are stored as tuples with a raw timestamp; the HH:MM:SS
+    string and the console echo are produced later. Echo entries are
+    buffered and handed over once per frame by flush_echo(), to the
+    LogWriter thread if there is one, else written in one call.
+    """
+    def __init__(self, echo=True, stream=None, writer=None):
+        self.entries = []
+        self.echo = echo
+        self.stream = stream
+        self.writer = writer
+        self._pending = []
+
+    def record(self, actor, action, r, c, result, reason):
+        entry = (time.time(), actor, action, r, c, result, reason)
+        self.entries.append(entry)
+        if self.echo:
+            self._pending.append(entry)
+
+    def flush_echo(self):
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        if self.writer is not None:
+            self.writer.echo(pending)
+            return
+        stream = self.stream or sys.stdout
+        stream.write(format_echo(pending))
+        stream.flush()
+
+    def rows(self):
+        return entry_rows(self.entries)
+
+    def take(self):
+        """Hands over the recorded entries and starts a fresh list."""
+        entries, self.entries = self.entries, []
+        return entries
+
+    def clear(self):
+        self.entries.clear()
+        self._pending.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class SessionLogWriter:
+    """
+    Append-only session log, split into text segments with a small index.
+
+    Each saved session is one block appended to the current segment
+    (game_log_NNNNNN.txt, rotated after segment_bytes) and then recorded
+    in sessions.idx as a fixed-width (segment, offset, length) line, so
+    saving costs O(block) and blocks can be read newest-first by walking
+    the index backwards. Existing bytes are never rewritten: a crash can
+    at worst leave an unindexed block or a torn index line, which is
+    dropped the next time the log is opened.
+    """
+    INDEX_NAME = "sessions.idx"
+    RECORD = "{:06d} {:012d} {:010d}\n"
+    RECORD_LEN = 31
+
+    def __init__(self, directory, segment_bytes=1 << 20):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self._segment = None  # segment being appended to, found on first use
+
+    @property
+    def index_path(self):
+        return os.path.join(self.directory, self.INDEX_NAME)
+
+    def segment_path(self, segment):
+        return os.path.join(self.directory, f"game_log_{segment:06d}.txt")
+
+    def _open(self):
+        """Drops a torn index record and finds the segment to append to."""
+        os.makedirs(self.directory, exist_ok=True)
+        size = os.path.getsize(self.index_path) if os.path.exists(self.index_path) else 0
+        torn = size % self.RECORD_LEN
+        if torn:
+            with open(self.index_path, "r+b") as f:
+                f.truncate(size - torn)
+            size -= torn
+        self._segment = 1
+        if size:
+            self._segment = self._read_record(size // self.RECORD_LEN - 1)[0]
+
+    def _read_record(self, i, f=None):
+        if f is None:
+            with open(self.index_path, "rb") as f:
+                return self._read_record(i, f)
+        f.seek(i * self.RECORD_LEN)
+        seg, offset, length = f.read(self.RECORD_LEN).split()
+        return int(seg), int(offset), int(length)
+
+    def append(self, text):
+        """Appends one block; returns its (segment, offset, length)."""
+        if self._segment is None:
+            self._open()
+        data = text.encode("utf-8")
+        while True:
+            with open(self.segment_path(self._segment), "ab") as f:
+                offset = f.tell()
+                if offset and offset + len(data) > self.segment_bytes:
+                    self._segment += 1
+                    continue
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            break
+        # The block is durable before the index points at it
+        record = (self._segment, offset, len(data))
+        with open(self.index_path, "ab") as f:
+            f.write(self.RECORD.format(*record).encode("ascii"))
+            f.flush()
+            os.fsync(f.fileno())
+        return record
+
+    def __len__(self):
+        if not os.path.exists(self.index_path):
+            return 0
+        return os.path.getsize(self.index_path) // self.RECORD_LEN
+
+    def blocks(self, newest_first=True, limit=None):
+        """Yields saved blocks as text, newest first by default."""
+        n = len(self)
+        order = range(n - 1, -1, -1) if newest_first else range(n)
+        if limit is not None:
+            order = order[:limit]
+        segments = {}
+        try:
+            with open(self.index_path, "rb") as index:
+                for i in order:
+                    seg, offset, length = self._read_record(i, index)
+                    if seg not in segments:
+                        segments[seg] = open(self.segment_path(seg), "rb")
+                    f = segments[seg]
+                    f.seek(offset)
+                    yield f.read(length).decode("utf-8")
+        finally:
+            for f in segments.values():
+                f.close()
+
+    def clear(self):
+        """Deletes every segment and the index."""
+        if os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name == self.INDEX_NAME or (name.startswith("game_log_") and name.endswith(".txt")):
+                    os.remove(os.path.join(self.directory, name))
+        self._segment = None
+
+
+class LogWriter:
+    """
+    Writer thread for console echo and saved sessions.
+
+    The game loop only enqueues: one echo batch per frame, one session
+    per save and whole-file writes (replays), formatted and written
+    here. Sessions go to the text session log and, if given, to the
+    structured store (log_store.LogStore). The queue is bounded; if it
+    is full, echo batches are dropped (and counted) rather than stalling
+    a frame, while sessions wait for room since they are the persistent
+    history. flush() waits for everything queued so far and close()
+    drains the queue and stops the thread.
+    """
+    BATCH = 64
+
+    def __init__(self, session_log, store=None, stream=None, maxsize=256):
+        self.session_log = session_log
+        self.store = store
+        self.stream = stream
+        self.dropped = 0
+        self._reported = 0
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def echo(self, entries):
+        try:
+            self._queue.put_nowait(('echo', entries))
+        except queue.Full:
+            self.dropped += len(entries)
+
+    def save(self, timestamp, grid_size, mines, entries, **meta):
+        """meta: difficulty, mode, solver, outcome, seed, replay, stats (see LogStore.add_session)."""
+        self._queue.put(('session', (timestamp, grid_size, mines, entries, meta)))
+
+    def clear(self, marker):
+        """Deletes the session history (text log and store), then writes `marker`."""
+        self._queue.put(('clear', marker))
+
+    def write_file(self, path, data):
+        """Replaces `path` with `data` (bytes), atomically, on the writer thread."""
+        self._queue.put(('file', (path, data)))
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def flush(self):
+        self._queue.join()
+
+    def close(self):
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while batch[-1] is not None and len(batch) < self.BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                self._write([item for item in batch if item is not None])
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if batch[-1] is None:
+                return
+
+    def _write(self, batch):
+        lines = []
+        dropped = self.dropped - self._reported
+        if dropped:
+            self._reported += dropped
+            lines.append(f"[LOG] ({dropped} echo lines dropped, log queue full)\n")
+        for kind, payload in batch:
+            if kind == 'echo':
+                lines.append(format_echo(payload))
+                continue
+            try:
+                self._handle(kind, payload)
+            except Exception as e:
+                print(f"Error writing log ({kind}): {e}", file=sys.stderr)
+        if lines:
+            stream = self.stream or sys.stdout
+            stream.write("".join(lines))
+            stream.flush()
+
+    def _handle(self, kind, payload):
+        if kind == 'file':
+            path, data = payload
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + ".tmp", "wb") as f:
+                f.write(data)
+            os.replace(path + ".tmp", path)
+        elif kind == 'session':
+            timestamp, grid_size, mines, entries, meta = payload
+            self.session_log.append(format_session_block(timestamp, grid_size, mines, entries))
+            if self.store is not None:
+                rows = [(ts, actor, action, r, c, result, format_record(reason))
+                        for ts, actor, action, r, c, result, reason in entries]
+                self.store.add_session(timestamp, grid_size, mines, rows, **meta)
+        elif kind == 'clear':
+            self.session_log.clear()
+            if self.store is not None:
+                self.store.clear()
+            self.session_log.append(payload)
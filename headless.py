@@ -0,0 +1,170 @@
+"""
+Off-screen rendering of solver games, for replays and visual regression
+artifacts without a display.
+
+    python headless.py --games 20 --size 16 --algo BT --out renders
+    python headless.py --games 500 --strip --every 5
+    python headless.py --games 50 --ext bmp     # ~10x faster to write than png
+
+Games are played straight through (no 60 FPS clock, no highlight pauses)
+and every frame is drawn with the same BoardRenderer the game uses, into
+a plain Surface under the SDL dummy video driver.
+"""
+
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import sys
+import time
+import random
+import argparse
+import pygame
+from constants import *
+from board import Board
+from ai_solver import AI_Solver
+from solver_dnc import DNCSolver
+from solver_dp import DPSolver
+from solver_backtrack import BacktrackingSolver
+from renderer import BoardRenderer
+from text_cache import get_font, render_text
+
+# --- HEADLESS RENDERER ---
+# The board surface is kept between frames and updated through the
+# renderer's dirty rects, so a frame costs the cells that changed plus
+# the status line, not a full repaint. Frames are either saved one file
+# per frame or scaled into a per-game contact strip.
+
+SOLVERS = {"Greedy": AI_Solver, "D&C": DNCSolver, "DP": DPSolver, "BT": BacktrackingSolver}
+PAD = 10
+STATUS_H = 24
+
+
+class HeadlessGame:
+    """One solver game plus its off-screen frame."""
+
+    def __init__(self, size, difficulty="Medium", algo="BT", cell_size=20, max_moves=None, seed=None):
+        self.board = Board(size, size, int(size * size * MINE_RATIO[difficulty]), seed=seed)
+        self.solver = SOLVERS[algo](silent=True)
+        self.algo = algo
+        self.moves = 0
+        self.max_moves = max_moves or size * size * 2
+        self.result = None
+        self.renderer = BoardRenderer(self.board, cell_size, origin=(PAD, PAD))
+        grid = self.renderer.grid_rect()
+        self.surface = pygame.Surface((grid.width + PAD * 2, grid.height + PAD * 2 + 20 + STATUS_H))
+        self.surface.fill(C_BG)
+        self.font = get_font("Consolas", 14)
+
+    @property
+    def done(self):
+        return self.result is not None
+
+    def step(self):
+        """Plays one move the way the auto-solver does; sets result when the game ends."""
+        board = self.board
+        self.moves += 1
+        if board.first_click:
+            move = (board.rows // 2, board.cols // 2, 'reveal')
+        else:
+            move = self.solver.get_move(board)
+        if move is None:
+            self.result = "Stuck"
+            return
+        r, c, act = move
+        self.renderer.set_last_move((r, c))
+        self.renderer.mark_ai_move(r, c)
+        if act == 'reveal' and board.grid[r][c].is_mine:
+            act = 'flag'  # same mine dodge as the in-game auto-solver
+        if act == 'reveal':
+            if board.reveal(r, c) == -999:
+                board.reveal_all_mines()
+                self.result = "Hit Mine"
+                return
+        else:
+            board.toggle_flag(r, c)
+        revealed = board.revealed_count()
+        if revealed >= board.rows * board.cols - board.total_mines:
+            board.flag_all_hidden()
+            self.result = "Cleared"
+        elif self.moves >= self.max_moves:
+            self.result = "Move limit"
+
+    def draw(self):
+        """Brings the off-screen frame up to date and returns it."""
+        self.renderer.set_clusters(getattr(self.solver, 'clusters', None), self.algo)
+        self.renderer.render(self.surface)
+        legend = self.renderer.legend_rect()
+        status = pygame.Rect(0, legend.bottom + 2, self.surface.get_width(), STATUS_H)
+        pygame.draw.rect(self.surface, C_BG, status)
+        text = f"{self.algo}  move {self.moves}  {self.result or ''}"
+        self.surface.blit(render_text(self.font, text, C_TEXT_MAIN if self.result != "Hit Mine" else C_MINE),
+                          (PAD, status.y + 4))
+        return self.surface
+
+
+def render_games(games, size, difficulty, algo, out_dir, seed=None, every=1, strip=False,
+                 thumb=160, strip_cols=10, cell_size=20, ext="png"):
+    """Plays and renders `games` games; returns (frames_written, seconds)."""
+    os.makedirs(out_dir, exist_ok=True)
+    start = time.perf_counter()
+    written = 0
+    for g in range(games):
+        game_seed = None if seed is None else seed + g
+        if game_seed is not None:
+            random.seed(game_seed)  # solver guesses; mines come from the board's own RNG
+        game = HeadlessGame(size, difficulty, algo, cell_size, seed=game_seed)
+        thumbs = []
+        i = 0
+        while True:
+            last = game.done
+            if i % every == 0 or last:
+                frame = game.draw()
+                if strip:
+                    h = frame.get_height() * thumb // frame.get_width()
+                    thumbs.append(pygame.transform.smoothscale(frame, (thumb, h)))
+                else:
+                    pygame.image.save(frame, os.path.join(out_dir, f"game{g:04d}_{i:05d}.{ext}"))
+                    written += 1
+            if last:
+                break
+            game.step()
+            i += 1
+        if strip and thumbs:
+            tw, th = thumbs[0].get_size()
+            rows = (len(thumbs) + strip_cols - 1) // strip_cols
+            sheet = pygame.Surface((tw * min(strip_cols, len(thumbs)), th * rows))
+            sheet.fill(C_BG)
+            sheet.blits([(t, (k % strip_cols * tw, k // strip_cols * th)) for k, t in enumerate(thumbs)],
+                        doreturn=False)
+            pygame.image.save(sheet, os.path.join(out_dir, f"game{g:04d}_strip.{ext}"))
+            written += len(thumbs)
+        print(f"game {g}: {game.result} after {game.moves} moves")
+    return written, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render solver games off-screen.")
+    parser.add_argument("--games", type=int, default=1)
+    parser.add_argument("--size", type=int, default=16)
+    parser.add_argument("--difficulty", choices=list(MINE_RATIO), default="Medium")
+    parser.add_argument("--algo", choices=list(SOLVERS), default="BT")
+    parser.add_argument("--seed", type=int, default=None, help="seed for game g is seed+g")
+    parser.add_argument("--out", default="renders")
+    parser.add_argument("--every", type=int, default=1, help="keep every Nth frame (the last is always kept)")
+    parser.add_argument("--strip", action="store_true", help="one contact sheet per game instead of frame files")
+    parser.add_argument("--thumb", type=int, default=160, help="strip thumbnail width")
+    parser.add_argument("--cell", type=int, default=20, help="cell size in pixels")
+    parser.add_argument("--ext", default="png", help="image format by extension (png, bmp, tga, jpg)")
+    args = parser.parse_args(argv)
+
+    pygame.init()
+    written, secs = render_games(args.games, args.size, args.difficulty, args.algo, args.out,
+                                 seed=args.seed, every=max(1, args.every), strip=args.strip,
+                                 thumb=args.thumb, cell_size=args.cell, ext=args.ext)
+    print(f"{written} frames in {secs:.2f}s ({written / max(secs, 1e-9):.0f} fps) -> {args.out}")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
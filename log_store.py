@@ -0,0 +1,256 @@
+"""
+Structured game-log store (SQLite) and a small query CLI.
+
+    python log_store.py summary --solver BT --size 20 --difficulty Hard --month
+    python log_store.py summary --by solver,grid_size
+    python log_store.py recent -n 10
+    python log_store.py stats --solver BT --by month
+    python log_store.py sql "SELECT outcome, COUNT(*) FROM sessions GROUP BY outcome"
+"""
+
+import os
+import sys
+import argparse
+import datetime
+import solver_stats
+
+# --- STRUCTURED LOG STORE ---
+# Every saved session becomes one `sessions` row plus its `moves` rows.
+# Per-session totals (moves, solver moves, solver guesses) are stored on the session,
+# so aggregate questions are answered from the indexed sessions table
+# without touching individual moves. Solver comparison metrics are
+# folded into per-day mergeable summaries (solver_stats.py) in the same
+# transaction. The text session log is still written alongside for
+# reading by eye.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id          INTEGER PRIMARY KEY,
+    saved_at    TEXT NOT NULL,      -- local 'YYYY-MM-DD HH:MM:SS'
+    grid_size   INTEGER NOT NULL,
+    difficulty  TEXT,
+    mines       INTEGER,
+    mode        TEXT,               -- solo / vs_cpu / auto
+    solver      TEXT,               -- algorithm making the non-human moves (NULL in solo)
+    outcome     TEXT,               -- winner, 'Lost' or 'Unfinished'
+    seed        INTEGER,
+    replay      TEXT,
+    moves       INTEGER NOT NULL,
+    guesses     INTEGER NOT NULL,   -- solver moves whose reason was a guess
+    solver_moves INTEGER NOT NULL DEFAULT 0  -- non-Human moves (the guess-rate denominator)
+);
+CREATE INDEX IF NOT EXISTS sessions_by_solver ON sessions (solver, grid_size, difficulty, saved_at);
+CREATE INDEX IF NOT EXISTS sessions_by_time ON sessions (saved_at);
+CREATE TABLE IF NOT EXISTS moves (
+    session_id  INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    seq         INTEGER NOT NULL,
+    ts          REAL NOT NULL,
+    actor       TEXT NOT NULL,
+    action      TEXT NOT NULL,
+    r           INTEGER,
+    c           INTEGER,
+    result      TEXT,
+    reason      TEXT,
+    guess       INTEGER NOT NULL,
+    PRIMARY KEY (session_id, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS moves_by_actor ON moves (actor, guess);
+"""
+
+
+def is_guess(reason):
+    return "guess" in reason.lower()
+
+
+class LogStore:
+    """
+    SQLite-backed session store. The connection is opened on first use,
+    in the thread that uses it (the LogWriter thread in the game).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._db = None
+
+    @property
+    def db(self):
+        if self._db is None:
+            import sqlite3  # on first save, keeping it out of game startup
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._db = sqlite3.connect(self.path)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute("PRAGMA foreign_keys=ON")
+            self._db.executescript(SCHEMA + solver_stats.SCHEMA)
+            self._migrate()
+        return self._db
+
+    def _migrate(self):
+        """Brings stores written by older versions up to SCHEMA."""
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(sessions)")}
+        if "solver_moves" not in columns:
+            with self._db:
+                self._db.execute("ALTER TABLE sessions ADD COLUMN solver_moves INTEGER NOT NULL DEFAULT 0")
+                self._db.execute(
+                    "UPDATE sessions SET solver_moves = (SELECT COUNT(*) FROM moves WHERE session_id = sessions.id"
+                    " AND actor != 'Human' AND action != 'Game Over')")
+
+    def add_session(self, saved_at, grid_size, mines, rows, difficulty=None, mode=None,
+                    solver=None, outcome=None, seed=None, replay=None, stats=None):
+        """
+        rows: (ts, actor, action, r, c, result, reason) with reason already a
+        string. stats: {solver: SolverStats} gathered since the last save.
+        """
+        solver_rows = [actor != "Human" and action != "Game Over" for _, actor, action, _, _, _, _ in rows]
+        guesses = [by_solver and is_guess(row[6]) for row, by_solver in zip(rows, solver_rows)]
+        with self.db:
+            cur = self.db.execute(
+                "INSERT INTO sessions (saved_at, grid_size, difficulty, mines, mode, solver, outcome, seed, replay,"
+                " moves, guesses, solver_moves) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (saved_at, grid_size, difficulty, mines, mode, solver, outcome or "Unfinished", seed, replay,
+                 sum(1 for row in rows if row[2] != "Game Over"), sum(guesses), sum(solver_rows)))
+            sid = cur.lastrowid
+            self.db.executemany(
+                "INSERT INTO moves VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(sid, i, *row, int(g)) for i, (row, g) in enumerate(zip(rows, guesses))])
+            if stats:
+                solver_stats.merge_into_db(self.db, saved_at[:10], stats)
+        return sid
+
+    def clear(self):
+        with self.db:
+            self.db.execute("DELETE FROM moves")
+            self.db.execute("DELETE FROM sessions")
+            self.db.execute("DELETE FROM solver_daily")
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    # ── Queries ───────────────────────────────────────────────────
+    GROUPABLE = ("solver", "grid_size", "difficulty", "mode", "outcome", "day", "month")
+
+    def summary(self, by=(), solver=None, grid_size=None, difficulty=None, mode=None,
+                outcome=None, since=None, until=None):
+        """Aggregate rows: group columns, sessions, moves, solver moves, guesses, guess % (of solver moves), solver wins."""
+        where, args = [], []
+        for col, val in (("solver", solver), ("grid_size", grid_size), ("difficulty", difficulty),
+                         ("mode", mode), ("outcome", outcome)):
+            if val is not None:
+                where.append(f"{col} = ?")
+                args.append(val)
+        if since:
+            where.append("saved_at >= ?")
+            args.append(since)
+        if until:
+            where.append("saved_at < ?")
+            args.append(until)
+        exprs = {"day": "substr(saved_at, 1, 10)", "month": "substr(saved_at, 1, 7)"}
+        groups = [exprs.get(col, col) for col in by]
+        select = groups + [
+            "COUNT(*)", "SUM(moves)", "SUM(solver_moves)", "SUM(guesses)",
+            "ROUND(100.0 * SUM(guesses) / MAX(SUM(solver_moves), 1), 1)",
+            "SUM(outcome IN ('AI', 'AutoSolver'))",
+        ]
+        sql = "SELECT " + ", ".join(select) + " FROM sessions"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        if groups:
+            sql += " GROUP BY " + ", ".join(groups) + " ORDER BY " + ", ".join(groups)
+        return self.db.execute(sql, args).fetchall()
+
+    def load_solver_stats(self, solver=None, since=None, until=None, period=None):
+        return solver_stats.load_from_db(self.db, solver, since, until, period)
+
+    def recent(self, n=10):
+        return self.db.execute(
+            "SELECT id, saved_at, grid_size, difficulty, mode, solver, outcome, moves, guesses"
+            " FROM sessions ORDER BY id DESC LIMIT ?", (n,)).fetchall()
+
+
+def print_table(header, rows):
+    rows = [["" if v is None else str(v) for v in row] for row in rows]
+    widths = [max(len(h), *(len(r[i]) for r in rows)) if rows else len(h) for i, h in enumerate(header)]
+    print("  ".join(h.ljust(w) for h, w in zip(header, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print("  ".join(v.ljust(w) for v, w in zip(row, widths)))
+
+
+def main(argv=None):
+    default_db = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Game_logs", "game_logs.sqlite")
+    parser = argparse.ArgumentParser(description="Query the structured game-log store.")
+    parser.add_argument("--db", default=default_db)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("summary", help="aggregate sessions, moves and guesses")
+    p.add_argument("--by", default="", help="comma-separated: " + ", ".join(LogStore.GROUPABLE))
+    p.add_argument("--solver")
+    p.add_argument("--size", type=int)
+    p.add_argument("--difficulty")
+    p.add_argument("--mode", choices=["solo", "vs_cpu", "auto"])
+    p.add_argument("--outcome")
+    p.add_argument("--since", help="YYYY-MM-DD")
+    p.add_argument("--until", help="YYYY-MM-DD (exclusive)")
+    p.add_argument("--month", action="store_true", help="since the first of this month")
+
+    p = sub.add_parser("stats", help="long-term solver metrics (comparison runs)")
+    p.add_argument("--solver")
+    p.add_argument("--since", help="YYYY-MM-DD")
+    p.add_argument("--until", help="YYYY-MM-DD (exclusive)")
+    p.add_argument("--month", action="store_true", help="since the first of this month")
+    p.add_argument("--by", choices=["day", "month"], help="one row per period")
+
+    p = sub.add_parser("recent", help="latest sessions")
+    p.add_argument("-n", type=int, default=10)
+
+    p = sub.add_parser("sql", help="run a read-only SQL query")
+    p.add_argument("query")
+
+    args = parser.parse_args(argv)
+    if not os.path.exists(args.db):
+        print(f"No log store at {args.db}")
+        return 1
+    store = LogStore(args.db)
+
+    if args.cmd == "summary":
+        by = [c for c in args.by.split(",") if c]
+        bad = [c for c in by if c not in LogStore.GROUPABLE]
+        if bad:
+            parser.error(f"cannot group by {', '.join(bad)}")
+        since = args.since
+        if args.month:
+            since = datetime.date.today().replace(day=1).isoformat()
+        rows = store.summary(by, args.solver, args.size, args.difficulty, args.mode, args.outcome, since, args.until)
+        print_table(by + ["sessions", "moves", "solver moves", "guesses", "guess %", "solver wins"], rows)
+    elif args.cmd == "stats":
+        since = datetime.date.today().replace(day=1).isoformat() if args.month else args.since
+        rows = []
+        for (period, name), st in store.load_solver_stats(args.solver, since, args.until, args.by).items():
+            moves, t = st["moves"], st["time_us"]
+            fmt = lambda x: "" if x is None else f"{x:.0f}"
+            rows.append(([period] if args.by else []) + [
+                name, moves.count, int(st["guesses"].total),
+                f"{100 * st['guesses'].total / max(moves.count, 1):.1f}",
+                f"{st['cells_revealed'].mean or 0:.2f}", f"{st['clusters'].mean or 0:.2f}",
+                int(st["solutions"].total), int(st["pruned"].total),
+                fmt(t.quantile(0.5)), fmt(t.quantile(0.95)), fmt(t.quantile(0.99)), fmt(t.max),
+            ])
+        print_table(([args.by] if args.by else []) + [
+            "solver", "moves", "guesses", "guess %", "cells/move", "clusters/move",
+            "solutions", "pruned", "p50 us", "p95 us", "p99 us", "max us"], rows)
+    elif args.cmd == "recent":
+        print_table(["id", "saved at", "size", "difficulty", "mode", "solver", "outcome", "moves", "guesses"],
+                    store.recent(args.n))
+    else:
+        import sqlite3
+        db = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+        cur = db.execute(args.query)
+        print_table([d[0] for d in cur.description or []], cur.fetchall())
+    store.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+import os
+import math
+import bisect
+import threading
+
+# --- METRICS EXPORT ---
+# Counters, gauges and histograms in the Prometheus text format. Updating
+# a metric is a few integer/float operations on the thread that owns it
+# (the game loop, or the comparison worker under its lock), with no
+# locking or formatting; the exporter thread renders a snapshot every
+# `interval` seconds to a file (for node_exporter's textfile collector)
+# and/or serves it on http://127.0.0.1:<port>/metrics. A snapshot may be
+# a move or frame behind, which monitoring does not care about.
+
+# Upper bounds (the +Inf bucket is implicit)
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+FRAME_BUCKETS = (0.002, 0.004, 0.008, 0.0167, 0.025, 0.0333, 0.05, 0.1, 0.25)
+CLUSTER_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+def format_value(x):
+    if x == math.inf:
+        return "+Inf"
+    if isinstance(x, float) and x.is_integer():
+        return str(int(x))
+    return repr(x)
+
+
+def format_labels(names, values, extra=""):
+    pairs = [f'{n}="{escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def escape(text):
+    return text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class CounterValue:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, n=1):
+        self.value += n
+
+
+class GaugeValue:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def set(self, x):
+        self.value = x
+
+
+class HistogramValue:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, x):
+        self.counts[bisect.bisect_left(self.bounds, x)] += 1
+        self.sum += x
+
+
+class Metric:
+    """One metric family; labels(...) returns (and caches) the child for a label set."""
+    KINDS = {"counter": CounterValue, "gauge": GaugeValue}
+
+    def __init__(self, name, help, kind, labelnames=(), buckets=None, fn=None):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets or ())
+        self.fn = fn
+        self.children = {}
+
+    def _new(self):
+        if self.kind == "histogram":
+            return HistogramValue(self.buckets)
+        return self.KINDS[self.kind]()
+
+    def labels(self, *values):
+        child = self.children.get(values)
+        if child is None:
+            child = self.children[values] = self._new()
+        return child
+
+    # Unlabelled metrics act as their only child
+    def inc(self, n=1):
+        self.labels().inc(n)
+
+    def set(self, x):
+        self.labels().set(x)
+
+    def observe(self, x):
+        self.labels().observe(x)
+
+    def render(self, out):
+        out.append(f"# HELP {self.name} {self.help}\n# TYPE {self.name} {self.kind}\n")
+        if not self.labelnames and not self.children:
+            self.labels()
+        for values, child in list(self.children.items()):
+            if self.kind == "histogram":
+                cumulative = 0
+                counts = list(child.counts)
+                for bound, n in zip(self.buckets + (math.inf,), counts):
+                    cumulative += n
+                    le = 'le="' + format_value(bound) + '"'
+                    out.append(f"{self.name}_bucket{format_labels(self.labelnames, values, le)} {cumulative}\n")
+                labels = format_labels(self.labelnames, values)
+                out.append(f"{self.name}_sum{labels} {format_value(child.sum)}\n")
+                out.append(f"{self.name}_count{labels} {cumulative}\n")
+            else:
+                value = self.fn() if self.fn is not None else child.value
+                out.append(f"{self.name}{format_labels(self.labelnames, values)} {format_value(value)}\n")
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    # fn: for an unlabelled counter or gauge kept elsewhere, read at export time
+    def counter(self, name, help, labelnames=(), fn=None):
+        return self._add(Metric(name, help, "counter", labelnames, fn=fn))
+
+    def gauge(self, name, help, labelnames=(), fn=None):
+        return self._add(Metric(name, help, "gauge", labelnames, fn=fn))
+
+    def histogram(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._add(Metric(name, help, "histogram", labelnames, buckets))
+
+    def render(self):
+        out = []
+        for metric in self.metrics:
+            metric.render(out)
+        return "".join(out)
+
+
+class MetricsExporter:
+    """Writes registry.render() to `path` every `interval` s and/or serves it on `port`."""
+
+    def __init__(self, registry, path=None, port=None, interval=5.0):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._server = None
+        if port is not None:
+            # Imported here: http.server is a noticeable part of startup and only needed for --metrics-port
+            from http.server import ThreadingHTTPServer
+            self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+            self.port = self._server.server_address[1]
+            threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self._thread = None
+        if path:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def _handler(self):
+        from http.server import BaseHTTPRequestHandler
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # keep the game console clean
+
+        return Handler
+
+    def write(self):
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path + ".tmp", "w") as f:
+            f.write(self.registry.render())
+        os.replace(self.path + ".tmp", self.path)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except OSError as e:
+                print(f"Could not write metrics: {e}")
+
+    def close(self):
+        """Stops serving; the file gets one last write with the final values."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self.write()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+class GameMetrics:
+    """The game's metrics: solver latency and work, cluster sizes, frame time, log queue."""
+
+    def __init__(self, log_writer=None):
+        r = self.registry = MetricsRegistry()
+        self.solver_latency = r.histogram(
+            "minesweeper_solver_latency_seconds", "Time for one get_move() call.",
+            ("solver", "source"), LATENCY_BUCKETS)
+        self.solver_moves = r.counter(
+            "minesweeper_solver_moves_total", "Moves proposed in the solver comparison run.", ("solver",))
+        self.solver_guesses = r.counter(
+            "minesweeper_solver_guesses_total", "Comparison-run moves that were guesses.", ("solver",))
+        self.cells_revealed = r.counter(
+            "minesweeper_solver_cells_revealed_total", "Cells the comparison-run reveals would open.", ("solver",))
+        self.flags = r.counter(
+            "minesweeper_solver_flags_total", "Comparison-run flags, by whether the cell is a mine.",
+            ("solver", "correct"))
+        self.solutions = r.counter(
+            "minesweeper_solver_valid_solutions_total", "Valid cluster assignments found (DP, BT).", ("solver",))
+        self.pruned = r.counter(
+            "minesweeper_solver_branches_pruned_total", "Backtracking branches pruned (BT).", ("solver",))
+        self.cluster_size = r.histogram(
+            "minesweeper_cluster_size_cells", "Constraint cells per cluster found by a solver.",
+            ("solver",), CLUSTER_BUCKETS)
+        self.frame_time = r.histogram(
+            "minesweeper_frame_seconds", "Game loop frame time.", (), FRAME_BUCKETS)
+        self.exporter = None
+        if log_writer is not None:
+            r.gauge("minesweeper_log_queue_depth", "Items waiting for the log writer thread.",
+                    fn=log_writer.queue_depth)
+            r.counter("minesweeper_log_echo_dropped_total", "Echo lines dropped because the log queue was full.",
+                      fn=lambda: log_writer.dropped)
+
+    def export(self, path=None, port=None, interval=5.0):
+        if path or port is not None:
+            self.exporter = MetricsExporter(self.registry, path, port, interval)
+        return self.exporter
+
+    def close(self):
+        if self.exporter is not None:
+            self.exporter.close()
+            self.exporter = None
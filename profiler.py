@@ -0,0 +1,128 @@
+import os
+import time
+import datetime
+import functools
+from collections import deque
+import pygame
+from text_cache import get_font, render_text
+
+# --- FRAME / PHASE PROFILER ---
+# Each frame is split into named phases. Straight-line parts of the game
+# loop are timed with lap(name) (time since the previous lap), while
+# functions called from several places are wrapped with @timed(name).
+# Time spent inside timed functions is not double-counted by the
+# enclosing lap. The last `history` frames are kept for the on-screen
+# overlay and for dump().
+
+C_PROFILE_TEXT = (120, 255, 160)
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    i = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[i]
+
+
+class FrameProfiler:
+    def __init__(self, history=600, window=120):
+        self.frames = deque(maxlen=history)
+        self.window = window
+        self.phases = []  # phase names in first-seen order, for stable display
+        self.show_overlay = False
+        self._frame = None
+        self._frame_start = 0.0
+        self._lap_start = 0.0
+        self._scoped = 0.0
+        self._depth = 0
+
+    # ── Recording ─────────────────────────────────────────────────
+    def begin_frame(self):
+        now = time.perf_counter()
+        self._frame = {}
+        self._frame_start = now
+        self._lap_start = now
+        self._scoped = 0.0
+
+    def _add(self, name, ms):
+        if self._frame is None:
+            return
+        if name not in self._frame and name not in self.phases:
+            self.phases.append(name)
+        self._frame[name] = self._frame.get(name, 0.0) + ms
+
+    def lap(self, name):
+        """Attributes the time since the previous lap (minus timed scopes) to `name`."""
+        now = time.perf_counter()
+        self._add(name, (now - self._lap_start) * 1000 - self._scoped)
+        self._lap_start = now
+        self._scoped = 0.0
+
+    def timed(self, name):
+        """Decorator: time every call of the function as phase `name`."""
+        def wrap(fn):
+            @functools.wraps(fn)
+            def inner(*args, **kwargs):
+                self._depth += 1
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    ms = (time.perf_counter() - start) * 1000
+                    self._depth -= 1
+                    # Nested timed calls are already inside the outer one
+                    if self._depth == 0:
+                        self._add(name, ms)
+                        self._scoped += ms
+            return inner
+        return wrap
+
+    def end_frame(self):
+        if self._frame is None:
+            return
+        self._frame['frame'] = (time.perf_counter() - self._frame_start) * 1000
+        self._frame['_ts'] = time.time()
+        self.frames.append(self._frame)
+        self._frame = None
+
+    # ── Reporting ─────────────────────────────────────────────────
+    def summary(self):
+        """[(phase, p50, p95, max)] over the rolling window, frame total last."""
+        recent = list(self.frames)[-self.window:]
+        rows = []
+        for name in self.phases + ['frame']:
+            values = sorted(f.get(name, 0.0) for f in recent)
+            if values:
+                rows.append((name, percentile(values, 0.5), percentile(values, 0.95), values[-1]))
+        return rows
+
+    def dump(self, directory, n=None):
+        """Writes the last n frames (default: all kept) as CSV; returns the path."""
+        frames = list(self.frames)[-n:] if n else list(self.frames)
+        os.makedirs(directory, exist_ok=True)
+        stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = os.path.join(directory, f"profile_{stamp}.csv")
+        columns = self.phases + ['frame']
+        with open(path, "w") as f:
+            f.write("timestamp," + ",".join(f"{c}_ms" for c in columns) + "\n")
+            for fr in frames:
+                f.write(f"{fr['_ts']:.3f}," + ",".join(f"{fr.get(c, 0.0):.3f}" for c in columns) + "\n")
+        return path
+
+    def draw_overlay(self, surface, pos):
+        """Draws the p50/p95/max table at `pos`; returns the rect it covered."""
+        font = get_font("Consolas", 13)
+        rows = [("phase", "p50", "p95", "max")]
+        rows += [(name, f"{p50:.2f}", f"{p95:.2f}", f"{mx:.2f}") for name, p50, p95, mx in self.summary()]
+        line_h = 16
+        col_x = (0, 110, 165, 220)
+        rect = pygame.Rect(pos[0], pos[1], 280, 12 + line_h * len(rows))
+        panel = pygame.Surface(rect.size, pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 190))
+        surface.blit(panel, rect.topleft)
+        for i, row in enumerate(rows):
+            col = (150, 150, 150) if i == 0 else C_PROFILE_TEXT
+            for x, text in zip(col_x, row):
+                surface.blit(render_text(font, text, col), (rect.x + 8 + x, rect.y + 6 + i * line_h))
+        return rect
+
@@ -0,0 +1,500 @@
+import colorsys
+import pygame
+from constants import *
+from text_cache import get_font, render_text
+
+# --- RETAINED-MODE BOARD RENDERER ---
+# The grid is drawn once and then only the cells that actually changed
+# are repainted. Changes arrive from Board mutation events (reveal,
+# flag, undo, ...) and from the setters below (hover, highlights, hint,
+# last AI move, heatmap). render() returns the screen rects it touched
+# so the caller can pass them to pygame.display.update(rects).
+#
+# Boards larger than the window are shown through a viewport: `scroll`
+# is the pixel offset of the view into the full grid, and only cells
+# intersecting the view are ever drawn. cell_rect()/cell_at() apply the
+# view transform, so callers never deal with scroll themselves.
+
+C_AI_DOT = (200, 0, 0)
+C_LAST_MOVE = (50, 100, 255)
+C_CLUSTER_LINE = (0, 100, 255)
+
+
+# --- TILE ATLAS ---
+# Every visual cell state is drawn once per cell size into one of two
+# strip surfaces: opaque base tiles (hidden, hover, flag, mine, revealed
+# 0-8, each including the grid gap) and alpha overlay tiles (heat tint,
+# AI dot, highlight/hint/last-move borders). A cell is then a base blit
+# plus zero or more overlay blits, all batched through Surface.blits().
+class TileAtlas:
+    def __init__(self, cell_size):
+        self.cell_size = cs = int(cell_size)
+        base_keys = ['hidden', 'hover', 'flag', 'flag_hover', 'mine'] + [('num', n) for n in range(9)]
+        overlay_keys = ([('heat', b) for b in range(11)]
+                        + ['ai_dot', ('hint', 'reveal'), ('hint', 'flag'), 'last_move'])
+
+        self.base = pygame.Surface((cs * len(base_keys), cs))
+        self.overlay = pygame.Surface((cs * len(overlay_keys), cs), pygame.SRCALPHA)
+        self.base_areas = {}
+        self.overlay_areas = {}
+        for i, key in enumerate(base_keys):
+            area = pygame.Rect(i * cs, 0, cs, cs)
+            self.base_areas[key] = area
+            self._draw_base(key, area)
+        for i, key in enumerate(overlay_keys):
+            area = pygame.Rect(i * cs, 0, cs, cs)
+            self.overlay_areas[key] = area
+            self._draw_overlay(self.overlay, key, area)
+        # Overlays whose colour is chosen by the caller (visual highlights), one surface each
+        self._extra = {}
+
+    def base_tile(self, key):
+        return self.base, self.base_areas[key]
+
+    def overlay_tile(self, key):
+        area = self.overlay_areas.get(key)
+        if area is not None:
+            return self.overlay, area
+        surf = self._extra.get(key)
+        if surf is None:
+            cs = self.cell_size
+            surf = pygame.Surface((cs, cs), pygame.SRCALPHA)
+            self._draw_overlay(surf, key, surf.get_rect())
+            self._extra[key] = surf
+        return surf, None
+
+    def _draw_base(self, key, area):
+        cs = self.cell_size
+        surf = self.base
+        rect = pygame.Rect(area.x, area.y, cs - 1, cs - 1)
+        pygame.draw.rect(surf, C_BG, area)
+        if key in ('hidden', 'hover', 'flag', 'flag_hover'):
+            col = C_CELL_HOVER if key in ('hover', 'flag_hover') else C_CELL_HIDDEN
+            pygame.draw.rect(surf, col, rect, border_radius=4)
+            if key in ('flag', 'flag_hover'):
+                off = 5 * (cs / 35)
+                pts = [(rect.centerx-off, rect.centery+off), (rect.centerx-off, rect.centery-off), (rect.centerx+off, rect.centery)]
+                pygame.draw.polygon(surf, C_FLAG, pts)
+        else:
+            pygame.draw.rect(surf, C_CELL_REVEALED, rect, border_radius=4)
+            if key == 'mine':
+                pygame.draw.circle(surf, C_MINE, rect.center, cs // 4)
+            elif key[1] > 0:
+                font = get_font("Segoe UI", int(cs * 0.7), bold=True)
+                txt = font.render(str(key[1]), True, C_NUMS[key[1]])
+                surf.blit(txt, txt.get_rect(center=rect.center))
+
+    def _draw_overlay(self, surf, key, area):
+        cs = self.cell_size
+        rect = pygame.Rect(area.x, area.y, cs - 1, cs - 1)
+        surf.fill((0, 0, 0, 0), area)
+        if key == 'ai_dot':
+            pygame.draw.circle(surf, C_AI_DOT, (rect.right - 5, rect.bottom - 5), 3)
+        elif key == 'last_move':
+            pygame.draw.rect(surf, C_LAST_MOVE, rect, 3, border_radius=4)
+        elif key[0] == 'heat':
+            t = key[1] / 10
+            col = tuple(int(C_HINT_SAFE[i] + (C_MINE[i] - C_HINT_SAFE[i]) * t) for i in range(3))
+            surf.fill((*col, 90), rect)
+        elif key[0] == 'hint':
+            h_col = C_HINT_SAFE if key[1] == 'reveal' else C_HINT_MINE
+            pygame.draw.rect(surf, h_col, rect, 3, border_radius=4)
+        elif key[0] == 'highlight':
+            pygame.draw.rect(surf, key[1], rect, 4, border_radius=4)
+
+
+class BoardRenderer:
+    def __init__(self, board, cell_size, origin=(MARGIN, MARGIN)):
+        self.origin = origin
+        self.cell_size = int(cell_size)
+        self.board = None
+        # Viewport: maximum on-screen grid size (None = whole grid) and pixel scroll
+        self.view_size = None
+        self.scroll = [0, 0]
+
+        self.hover = None
+        self.highlights = frozenset()
+        self.highlight_col = None
+        self.hint = None
+        self.last_move = None
+        self.ai_moves = set()
+        self.heatmap = None
+        self.heat_buckets = None
+        self.atlas = TileAtlas(self.cell_size)
+
+        self.clusters = None
+        self.cluster_algo = None
+        self._cluster_key = None
+        # Cells the current cluster layer draws over, repainted when it changes
+        self._cluster_cells = set()
+        # BT: the hidden (r, c) around each cluster, computed once per clusters change
+        self._cluster_hidden = []
+        self._legend_stale = False
+        # Cached overlay layer (viewport-sized, alpha) and legend strip
+        self._cluster_layer = None
+        self._cluster_legend = None
+
+        self._dirty = set()
+        self._full = True
+        self.attach(board)
+
+    # ── Board / geometry ──────────────────────────────────────────
+    def attach(self, board):
+        if self.board is not None:
+            self.board.remove_listener(self._on_board_change)
+        self.board = board
+        board.add_listener(self._on_board_change)
+        self.ai_moves.clear()
+        self.heatmap = None
+        self.heat_buckets = None
+        self._clamp_scroll()
+        self.invalidate()
+
+    def detach(self):
+        if self.board is not None:
+            self.board.remove_listener(self._on_board_change)
+
+    def set_cell_size(self, cell_size):
+        if int(cell_size) != self.cell_size:
+            self.cell_size = int(cell_size)
+            self.atlas = TileAtlas(self.cell_size)
+            self._view_changed()
+
+    def set_view_size(self, w, h):
+        size = (max(0, int(w)), max(0, int(h)))
+        if size != self.view_size:
+            self.view_size = size
+            self._view_changed()
+
+    def _view_changed(self):
+        self._clamp_scroll()
+        self._cluster_layer = None
+        self._cluster_legend = None
+        self.invalidate()
+
+    def _clamp_scroll(self):
+        grid = self.grid_rect()
+        cs = self.cell_size
+        max_x = max(0, self.board.cols * cs - grid.width)
+        max_y = max(0, self.board.rows * cs - grid.height)
+        self.scroll = [min(max(0, self.scroll[0]), max_x), min(max(0, self.scroll[1]), max_y)]
+
+    def pan(self, dx, dy):
+        """Scrolls the view by (dx, dy) pixels; returns True if it moved."""
+        old = list(self.scroll)
+        self.scroll[0] += int(dx)
+        self.scroll[1] += int(dy)
+        self._clamp_scroll()
+        if self.scroll != old:
+            self._cluster_layer = None
+            self.invalidate()
+            return True
+        return False
+
+    def zoom_at(self, cell_size, pos):
+        """Changes the cell size keeping the board point under `pos` fixed on screen."""
+        old_cs = self.cell_size
+        if int(cell_size) == old_cs:
+            return
+        grid = self.grid_rect()
+        ax = min(max(pos[0], grid.left), grid.right) - grid.x
+        ay = min(max(pos[1], grid.top), grid.bottom) - grid.y
+        bx = (self.scroll[0] + ax) / old_cs
+        by = (self.scroll[1] + ay) / old_cs
+        self.set_cell_size(cell_size)
+        new_cs = self.cell_size
+        self.scroll = [int(bx * new_cs - ax), int(by * new_cs - ay)]
+        self._view_changed()
+
+    def ensure_visible(self, r, c):
+        """Pans so that cell (r, c) is inside the view (centred if it was off-screen)."""
+        grid = self.grid_rect()
+        rect = self.cell_rect(r, c)
+        if grid.contains(rect):
+            return
+        cs = self.cell_size
+        self.pan(c * cs + cs // 2 - grid.width // 2 - self.scroll[0],
+                 r * cs + cs // 2 - grid.height // 2 - self.scroll[1])
+
+    def grid_rect(self):
+        """On-screen rect of the visible part of the grid."""
+        cs = self.cell_size
+        w, h = self.board.cols * cs, self.board.rows * cs
+        if self.view_size is not None:
+            w, h = min(w, self.view_size[0]), min(h, self.view_size[1])
+        return pygame.Rect(self.origin[0], self.origin[1], w, h)
+
+    def cell_rect(self, r, c):
+        cs = self.cell_size
+        return pygame.Rect(self.origin[0] + c * cs - self.scroll[0], self.origin[1] + r * cs - self.scroll[1], cs, cs)
+
+    def cell_at(self, pos):
+        if not self.grid_rect().collidepoint(pos):
+            return None
+        x = pos[0] - self.origin[0] + self.scroll[0]
+        y = pos[1] - self.origin[1] + self.scroll[1]
+        r, c = y // self.cell_size, x // self.cell_size
+        if r < self.board.rows and c < self.board.cols:
+            return (r, c)
+        return None
+
+    def visible_cells(self):
+        """Row and column ranges of the cells intersecting the view."""
+        cs = self.cell_size
+        grid = self.grid_rect()
+        sx, sy = self.scroll
+        rows = range(sy // cs, min(self.board.rows, (sy + grid.height - 1) // cs + 1))
+        cols = range(sx // cs, min(self.board.cols, (sx + grid.width - 1) // cs + 1))
+        return rows, cols
+
+    def legend_rect(self):
+        grid = self.grid_rect()
+        return pygame.Rect(grid.x, grid.bottom + 5, grid.width, 20)
+
+    # ── Change tracking ───────────────────────────────────────────
+    def invalidate(self):
+        self._full = True
+
+    def _on_board_change(self, cells):
+        if cells is None:
+            self._full = True
+        else:
+            for cell in cells:
+                self._dirty.add((cell.r, cell.c))
+
+    def _mark(self, rc):
+        if rc is not None:
+            self._dirty.add((rc[0], rc[1]))
+
+    def set_hover(self, rc):
+        if rc != self.hover:
+            self._mark(self.hover)
+            self._mark(rc)
+            self.hover = rc
+
+    def set_highlights(self, cells, col=None):
+        cells = frozenset(cells) if cells else frozenset()
+        if cells != self.highlights or col != self.highlight_col:
+            self._dirty |= self.highlights | cells
+            self.highlights = cells
+            self.highlight_col = col
+
+    def set_hint(self, hint):
+        if hint != self.hint:
+            if self.hint: self._mark(self.hint)
+            if hint: self._mark(hint)
+            self.hint = hint
+
+    def set_last_move(self, rc):
+        if rc != self.last_move:
+            self._mark(self.last_move)
+            self._mark(rc)
+            self.last_move = rc
+
+    def mark_ai_move(self, r, c):
+        if (r, c) not in self.ai_moves:
+            self.ai_moves.add((r, c))
+            self._dirty.add((r, c))
+
+    def clear_ai_moves(self):
+        self._dirty |= self.ai_moves
+        self.ai_moves.clear()
+
+    def set_heatmap(self, probs):
+        """probs: grid from ProbabilityMap (cached per version) or None to hide."""
+        if probs is self.heatmap:
+            return
+        buckets = None
+        if probs is not None:
+            # Quantise to 10% steps so tinted tiles can be shared
+            buckets = [[None if p is None else int(round(p * 10)) for p in row] for row in probs]
+        old = self.heat_buckets
+        if old is None or buckets is None:
+            self._full = True
+        else:
+            for r, row in enumerate(buckets):
+                old_row = old[r]
+                for c, b in enumerate(row):
+                    if b != old_row[c]:
+                        self._dirty.add((r, c))
+        self.heatmap = probs
+        self.heat_buckets = buckets
+
+    def set_clusters(self, clusters, algo):
+        """Cluster visualisation: colored overlays for BT, graph edges for D&C/DP."""
+        # Solvers assign a new list per solve (and a reset clears it in place),
+        # so identity plus length tells a new analysis from the one drawn.
+        # self.clusters keeps the list alive, so its id can't be reused meanwhile.
+        # The board version is part of the key too: a reveal or flag between
+        # solves changes which hidden cells a cluster still covers.
+        key = None
+        if clusters:
+            key = (id(clusters), len(clusters), algo, self.board.version)
+        if key != self._cluster_key:
+            self._cluster_key = key
+            self.clusters = clusters if clusters else None
+            self.cluster_algo = algo
+            self._cluster_layer = None
+            self._cluster_legend = None
+            cells = self._covered_cells() if self.clusters else set()
+            if not self.clusters:
+                self._cluster_hidden = []
+            self._dirty |= self._cluster_cells | cells
+            self._cluster_cells = cells
+            self._legend_stale = True
+
+    def _covered_cells(self):
+        """(r, c) of every cell the cluster layer draws on."""
+        cells = set()
+        self._cluster_hidden = []
+        if self.cluster_algo == "BT":
+            # Cluster cells may belong to a solver worker's copy of the board; read the live one
+            grid = self.board.grid
+            for cluster in self.clusters:
+                hidden = {(n.r, n.c) for cl_cell in cluster for n in grid[cl_cell.r][cl_cell.c].neighbors
+                          if not n.is_revealed and not n.is_flagged}
+                self._cluster_hidden.append(hidden)
+                if hidden:
+                    cells |= hidden
+                    cells.update((cl_cell.r, cl_cell.c) for cl_cell in cluster)
+        else:
+            # An edge can cross the cells between its ends: take their bounding box
+            for cluster in self.clusters:
+                for c1, c2 in zip(cluster, cluster[1:]):
+                    for r in range(min(c1.r, c2.r), max(c1.r, c2.r) + 1):
+                        for c in range(min(c1.c, c2.c), max(c1.c, c2.c) + 1):
+                            cells.add((r, c))
+        return cells
+
+    # ── Drawing ───────────────────────────────────────────────────
+    def render(self, surface, full=False):
+        """Repaints changed cells (or everything) and returns the rects touched."""
+        rows, cols = self.visible_cells()
+        if full or self._full:
+            cells = [(r, c) for r in rows for c in cols]
+            full = True
+        elif self._dirty or self._legend_stale:
+            cells = [(r, c) for r, c in self._dirty if r in rows and c in cols]
+        else:
+            return []
+        self._dirty.clear()
+        self._full = False
+
+        if self.clusters and self._cluster_layer is None:
+            self._build_cluster_layer()
+        layer = self._cluster_layer
+
+        grid = self.grid_rect()
+        blits = []
+        for r, c in cells:
+            self._cell_blits(blits, r, c)
+        if layer is not None:
+            # Composite the cached cluster layer over what was just repainted
+            if full:
+                blits.append((layer, grid.topleft))
+            else:
+                for r, c in cells:
+                    rect = self.cell_rect(r, c)
+                    blits.append((layer, rect.topleft, rect.move(-grid.x, -grid.y)))
+        # Edge cells of a scrolled view are partially visible; keep them inside it
+        clip = surface.get_clip()
+        surface.set_clip(grid)
+        surface.blits(blits, doreturn=False)
+        surface.set_clip(clip)
+
+        rects = [grid] if full else [self.cell_rect(r, c).clip(grid) for r, c in cells]
+        if full or self._legend_stale:
+            self._legend_stale = False
+            legend = self.legend_rect()
+            pygame.draw.rect(surface, C_BG, legend)
+            if self._cluster_legend is not None:
+                surface.blit(self._cluster_legend, legend.topleft)
+            rects.append(legend)
+        return rects
+
+    def _cell_blits(self, blits, r, c):
+        """Appends the atlas blits for one cell: a base tile plus its overlays."""
+        atlas = self.atlas
+        cell = self.board.grid[r][c]
+        dest = self.cell_rect(r, c).topleft
+
+        if cell.is_revealed:
+            key = 'mine' if cell.is_mine else ('num', cell.number)
+        else:
+            hover = self.hover == (r, c)
+            if cell.is_flagged:
+                key = 'flag_hover' if hover else 'flag'
+            else:
+                key = 'hover' if hover else 'hidden'
+        blits.append((atlas.base, dest, atlas.base_areas[key]))
+
+        overlays = []
+        # The map can trail the board by a solve; never tint a cell opened or flagged since
+        if self.heat_buckets is not None and not cell.is_revealed and not cell.is_flagged:
+            bucket = self.heat_buckets[r][c]
+            if bucket is not None:
+                overlays.append(('heat', bucket))
+        # Red dot for AI moves
+        if (r, c) in self.ai_moves:
+            overlays.append('ai_dot')
+        # Visual highlights (Thinking/Choosing)
+        if (r, c) in self.highlights and self.highlight_col:
+            overlays.append(('highlight', tuple(self.highlight_col)))
+        if self.hint and self.hint[0] == r and self.hint[1] == c:
+            overlays.append(('hint', 'reveal' if self.hint[2] == 'reveal' else 'flag'))
+        if self.last_move == (r, c):
+            overlays.append('last_move')
+
+        for key in overlays:
+            surf, area = atlas.overlay_tile(key)
+            blits.append((surf, dest, area) if area else (surf, dest))
+
+    def _build_cluster_layer(self):
+        """Renders the cluster visualisation for the current view into an alpha layer (and legend)."""
+        cs = self.cell_size
+        sx, sy = self.scroll
+        grid = self.grid_rect()
+        layer = pygame.Surface(grid.size, pygame.SRCALPHA)
+        self._cluster_legend = None
+        if self.cluster_algo == "BT":
+            # BACKTRACKING: Colored overlay on analyzed cells
+            active_clusters = []
+            for ci, (cluster, cluster_hidden) in enumerate(zip(self.clusters, self._cluster_hidden)):
+                if not cluster_hidden:
+                    continue
+
+                # Unique, stable color per cluster using the Golden Angle
+                hue = ((ci * 137.508) % 360) / 360.0
+                r, g, b = colorsys.hsv_to_rgb(hue, 0.8, 0.9)
+                bcolor = (int(r * 255), int(g * 255), int(b * 255))
+                active_clusters.append((ci, bcolor))
+
+                for hr, hc in cluster_hidden:
+                    tile = (hc * cs - sx, hr * cs - sy, cs-1, cs-1)
+                    layer.fill((*bcolor, 30), tile)
+                    pygame.draw.rect(layer, bcolor, tile, 1, border_radius=4)
+
+                # Thin border on constraint (numbered) cells
+                for con_cell in cluster:
+                    pygame.draw.rect(layer, bcolor, (con_cell.c * cs - sx, con_cell.r * cs - sy, cs-1, cs-1), 1, border_radius=4)
+
+            # Legend below the grid
+            legend = pygame.Surface(self.legend_rect().size, pygame.SRCALPHA)
+            legend_font = get_font("Consolas", 13)
+            lx = 0
+            for ci, bcolor in active_clusters:
+                pygame.draw.rect(legend, bcolor, (lx, 7, 10, 10))
+                ltxt = render_text(legend_font, f"Cluster {ci+1}", bcolor)
+                legend.blit(ltxt, (lx + 14, 5))
+                lx += ltxt.get_width() + 24
+            self._cluster_legend = legend
+        else:
+            # D&C / DP: Line-based visualization
+            half = cs // 2
+            for cluster in self.clusters:
+                for k in range(len(cluster) - 1):
+                    c1, c2 = cluster[k], cluster[k+1]
+                    p1 = (c1.c * cs + half - sx, c1.r * cs + half - sy)
+                    p2 = (c2.c * cs + half - sx, c2.r * cs + half - sy)
+                    pygame.draw.line(layer, C_CLUSTER_LINE, p1, p2, 2)
+        self._cluster_layer = layer
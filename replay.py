@@ -0,0 +1,195 @@
+from board import Board
+
+# --- BINARY REPLAYS ---
+# A replay is the board parameters plus the move stream, enough to
+# rebuild any game exactly: mines are placed from the board's seeded RNG
+# on the first reveal, and every later state follows from the moves.
+#
+#   header: b"MSRP", format version, varint rows, cols, mines, seed
+#   move:   varint (actor << 2 | action), then varint r, c (not for undo)
+#
+# Varints are little-endian base-128, so on boards up to 128 wide a move
+# is 3 bytes, against ~110 bytes for a row of the text session log.
+# Recording a move is a bytearray append; the stream has no length
+# field, so a file can be written out at any point of the game.
+
+MAGIC = b"MSRP"
+FORMAT_VERSION = 1
+
+ACTORS = ["Human", "AI", "AutoSolver"]
+ACTIONS = ["Reveal", "Flag", "Chord", "Undo"]
+ACTOR_CODES = {name: i for i, name in enumerate(ACTORS)}
+ACTION_CODES = {name: i for i, name in enumerate(ACTIONS)}
+UNDO = ACTION_CODES["Undo"]
+
+
+def write_varint(out, n):
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def read_varint(data, i):
+    """Returns (value, next index)."""
+    n = shift = 0
+    while True:
+        b = data[i]
+        i += 1
+        n |= (b & 0x7F) << shift
+        if b < 0x80:
+            return n, i
+        shift += 7
+
+
+class ReplayRecorder:
+    """Accumulates the encoded replay of one game."""
+
+    def __init__(self, board):
+        self.data = bytearray(MAGIC)
+        self.data.append(FORMAT_VERSION)
+        for n in (board.rows, board.cols, board.total_mines, board.seed):
+            write_varint(self.data, n)
+        self.moves = 0
+
+    @classmethod
+    def resume(cls, data):
+        """Continues an existing stream (a resumed saved game, see board_file.py)."""
+        recorder = cls.__new__(cls)
+        recorder.data = bytearray(data)
+        recorder.moves = len(Replay.decode(data).moves)
+        return recorder
+
+    def record(self, actor, action, r=0, c=0):
+        """action is "Reveal", "Flag", "Chord" or "Undo" (as in the session log)."""
+        code = ACTION_CODES[action]
+        write_varint(self.data, ACTOR_CODES[actor] << 2 | code)
+        if code != UNDO:
+            write_varint(self.data, r)
+            write_varint(self.data, c)
+        self.moves += 1
+
+    def __len__(self):
+        return self.moves
+
+
+class Replay:
+    """A decoded replay: board parameters and [(actor, action, r, c)]."""
+
+    def __init__(self, rows, cols, mines, seed, moves):
+        self.rows = rows
+        self.cols = cols
+        self.mines = mines
+        self.seed = seed
+        self.moves = moves
+
+    @classmethod
+    def decode(cls, data):
+        if data[:4] != MAGIC:
+            raise ValueError("not a replay file")
+        if data[4] != FORMAT_VERSION:
+            raise ValueError(f"unsupported replay version {data[4]}")
+        i = 5
+        header = []
+        for _ in range(4):
+            n, i = read_varint(data, i)
+            header.append(n)
+        moves = []
+        while i < len(data):
+            code, i = read_varint(data, i)
+            actor, action = ACTORS[code >> 2], ACTIONS[code & 3]
+            r = c = 0
+            if action != "Undo":
+                r, i = read_varint(data, i)
+                c, i = read_varint(data, i)
+            moves.append((actor, action, r, c))
+        return cls(*header, moves)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.decode(f.read())
+
+    def new_board(self):
+        return Board(self.rows, self.cols, self.mines, seed=self.seed)
+
+    def board_at(self, n=None):
+        """Board after the first n moves (all by default)."""
+        board = self.new_board()
+        for move in self.moves[:n]:
+            apply_move(board, move)
+        return board
+
+
+def apply_move(board, move):
+    """Applies a recorded move with the game's own consequences (mine hit, board cleared)."""
+    actor, action, r, c = move
+    if action == "Undo":
+        board.undo()
+        return
+    if action == "Flag":
+        board.toggle_flag(r, c)
+        return
+    res = board.reveal(r, c) if action == "Reveal" else board.chord(r, c)
+    if res == -999:
+        board.game_over = True
+        board.reveal_all_mines()
+    elif not board.game_over and board.hidden_count() <= board.total_mines:
+        # Cleared needs every unrevealed cell to be a mine; the hidden count rules most moves out cheaply
+        revealed = board.revealed_count()
+        if revealed >= board.rows * board.cols - board.total_mines:
+            board.game_over = True
+            board.flag_all_hidden()
+
+
+# --- REPLAY PLAYER ---
+# Seeking rebuilds the board from the nearest checkpoint at or before the
+# target instead of from move 0. A checkpoint (Board.checkpoint) is taken
+# every `interval` moves the first time playback passes that point, so
+# any seek costs at most `interval` move applications once the game has
+# been played through, forwards or backwards.
+
+class ReplayPlayer:
+    def __init__(self, replay, interval=32):
+        self.replay = replay
+        self.interval = interval
+        self.board = replay.new_board()
+        self.pos = 0  # moves applied to self.board
+        self.checkpoints = {0: self.board.checkpoint()}
+
+    def __len__(self):
+        return len(self.replay.moves)
+
+    def last_move(self):
+        return self.replay.moves[self.pos - 1] if self.pos else None
+
+    def _forward(self, n):
+        moves = self.replay.moves
+        while self.pos < n:
+            apply_move(self.board, moves[self.pos])
+            self.pos += 1
+            if self.pos % self.interval == 0 and self.pos not in self.checkpoints:
+                self.checkpoints[self.pos] = self.board.checkpoint()
+
+    def seek(self, n):
+        """Brings the board to the state after move n (clamped); returns n."""
+        n = max(0, min(len(self), n))
+        if not (self.pos <= n < self.pos + self.interval):
+            # Latest known checkpoint at or before n (later ones are added on the way)
+            base = n - n % self.interval
+            while base not in self.checkpoints:
+                base -= self.interval
+            if not (base <= self.pos <= n):
+                self.board.restore(self.checkpoints[base])
+                self.pos = base
+        self._forward(n)
+        return n
+
+    def step(self, k=1):
+        return self.seek(self.pos + k)
+
+    def build_checkpoints(self):
+        """Plays the whole game once so every later seek is bounded by `interval`."""
+        pos = self.pos
+        self.seek(len(self))
+        return self.seek(pos)
@@ -1,27 +1,41 @@
-import random
 from collections import deque
+from solver_probability import count_solutions
+from game_log import SolverLog
 
 # --- BACKTRACKING SOLVER ---
 # Uses systematic trial-and-error with constraint pruning.
 # Assigns mine/safe to each hidden cell, checks constraints, and
 # backtracks immediately when a contradiction is detected.
+# Clusters above CLUSTER_SIZE_LIMIT are split at small cut sets
+# (see solver_probability.count_solutions) and counted piecewise.
+# One solve usually proves many cells at once; the rest are queued and
+# handed out on the following calls while the board has only changed
+# by the move just returned (version + 1), skipping a full re-solve.
 
 CLUSTER_SIZE_LIMIT = 25  # Max hidden cells per cluster before fallback
 
 class BacktrackingSolver:
-    def __init__(self):
-        self.logs = ["AI Ready (Backtrack Mode)"]
+    def __init__(self, silent=False):
+        self.logs = SolverLog("AI Ready (Backtrack Mode)", silent=silent)
         self.name = "Backtracking"
         self.clusters = []
         self.bt_stats = {"solutions": 0, "pruned": 0}
+        # Certain moves left over from the last solve: [(r, c, act)], valid for _queue_board at _queue_version
+        self._queue = deque()
+        self._queue_board = None
+        self._queue_version = None
 
-    def log(self, message):
-        self.logs.append(message)
-        if len(self.logs) > 8:
-            self.logs.pop(0)
+    def log(self, message, *args):
+        self.logs.add(message, *args)
 
     # ── Public Interface ──────────────────────────────────────────
     def get_move(self, board, is_hint=False):
+        if not is_hint:
+            queued = self._next_queued(board)
+            if queued:
+                return queued
+            self._queue.clear()
+
         frontier = board.get_revealed_numbered_nodes()
         self.clusters = self.find_clusters(frontier, board)
         self.bt_stats = {"solutions": 0, "pruned": 0}
@@ -42,19 +56,24 @@ class BacktrackingSolver:
         if all_safe:
             t = all_safe[0]
             if not is_hint:
-                self.log(f"BT: 100% Safe ({t.r},{t.c}) [{self.bt_stats['pruned']} pruned]")
+                self._queue.extend((m.r, m.c, 'reveal') for m in all_safe[1:])
+                self._queue.extend((m.r, m.c, 'flag') for m in all_flags)
+                self._queue_board, self._queue_version = board, board.version + 1
+                self.log("BT: 100%% Safe (%d,%d) [%d pruned]", t.r, t.c, self.bt_stats['pruned'])
             return (t.r, t.c, 'reveal')
 
         # Priority 2: Deterministic mine flag
         if all_flags:
             t = all_flags[0]
             if not is_hint:
-                self.log(f"BT: 100% Mine ({t.r},{t.c}) [{self.bt_stats['pruned']} pruned]")
+                self._queue.extend((m.r, m.c, 'flag') for m in all_flags[1:])
+                self._queue_board, self._queue_version = board, board.version + 1
+                self.log("BT: 100%% Mine (%d,%d) [%d pruned]", t.r, t.c, self.bt_stats['pruned'])
             return (t.r, t.c, 'flag')
 
         # Priority 3: Probability-informed guess
         if best_guess and not is_hint:
-            self.log(f"BT: Best guess ({best_guess.r},{best_guess.c}) P={1-best_prob:.0%} safe")
+            self.log("BT: Best guess (%d,%d) P=%.0f%% safe", best_guess.r, best_guess.c, (1 - best_prob) * 100)
             return (best_guess.r, best_guess.c, 'reveal')
 
         # Priority 4: Random fallback
@@ -62,11 +81,43 @@ class BacktrackingSolver:
             return self.make_guess(board)
         return None
 
+    def _next_queued(self, board):
+        """Next still-applicable certain move from the last solve, or None."""
+        if board is not self._queue_board or board.version != self._queue_version:
+            return None
+        while self._queue:
+            r, c, act = self._queue.popleft()
+            cell = board.grid[r][c]
+            if cell.is_revealed or cell.is_flagged:
+                continue  # already uncovered by a cascade
+            self._queue_version = board.version + 1
+            self.log_certain(r, c, act)
+            return (r, c, act)
+        return None
+
+    def take_queued(self):
+        """
+        Hands over the certain moves left from the last solve, for callers
+        that solve on a copy of the board (SolverWorker) and apply them to
+        the live one. Log each with log_certain() as it is applied.
+        """
+        moves = list(self._queue)
+        self._queue.clear()
+        self._queue_board = None
+        return moves
+
+    def log_certain(self, r, c, act):
+        if act == 'reveal':
+            self.log("BT: 100%% Safe (%d,%d) [%d pruned]", r, c, self.bt_stats['pruned'])
+        else:
+            self.log("BT: 100%% Mine (%d,%d) [%d pruned]", r, c, self.bt_stats['pruned'])
+
     # ── Cluster Isolation (BFS) ───────────────────────────────────
     def find_clusters(self, frontier, board):
         """DIVIDE: BFS to find independent connected components."""
         visited = set()
         clusters = []
+        frontier_set = set(frontier)
         for cell in frontier:
             if cell in visited:
                 continue
@@ -77,7 +128,7 @@ class BacktrackingSolver:
                 cluster.append(current)
                 for h in board.get_hidden_neighbors(current):
                     for p in h.neighbors:
-                        if p in frontier and p not in visited:
+                        if p in frontier_set and p not in visited:
                             visited.add(p)
                             queue.append(p)
             clusters.append(cluster)
@@ -103,11 +154,6 @@ class BacktrackingSolver:
         if not hidden_list:
             return [], [], None
 
-        # Safety: fall back to basic rules for very large clusters
-        if len(hidden_list) > CLUSTER_SIZE_LIMIT:
-            self.log(f"BT: Cluster too large ({len(hidden_list)}), using rules")
-            return self._basic_solve(cluster, board)
-
         n = len(hidden_list)
         cell_to_idx = {h: i for i, h in enumerate(hidden_list)}
 
@@ -116,9 +162,18 @@ class BacktrackingSolver:
         for cell in cluster:
             flagged = len(board.get_flagged_neighbors(cell))
             need = cell.number - flagged
-            indices = [cell_to_idx[h] for h in hidden_list if h in cell.neighbors]
+            indices = [cell_to_idx[h] for h in cell.neighbors if h in cell_to_idx]
             constraints.append((need, indices))
 
+        # Large clusters: split at small cut sets instead of one 2^n search
+        if n > CLUSTER_SIZE_LIMIT:
+            result = count_solutions(n, constraints)
+            if result is None:
+                self.log("BT: Cluster too large (%d), using rules", n)
+                return self._basic_solve(cluster, board)
+            self.bt_stats['solutions'] += result[0]
+            return self._interpret(hidden_list, result[0], result[1])
+
         # 3. Map each hidden cell → which constraints it participates in
         cell_constraints = [[] for _ in range(n)]
         for ci, (_, indices) in enumerate(constraints):
@@ -190,14 +245,18 @@ class BacktrackingSolver:
         self.bt_stats['pruned'] += pruned[0]
 
         # 5. Interpret results
+        return self._interpret(hidden_list, total_solutions[0], mine_counts)
+
+    def _interpret(self, hidden_list, total_solutions, mine_counts):
+        """Turns per-cell mine counts into (safe, flags, best_guess_info)."""
         safe_moves = []
         flag_moves = []
         best_guess = None
         lowest_prob = 1.0
 
-        if total_solutions[0] > 0:
+        if total_solutions > 0:
             for i, h in enumerate(hidden_list):
-                prob = mine_counts[i] / total_solutions[0]
+                prob = mine_counts[i] / total_solutions
                 if prob == 1.0:           # mine in EVERY solution
                     flag_moves.append(h)
                 elif prob == 0.0:         # mine in NO solution
@@ -236,10 +295,8 @@ class BacktrackingSolver:
 
     # ── Random Guess ──────────────────────────────────────────────
     def make_guess(self, board):
-        valid = [(r, c) for r in range(board.rows) for c in range(board.cols)
-                 if not board.grid[r][c].is_revealed and not board.grid[r][c].is_flagged]
-        if valid:
-            m = random.choice(valid)
-            self.log(f"BT: Random guess at ({m[0]},{m[1]})")
-            return (m[0], m[1], 'reveal')
+        cell = board.random_hidden()
+        if cell:
+            self.log("BT: Random guess at (%d,%d)", cell.r, cell.c)
+            return (cell.r, cell.c, 'reveal')
         return None
@@ -1,15 +1,14 @@
-import random
 from collections import deque
+from game_log import SolverLog
 
 class DNCSolver:
-    def __init__(self):
-        self.logs = ["AI Ready (D&C Mode)"]
+    def __init__(self, silent=False):
+        self.logs = SolverLog("AI Ready (D&C Mode)", silent=silent)
         self.name = "Divide & Conquer"
         self.clusters = []
 
-    def log(self, message):
-        self.logs.append(message)
-        if len(self.logs) > 8: self.logs.pop(0)
+    def log(self, message, *args):
+        self.logs.add(message, *args)
 
     def get_move(self, board, is_hint=False):
         # 1. DIVIDE: Find Independent Clusters using Graph BFS
@@ -28,12 +27,12 @@ class DNCSolver:
         # 3. COMBINE: Execute the findings
         if all_safe_reveals:
             target = all_safe_reveals[0]
-            if not is_hint: self.log(f"D&C: Local constraints safe at ({target.r},{target.c})")
+            if not is_hint: self.log("D&C: Local constraints safe at (%d,%d)", target.r, target.c)
             return (target.r, target.c, 'reveal')
 
         if all_safe_flags:
             target = all_safe_flags[0]
-            if not is_hint: self.log(f"D&C: Local constraints mine at ({target.r},{target.c})")
+            if not is_hint: self.log("D&C: Local constraints mine at (%d,%d)", target.r, target.c)
             return (target.r, target.c, 'flag')
 
         if not is_hint: return self.make_guess(board)
@@ -79,10 +78,8 @@ class DNCSolver:
         return c_safe, c_flags
 
     def make_guess(self, board):
-        valid = [(r, c) for r in range(board.rows) for c in range(board.cols) 
-                 if not board.grid[r][c].is_revealed and not board.grid[r][c].is_flagged]
-        if valid:
-            m = random.choice(valid)
-            self.log(f"D&C: Guessing at ({m[0]},{m[1]})")
-            return (m[0], m[1], 'reveal')
+        cell = board.random_hidden()
+        if cell:
+            self.log("D&C: Guessing at (%d,%d)", cell.r, cell.c)
+            return (cell.r, cell.c, 'reveal')
         return None
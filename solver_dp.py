@@ -1,16 +1,15 @@
-import random
-from collections import deque   
+from collections import deque
+from solver_probability import cluster_constraints, count_solutions
+from game_log import SolverLog
 
 class DPSolver:
-    def __init__(self):
-        self.logs = ["AI Ready (DP Mode)"]
+    def __init__(self, silent=False):
+        self.logs = SolverLog("AI Ready (DP Mode)", silent=silent)
         self.name = "Dynamic Programming"
         self.clusters = []
 
-    def log(self, message):
-        self.logs.append(message)
-        if len(self.logs) > 8:
-            self.logs.pop(0)
+    def log(self, message, *args):
+        self.logs.add(message, *args)
 
     def get_move(self, board, is_hint=False):
         frontier = board.get_revealed_numbered_nodes()
@@ -27,13 +26,13 @@ class DPSolver:
         if all_safe_reveals:
             target = all_safe_reveals[0]
             if not is_hint:
-                self.log(f"DP: 100% Safe Reality at ({target.r},{target.c})")
+                self.log("DP: 100%% Safe Reality at (%d,%d)", target.r, target.c)
             return (target.r, target.c, 'reveal')
 
         if all_safe_flags:
             target = all_safe_flags[0]
             if not is_hint:
-                self.log(f"DP: 100% Mine Reality at ({target.r},{target.c})")
+                self.log("DP: 100%% Mine Reality at (%d,%d)", target.r, target.c)
             return (target.r, target.c, 'flag')
 
         if not is_hint:
@@ -85,10 +84,9 @@ class DPSolver:
         if not hidden_list:
             return [], []
 
-        # --- GUARD: Skip full DP for oversized clusters ---
+        # --- GUARD: Oversized clusters are split at small cut sets ---
         if len(hidden_list) > self.MAX_HIDDEN_PER_CLUSTER:
-            self.log(f"DP: Cluster too large ({len(hidden_list)} hidden), using greedy fallback")
-            return self._greedy_fallback(cluster, board)
+            return self._decomposed_solve(cluster, board)
 
         initial_needs = []
         for cell in cluster:
@@ -150,6 +148,25 @@ class DPSolver:
 
         return safe_moves, flag_moves
 
+    def _decomposed_solve(self, cluster, board):
+        """Exact counting via cut-set decomposition; greedy only if no narrow cut exists."""
+        hidden_list, constraints = cluster_constraints(cluster, board)
+        result = count_solutions(len(hidden_list), constraints)
+        if result is None:
+            self.log("DP: Cluster too large (%d hidden), using greedy fallback", len(hidden_list))
+            return self._greedy_fallback(cluster, board)
+
+        total_configs, mine_counts = result
+        safe_moves = []
+        flag_moves = []
+        if total_configs > 0:
+            for i, h in enumerate(hidden_list):
+                if mine_counts[i] == total_configs:
+                    flag_moves.append(h)
+                elif mine_counts[i] == 0:
+                    safe_moves.append(h)
+        return safe_moves, flag_moves
+
     def _greedy_fallback(self, cluster, board):
         """Simple constraint-based fallback for large clusters."""
         safe_moves = []
@@ -172,17 +189,11 @@ class DPSolver:
         return safe_moves, flag_moves
 
     def make_guess(self, board):
-        valid = [
-            (r, c)
-            for r in range(board.rows)
-            for c in range(board.cols)
-            if not board.grid[r][c].is_revealed and not board.grid[r][c].is_flagged
-        ]
-
-        if valid:
-            m = random.choice(valid)
-            self.log(f"DP: Probability guess at ({m[0]},{m[1]})")
-            return (m[0], m[1], 'reveal')
+        cell = board.random_hidden()
+
+        if cell:
+            self.log("DP: Probability guess at (%d,%d)", cell.r, cell.c)
+            return (cell.r, cell.c, 'reveal')
 
         return None
 
@@ -0,0 +1,462 @@
+from collections import deque
+
+# --- MINE PROBABILITY MAP ---
+# Computes a per-cell mine probability grid for the whole board.
+# Frontier clusters are solved by exhaustive backtracking (same
+# pruning as BacktrackingSolver); cells with no revealed neighbour
+# share the remaining mine density. Results are cached per board
+# version, and per-cluster results are reused across moves so only
+# the clusters a move actually touched are re-solved.
+
+CLUSTER_SIZE_LIMIT = 25  # Max hidden cells per cluster before estimating
+
+
+def find_clusters(frontier, board):
+    """BFS over the frontier: two numbered cells connect if they share a hidden neighbour."""
+    frontier_set = set(frontier)
+    visited = set()
+    clusters = []
+    for cell in frontier:
+        if cell in visited:
+            continue
+        cluster, queue = [], deque([cell])
+        visited.add(cell)
+        while queue:
+            current = queue.popleft()
+            cluster.append(current)
+            for h in board.get_hidden_neighbors(current):
+                for p in h.neighbors:
+                    if p in frontier_set and p not in visited:
+                        visited.add(p)
+                        queue.append(p)
+        clusters.append(cluster)
+    return clusters
+
+
+def cluster_constraints(cluster, board):
+    """
+    Builds the constraint system for one cluster.
+
+    Returns (hidden_list, constraints) where constraints is a list of
+    (remaining_need, [indices into hidden_list]).
+    """
+    hidden_list = []
+    cell_to_idx = {}
+    constraints = []
+    for cell in cluster:
+        indices = []
+        flagged = 0
+        for n in cell.neighbors:
+            if n.is_flagged:
+                flagged += 1
+            elif not n.is_revealed:
+                if n not in cell_to_idx:
+                    cell_to_idx[n] = len(hidden_list)
+                    hidden_list.append(n)
+                indices.append(cell_to_idx[n])
+        if indices:
+            constraints.append((cell.number - flagged, indices))
+    return hidden_list, constraints
+
+
+def enumerate_solutions(n, constraints):
+    """
+    Counts every valid mine assignment of n variables.
+
+    Returns (total_solutions, mine_counts) where mine_counts[i] is the
+    number of valid solutions in which variable i is a mine.
+    """
+    cell_constraints = [[] for _ in range(n)]
+    for ci, (_, indices) in enumerate(constraints):
+        for idx in indices:
+            cell_constraints[idx].append(ci)
+
+    assignment = [0] * n
+    mine_counts = [0] * n
+    total = [0]
+
+    def consistent(cell_idx):
+        for ci in cell_constraints[cell_idx]:
+            need, indices = constraints[ci]
+            mines = 0
+            unassigned = 0
+            for i in indices:
+                if i > cell_idx:
+                    unassigned += 1
+                elif assignment[i] == 1:
+                    mines += 1
+            if mines > need or mines + unassigned < need:
+                return False
+        return True
+
+    def backtrack(idx):
+        if idx == n:
+            total[0] += 1
+            for i in range(n):
+                if assignment[i]:
+                    mine_counts[i] += 1
+            return
+        for val in (0, 1):
+            assignment[idx] = val
+            if consistent(idx):
+                backtrack(idx + 1)
+        assignment[idx] = 0
+
+    backtrack(0)
+    return total[0], mine_counts
+
+
+# --- INTRA-CLUSTER DECOMPOSITION ---
+# A long frontier forms one connected cluster whose variables are only
+# weakly coupled. We split it at a small cut set S (an articulation point
+# or a thin BFS layer): for each of the 2^|S| assignments of S the rest
+# falls apart into independent pieces that are counted separately and
+# multiplied. Cost grows with the cut width, not with the cluster size.
+
+LEAF_SIZE = 12       # Pieces this small are enumerated directly
+MAX_CUT_WIDTH = 8    # Give up (return None) if no cut this narrow exists
+
+
+def count_solutions(n, constraints, leaf_size=LEAF_SIZE, max_cut=MAX_CUT_WIDTH):
+    """
+    Exact solution count for a cluster of any size via cut-set decomposition.
+
+    Returns (total_solutions, mine_counts) like enumerate_solutions, or
+    None when the cluster has no cut narrower than max_cut.
+    """
+    var_constraints = [[] for _ in range(n)]
+    for ci, (_, indices) in enumerate(constraints):
+        for i in indices:
+            var_constraints[i].append(ci)
+
+    adjacency = [set() for _ in range(n)]
+    for _, indices in constraints:
+        for i in indices:
+            adjacency[i].update(indices)
+    for i in range(n):
+        adjacency[i].discard(i)
+
+    plan = _plan(set(range(n)), adjacency, leaf_size, max_cut)
+    if plan is None:
+        return None
+
+    assigned = {}
+    total, counts = _evaluate(plan, constraints, var_constraints, assigned)
+    return total, [counts.get(i, 0) for i in range(n)]
+
+
+def _components(variables, adjacency):
+    seen = set()
+    comps = []
+    for start in variables:
+        if start in seen:
+            continue
+        comp, queue = [start], deque([start])
+        seen.add(start)
+        while queue:
+            v = queue.popleft()
+            for w in adjacency[v]:
+                if w in variables and w not in seen:
+                    seen.add(w)
+                    comp.append(w)
+                    queue.append(w)
+        comps.append(set(comp))
+    return comps
+
+
+def _articulation_points(variables, adjacency):
+    """
+    Iterative Tarjan over the subgraph induced by variables.
+
+    Returns {point: [sizes of the pieces it cuts off]}, built from DFS
+    subtree sizes so cut candidates can be scored without a BFS each.
+    """
+    disc, low, size, cuts = {}, {}, {}, {}
+    counter = 0
+    for root in variables:
+        if root in disc:
+            continue
+        disc[root] = low[root] = counter
+        size[root] = 1
+        counter += 1
+        root_children = []
+        stack = [(root, None, iter(adjacency[root]))]
+        while stack:
+            v, parent, it = stack[-1]
+            advanced = False
+            for w in it:
+                if w not in variables or w == parent:
+                    continue
+                if w in disc:
+                    low[v] = min(low[v], disc[w])
+                else:
+                    disc[w] = low[w] = counter
+                    size[w] = 1
+                    counter += 1
+                    stack.append((w, v, iter(adjacency[w])))
+                    advanced = True
+                    break
+            if advanced:
+                continue
+            stack.pop()
+            if parent is not None:
+                low[parent] = min(low[parent], low[v])
+                size[parent] += size[v]
+                if parent == root:
+                    root_children.append(size[v])
+                elif low[v] >= disc[parent]:
+                    cuts.setdefault(parent, []).append(size[v])
+        if len(root_children) > 1:
+            cuts[root] = root_children
+    return cuts
+
+
+def _bfs_layers(start, variables, adjacency):
+    layers, seen, frontier = [], {start}, [start]
+    while frontier:
+        layers.append(frontier)
+        nxt = []
+        for v in frontier:
+            for w in adjacency[v]:
+                if w in variables and w not in seen:
+                    seen.add(w)
+                    nxt.append(w)
+        frontier = nxt
+    return layers
+
+
+def _best_cut(variables, adjacency, max_cut):
+    """Picks the cut set minimising (cut width, largest remaining piece)."""
+    n = len(variables)
+    scored = []
+    for v, pieces in _articulation_points(variables, adjacency).items():
+        # Whatever the DFS subtrees don't cover stays attached above v
+        rest = n - 1 - sum(pieces)
+        scored.append(({v}, 1, max(max(pieces), rest)))
+
+    # Thin BFS layers from a peripheral vertex (two-sweep) separate snaking frontiers.
+    # BFS edges only join adjacent layers, so a layer always splits before from after.
+    start = next(iter(variables))
+    start = _bfs_layers(start, variables, adjacency)[-1][0]
+    layers = _bfs_layers(start, variables, adjacency)
+    before = len(layers[0]) if layers else 0
+    for layer in layers[1:-1]:
+        after = n - before - len(layer)
+        if len(layer) <= max_cut:
+            scored.append((set(layer), len(layer), max(before, after)))
+        before += len(layer)
+
+    best, best_score = None, None
+    for cut, width, largest in scored:
+        score = 2 * width + largest
+        if best_score is None or score < best_score:
+            best, best_score = cut, score
+    return best
+
+
+def _plan(variables, adjacency, leaf_size, max_cut):
+    """Builds a graph-only decomposition tree, reused for every cut assignment."""
+    comps = _components(variables, adjacency)
+    if len(comps) > 1:
+        children = []
+        for comp in comps:
+            child = _plan(comp, adjacency, leaf_size, max_cut)
+            if child is None:
+                return None
+            children.append(child)
+        return ("split", children)
+
+    if len(variables) <= leaf_size:
+        return ("leaf", sorted(variables))
+
+    cut = _best_cut(variables, adjacency, max_cut)
+    if cut is None or len(cut) > max_cut:
+        return None
+    child = _plan(variables - cut, adjacency, leaf_size, max_cut)
+    if child is None:
+        return None
+    return ("cut", sorted(cut), child)
+
+
+def _evaluate(node, constraints, var_constraints, assigned):
+    kind = node[0]
+
+    if kind == "leaf":
+        leaf_vars = node[1]
+        local = {v: i for i, v in enumerate(leaf_vars)}
+        seen = set()
+        local_constraints = []
+        for v in leaf_vars:
+            for ci in var_constraints[v]:
+                if ci in seen:
+                    continue
+                seen.add(ci)
+                need, indices = constraints[ci]
+                idxs = []
+                for i in indices:
+                    if i in assigned:
+                        need -= assigned[i]
+                    else:
+                        idxs.append(local[i])
+                if need < 0 or need > len(idxs):
+                    return 0, {}
+                local_constraints.append((need, idxs))
+        total, mine_counts = enumerate_solutions(len(leaf_vars), local_constraints)
+        return total, {v: mine_counts[i] for i, v in enumerate(leaf_vars)}
+
+    if kind == "split":
+        results = []
+        for child in node[1]:
+            total, counts = _evaluate(child, constraints, var_constraints, assigned)
+            if total == 0:
+                return 0, {}
+            results.append((total, counts))
+        grand = 1
+        for total, _ in results:
+            grand *= total
+        merged = {}
+        for total, counts in results:
+            others = grand // total
+            for v, cnt in counts.items():
+                merged[v] = cnt * others
+        return grand, merged
+
+    # kind == "cut": condition on every assignment of the cut variables
+    cut, child = node[1], node[2]
+    touched = {ci for v in cut for ci in var_constraints[v]}
+    grand = 0
+    merged = {}
+    for mask in range(1 << len(cut)):
+        for bit, v in enumerate(cut):
+            assigned[v] = (mask >> bit) & 1
+        feasible = True
+        for ci in touched:
+            need, indices = constraints[ci]
+            mines = 0
+            open_vars = 0
+            for i in indices:
+                if i in assigned:
+                    mines += assigned[i]
+                else:
+                    open_vars += 1
+            if mines > need or mines + open_vars < need:
+                feasible = False
+                break
+        if feasible:
+            total, counts = _evaluate(child, constraints, var_constraints, assigned)
+            if total:
+                grand += total
+                for v in cut:
+                    if assigned[v]:
+                        merged[v] = merged.get(v, 0) + total
+                for v, cnt in counts.items():
+                    merged[v] = merged.get(v, 0) + cnt
+    for v in cut:
+        del assigned[v]
+    return grand, merged
+
+
+class ProbabilityMap:
+    def __init__(self, size_limit=CLUSTER_SIZE_LIMIT):
+        self.size_limit = size_limit
+        self._board = None
+        self._version = None
+        self._grid = None
+        # Constraint signature -> {(r, c): probability}, kept for the clusters of the last solve
+        self._cluster_cache = {}
+
+    def probabilities(self, board):
+        """
+        Returns a rows x cols grid of mine probabilities in [0, 1].
+
+        Revealed and flagged cells are None. Repeated calls for the same
+        board version return the cached grid without re-solving.
+        """
+        if board is self._board and board.version == self._version:
+            return self._grid
+
+        grid = [[None] * board.cols for _ in range(board.rows)]
+        hidden_total = 0
+        flagged_total = 0
+        for row in board.grid:
+            for cell in row:
+                if cell.is_flagged:
+                    flagged_total += 1
+                elif not cell.is_revealed:
+                    hidden_total += 1
+
+        if board.first_click:
+            density = board.total_mines / max(1, board.rows * board.cols)
+            for row in board.grid:
+                for cell in row:
+                    if not cell.is_flagged:
+                        grid[cell.r][cell.c] = density
+            return self._store(board, grid)
+
+        frontier = board.get_revealed_numbered_nodes()
+        new_cache = {}
+        expected_frontier = 0.0
+        frontier_count = 0
+
+        for cluster in find_clusters(frontier, board):
+            hidden_list, constraints = cluster_constraints(cluster, board)
+            if not hidden_list:
+                continue
+            signature = tuple(
+                (need, tuple((hidden_list[i].r, hidden_list[i].c) for i in indices))
+                for need, indices in constraints
+            )
+            probs = self._cluster_cache.get(signature)
+            if probs is None:
+                probs = self._solve_cluster(hidden_list, constraints)
+            new_cache[signature] = probs
+
+            for (r, c), p in probs.items():
+                if grid[r][c] is None:
+                    frontier_count += 1
+                    expected_frontier += p
+                grid[r][c] = p
+
+        self._cluster_cache = new_cache
+
+        # Interior cells share whatever mines the frontier is not expected to hold
+        interior_count = hidden_total - frontier_count
+        if interior_count > 0:
+            remaining = board.total_mines - flagged_total - expected_frontier
+            density = min(1.0, max(0.0, remaining / interior_count))
+            for row in board.grid:
+                for cell in row:
+                    if not cell.is_revealed and not cell.is_flagged and grid[cell.r][cell.c] is None:
+                        grid[cell.r][cell.c] = density
+
+        return self._store(board, grid)
+
+    def _store(self, board, grid):
+        self._board = board
+        self._version = board.version
+        self._grid = grid
+        return grid
+
+    def _solve_cluster(self, hidden_list, constraints):
+        if len(hidden_list) > self.size_limit:
+            result = count_solutions(len(hidden_list), constraints)
+            if result is None:
+                return self._estimate_cluster(hidden_list, constraints)
+            total, mine_counts = result
+        else:
+            total, mine_counts = enumerate_solutions(len(hidden_list), constraints)
+        if total == 0:
+            # Contradiction (e.g. a wrong flag): fall back to the local estimate
+            return self._estimate_cluster(hidden_list, constraints)
+        return {(h.r, h.c): mine_counts[i] / total for i, h in enumerate(hidden_list)}
+
+    def _estimate_cluster(self, hidden_list, constraints):
+        """Averages need/hidden over each cell's constraints for clusters too large to enumerate."""
+        sums = [0.0] * len(hidden_list)
+        counts = [0] * len(hidden_list)
+        for need, indices in constraints:
+            local = min(1.0, max(0.0, need / len(indices)))
+            for i in indices:
+                sums[i] += local
+                counts[i] += 1
+        return {(h.r, h.c): sums[i] / counts[i] for i, h in enumerate(hidden_list)}
@@ -0,0 +1,208 @@
+import json
+import math
+
+# --- PERSISTENT SOLVER STATISTICS ---
+# Solver metrics are kept as mergeable summaries: every metric is a
+# count/sum/min/max, and timings also carry a quantile sketch. Summaries
+# from any two periods or sessions combine by merge(), so the store only
+# keeps one row per (day, solver) and folds each saved session into it;
+# longer ranges are read by merging the day rows.
+
+# Per-move metrics recorded by the comparison run (see app.update_solver_stats)
+METRICS = ("moves", "guesses", "cells_revealed", "correct_flags", "wrong_flags",
+           "clusters", "solutions", "pruned", "time_us")
+SKETCHED = {"time_us"}
+
+
+class QuantileSketch:
+    """
+    Log-bucketed quantile sketch (DDSketch-style): value x > 0 lands in
+    bucket ceil(log_gamma(x)), so any quantile is returned within
+    `accuracy` relative error, and two sketches merge by adding counts.
+    """
+    def __init__(self, accuracy=0.02):
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, x, n=1):
+        self.count += n
+        if x <= 0:
+            self.zeros += n
+            return
+        k = math.ceil(math.log(x) / self._log_gamma)
+        self.buckets[k] = self.buckets.get(k, 0) + n
+
+    def merge(self, other):
+        self.count += other.count
+        self.zeros += other.zeros
+        for k, n in other.buckets.items():
+            self.buckets[k] = self.buckets.get(k, 0) + n
+
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for k in sorted(self.buckets):
+            seen += self.buckets[k]
+            if rank < seen:
+                return 2 * self.gamma ** k / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+    def to_dict(self):
+        return {"a": self.accuracy, "z": self.zeros, "b": {str(k): n for k, n in self.buckets.items()}}
+
+    @classmethod
+    def from_dict(cls, d):
+        sketch = cls(d["a"])
+        sketch.zeros = d["z"]
+        sketch.buckets = {int(k): n for k, n in d["b"].items()}
+        sketch.count = sketch.zeros + sum(sketch.buckets.values())
+        return sketch
+
+
+class Summary:
+    """count / sum / min / max of one metric, plus a sketch if asked for."""
+    __slots__ = ("count", "total", "min", "max", "sketch")
+
+    def __init__(self, sketch=False):
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.sketch = QuantileSketch() if sketch else None
+
+    def add(self, x):
+        self.count += 1
+        self.total += x
+        self.min = x if self.min is None else min(self.min, x)
+        self.max = x if self.max is None else max(self.max, x)
+        if self.sketch is not None:
+            self.sketch.add(x)
+
+    def merge(self, other):
+        if not other.count:
+            return
+        self.count += other.count
+        self.total += other.total
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        if other.sketch is not None:
+            if self.sketch is None:
+                self.sketch = QuantileSketch(other.sketch.accuracy)
+            self.sketch.merge(other.sketch)
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def quantile(self, q):
+        return self.sketch.quantile(q) if self.sketch is not None else None
+
+    def to_dict(self):
+        d = {"n": self.count, "s": self.total, "lo": self.min, "hi": self.max}
+        if self.sketch is not None:
+            d["q"] = self.sketch.to_dict()
+        return d
+
+    @classmethod
+    def from_dict(cls, d):
+        summary = cls()
+        summary.count, summary.total, summary.min, summary.max = d["n"], d["s"], d["lo"], d["hi"]
+        if "q" in d:
+            summary.sketch = QuantileSketch.from_dict(d["q"])
+        return summary
+
+
+class SolverStats:
+    """All metric summaries for one solver over some period."""
+
+    def __init__(self):
+        self.metrics = {}
+
+    def record(self, **values):
+        """One observation per metric given, e.g. record(moves=1, guesses=0, time_us=812.0)."""
+        for name, x in values.items():
+            summary = self.metrics.get(name)
+            if summary is None:
+                summary = self.metrics[name] = Summary(sketch=name in SKETCHED)
+            summary.add(x)
+
+    def merge(self, other):
+        for name, summary in other.metrics.items():
+            if name not in self.metrics:
+                self.metrics[name] = Summary()
+            self.metrics[name].merge(summary)
+
+    def __getitem__(self, name):
+        return self.metrics.get(name) or Summary()
+
+    def __bool__(self):
+        return bool(self.metrics)
+
+    def to_json(self):
+        return json.dumps({name: s.to_dict() for name, s in self.metrics.items()}, separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, text):
+        stats = cls()
+        stats.metrics = {name: Summary.from_dict(d) for name, d in json.loads(text).items()}
+        return stats
+
+
+# --- STORAGE (inside the log_store SQLite file) ---
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS solver_daily (
+    day     TEXT NOT NULL,      -- 'YYYY-MM-DD'
+    solver  TEXT NOT NULL,
+    data    TEXT NOT NULL,      -- SolverStats.to_json()
+    PRIMARY KEY (day, solver)
+) WITHOUT ROWID;
+"""
+
+
+def merge_into_db(db, day, stats_by_solver):
+    """Folds {solver: SolverStats} into that day's rows (caller owns the transaction)."""
+    for solver, stats in stats_by_solver.items():
+        if not stats:
+            continue
+        row = db.execute("SELECT data FROM solver_daily WHERE day = ? AND solver = ?", (day, solver)).fetchone()
+        if row:
+            merged = SolverStats.from_json(row[0])
+            merged.merge(stats)
+            stats = merged
+        db.execute("INSERT OR REPLACE INTO solver_daily VALUES (?, ?, ?)", (day, solver, stats.to_json()))
+
+
+def load_from_db(db, solver=None, since=None, until=None, period=None):
+    """
+    {(period, solver): SolverStats} merged over the selected days. period is
+    None (everything together), 'day' or 'month'.
+    """
+    sql, args, where = "SELECT day, solver, data FROM solver_daily", [], []
+    if solver:
+        where.append("solver = ?")
+        args.append(solver)
+    if since:
+        where.append("day >= ?")
+        args.append(since)
+    if until:
+        where.append("day < ?")
+        args.append(until)
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    out = {}
+    for day, name, data in db.execute(sql + " ORDER BY day", args):
+        key = (day if period == "day" else day[:7] if period == "month" else None, name)
+        stats = SolverStats.from_json(data)
+        if key in out:
+            out[key].merge(stats)
+        else:
+            out[key] = stats
+    return out
@@ -0,0 +1,142 @@
+import sys
+import queue
+import threading
+import time
+from board import Board
+
+# --- BACKGROUND SOLVER WORKER ---
+# get_move() can take a long time on large clusters, so the game loop
+# hands requests to a single worker thread and keeps rendering. The
+# live board keeps changing on the main thread (undo and clicks run
+# mid-solve), so a request carries an immutable snapshot of it
+# (Board.snapshot) that the worker loads into its own mirror Board and
+# solves there. Every request is also stamped with the board version it
+# was made for, and a result is only handed back if the board is still
+# at that version. Otherwise the request is resubmitted, so an undo or
+# a click mid-solve can never apply a move computed for an older position.
+# The same worker can also solve a probability map (submit_map), which is
+# handed back even if the board has moved on: the caller keeps showing the
+# last map and asks again for the current position.
+
+
+class SolverWorker:
+    def __init__(self):
+        self._requests = queue.Queue()
+        self._results = queue.Queue()
+        # Bumped by cancel(); results from older generations are dropped
+        self.generation = 0
+        # (generation, solver, board, version, snapshot, mode) of the outstanding request,
+        # mode being 'move', 'hint' or 'map'
+        self.pending = None
+        # Worker-side boards, one per (rows, cols, mines); only the worker thread touches them
+        self._mirrors = {}
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def busy(self):
+        return self.pending is not None
+
+    @property
+    def idle(self):
+        """Nothing outstanding and no solver call in progress: safe to use a solver directly."""
+        # unfinished_tasks covers queued requests and the one being solved (task_done() after it)
+        return self.pending is None and self._requests.unfinished_tasks == 0
+
+    def submit(self, solver, board, is_hint=False):
+        self._submit(solver, board, 'hint' if is_hint else 'move')
+
+    def submit_map(self, prob_map, board):
+        """Requests prob_map.probabilities() (solver_probability.ProbabilityMap) for the board as it is now."""
+        self._submit(prob_map, board, 'map')
+
+    def _submit(self, solver, board, mode):
+        self.pending = (self.generation, solver, board, board.version, board.snapshot(), mode)
+        self._requests.put(self.pending)
+
+    def cancel(self):
+        """Forgets the outstanding request (reset, undo, leaving the game)."""
+        self.generation += 1
+        self.pending = None
+
+    def poll(self):
+        """
+        Returns (moves, elapsed_s) once the outstanding request has a fresh
+        result, or None while it is still being solved. moves is the
+        solver's move followed by any further certain moves from the same
+        solve (take_queued, Backtracking), and is empty if it had none.
+        For submit_map requests it is the probability grid instead.
+        """
+        while True:
+            try:
+                ticket, moves, error, elapsed = self._results.get_nowait()
+            except queue.Empty:
+                return None
+            if ticket is not self.pending:
+                continue
+            generation, solver, board, version, snapshot, mode = ticket
+            if board.version != version and mode != 'map':
+                # Board changed while solving: ask again for the current position
+                self._submit(solver, board, mode)
+                continue
+            self.pending = None
+            if error is not None:
+                raise error
+            return moves, elapsed
+
+    def defer(self, fn):
+        """
+        Runs fn() on the worker thread once everything queued before it,
+        including a cancelled solve still in progress, has finished. Lets
+        the game reset a solver without racing a get_move() on it.
+        """
+        self._requests.put(fn)
+
+    def stop(self):
+        self.cancel()
+        self._requests.put(None)
+
+    def _run(self):
+        while True:
+            ticket = self._requests.get()
+            if ticket is None:
+                return
+            try:
+                if callable(ticket):
+                    ticket()
+                else:
+                    self._solve(ticket)
+            except Exception as e:
+                # _solve reports its own errors through poll(); this is a deferred call failing
+                print(f"Error in deferred solver call: {e}", file=sys.stderr)
+            finally:
+                self._requests.task_done()
+
+    def _mirror(self, board):
+        key = (board.rows, board.cols, board.total_mines)
+        mirror = self._mirrors.get(key)
+        if mirror is None:
+            self._mirrors.clear()  # a new game size; the old mirror is no longer needed
+            mirror = self._mirrors[key] = Board(board.rows, board.cols, board.total_mines, seed=0)
+        return mirror
+
+    def _solve(self, ticket):
+        generation, solver, board, version, snapshot, mode = ticket
+        if generation != self.generation:
+            return
+        start = time.perf_counter()
+        moves, error = [], None
+        try:
+            mirror = self._mirror(board)
+            mirror.load_snapshot(snapshot)
+            if mode == 'map':
+                moves = solver.probabilities(mirror)
+            else:
+                move = solver.get_move(mirror, is_hint=mode == 'hint')
+                if move:
+                    moves.append(move)
+                    if mode == 'move' and hasattr(solver, 'take_queued'):
+                        moves.extend(solver.take_queued())
+        except Exception as e:
+            error = e
+        self._results.put((ticket, moves, error, time.perf_counter() - start))
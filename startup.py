@@ -0,0 +1,30 @@
+import sys
+import time
+
+# --- STARTUP TIMING ---
+# Main.py imports this module first, so T0 is as close to process start
+# as Python code gets. Stages are marked as startup goes on, ending with
+# the first menu frame on screen (time to first interactive frame).
+# `python Main.py --startup-report` prints them; for a per-module
+# breakdown of the import stage, run `python -X importtime Main.py`.
+
+T0 = time.perf_counter()
+marks = []
+
+
+def mark(label):
+    """Records the end of a startup stage (only the first mark of each label counts)."""
+    if all(name != label for name, _ in marks):
+        marks.append((label, time.perf_counter()))
+
+
+def report(stream=None):
+    stream = stream or sys.stdout
+    prev = T0
+    lines = ["Startup:"]
+    for label, t in marks:
+        lines.append(f"  {label:<14} {(t - prev) * 1000:7.1f} ms")
+        prev = t
+    lines.append(f"  {'total':<14} {(prev - T0) * 1000:7.1f} ms")
+    stream.write("\n".join(lines) + "\n")
+    stream.flush()
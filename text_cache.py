@@ -0,0 +1,57 @@
+import pygame
+from collections import OrderedDict
+
+# --- TEXT / GLYPH CACHE ---
+# pygame.font.SysFont() scans the system font list and Font.render()
+# rasterises the string every call. Fonts are memoised by (name, size,
+# bold) forever (there are only a handful), and rendered text surfaces
+# are kept in a small LRU keyed by (font, text, colour).
+
+_fonts = {}
+
+
+def get_font(name, size, bold=False):
+    """Cached pygame.font.SysFont."""
+    key = (name, int(size), bold)
+    font = _fonts.get(key)
+    if font is None:
+        font = pygame.font.SysFont(name, int(size), bold=bold)
+        _fonts[key] = font
+    return font
+
+
+class TextCache:
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self._surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, font, text, color):
+        key = (font, text, tuple(color))
+        surf = self._surfaces.get(key)
+        if surf is not None:
+            self._surfaces.move_to_end(key)
+            self.hits += 1
+            return surf
+        self.misses += 1
+        surf = font.render(text, True, color)
+        self._surfaces[key] = surf
+        if len(self._surfaces) > self.maxsize:
+            self._surfaces.popitem(last=False)
+        return surf
+
+    def clear(self):
+        self._surfaces.clear()
+
+    def __len__(self):
+        return len(self._surfaces)
+
+
+# Shared instance used by the UI
+text_cache = TextCache()
+
+
+def render_text(font, text, color):
+    """font.render(text, True, color), served from the shared cache."""
+    return text_cache.render(font, text, color)